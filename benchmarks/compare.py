@@ -0,0 +1,56 @@
+# benchmarks/compare.py
+"""
+Compare deux fichiers de résultats de benchmarks/run.py (même taille, même cible).
+
+Usage :
+    python -m benchmarks.compare benchmarks/results/avant.json benchmarks/results/apres.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Dict, Optional, Tuple
+
+METRICS = [
+    ("build_s", ("build_s",)),
+    ("peak_rss_mb", ("peak_rss_mb",)),
+    ("p50_ms", ("query", "p50_ms")),
+    ("p95_ms", ("query", "p95_ms")),
+    ("p99_ms", ("query", "p99_ms")),
+    ("qps", ("batch", "qps")),
+    ("threaded_qps", ("threaded", "qps")),
+]
+
+
+def _get(run: dict, path: Tuple[str, ...]) -> Optional[float]:
+    cur = run
+    for key in path:
+        if not isinstance(cur, dict) or key not in cur:
+            return None
+        cur = cur[key]
+    return cur if isinstance(cur, (int, float)) else None
+
+
+def _index(doc: dict) -> Dict[Tuple[int, str], dict]:
+    return {(r["films"], r["target"]): r for r in doc.get("runs", [])}
+
+
+def compare(before: dict, after: dict) -> None:
+    a, b = _index(before), _index(after)
+    print(f"{'films':>9} {'cible':<20} {'métrique':<13} {'avant':>10} {'après':>10} {'écart':>8}")
+    for key in sorted(set(a) & set(b)):
+        for name, path in METRICS:
+            x, y = _get(a[key], path), _get(b[key], path)
+            if x is None or y is None:
+                continue
+            delta = f"{(y - x) / x * 100:+.1f}%" if x else "n/a"
+            print(f"{key[0]:>9} {key[1]:<20} {name:<13} {x:>10} {y:>10} {delta:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+    with open(args.before, encoding="utf-8") as f1, open(args.after, encoding="utf-8") as f2:
+        compare(json.load(f1), json.load(f2))
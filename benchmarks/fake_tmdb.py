@@ -0,0 +1,264 @@
+# benchmarks/fake_tmdb.py
+"""
+Faux serveur TMDb pour les tests de charge hors-ligne (aucun quota consommé).
+
+Routes servies (réponses déterministes, au format TMDb) :
+    /movie/{id}            détails (+ credits)
+    /movie/{id}/similar    20 films par page
+    /search/movie          20 résultats construits à partir de `query`
+    /movie/popular         20 films par page
+    /movie/changes         ids modifiés
+    /discover/movie        20 films par page (filtres with_cast / with_crew / with_genres)
+Un répertoire de fixtures peut remplacer n'importe quelle réponse : le fichier
+`<chemin avec / remplacés par _>.json` (ex. `movie_550.json`) est servi tel quel.
+
+Injection de défauts : latence (moyenne + gigue), taux d'erreurs 500, taux de 429,
+et/ou limite de débit façon TMDb (429 au-delà de `limit_rps`).
+
+Compteurs par endpoint et statut : GET /__stats (POST /__reset pour remettre à zéro).
+
+Usage :
+    python -m benchmarks.fake_tmdb --port 8765 --latency-ms 80 --error-rate 0.01 --rate-429 0.02
+    TMDB_BASE=http://127.0.0.1:8765 TMDB_API_KEY=fake uvicorn src.api.app:app
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.core.tmdb_client import RateLimiter
+
+_ROUTES = [
+    (re.compile(r"^/movie/(\d+)/similar$"), "/movie/{id}/similar"),
+    (re.compile(r"^/movie/popular$"), "/movie/popular"),
+    (re.compile(r"^/movie/changes$"), "/movie/changes"),
+    (re.compile(r"^/movie/(\d+)$"), "/movie/{id}"),
+    (re.compile(r"^/search/movie$"), "/search/movie"),
+    (re.compile(r"^/discover/movie$"), "/discover/movie"),
+]
+_GENRES = [(18, "Drame"), (35, "Comédie"), (53, "Thriller"), (28, "Action"), (10749, "Romance"),
+           (27, "Horreur"), (80, "Crime"), (12, "Aventure"), (878, "Science-Fiction"), (16, "Animation")]
+_WORDS = ("nuit", "retour", "dernier", "jour", "ombre", "amour", "guerre", "ville", "secret", "voyage")
+MAX_ID = 1_000_000
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_429: float = 0.0
+    limit_rps: float = 0.0  # 0 = pas de limite
+
+
+# ---------- Payloads ----------
+def _rng(*key) -> random.Random:
+    return random.Random(zlib.crc32(repr(key).encode()))
+
+
+def _summary(mid: int) -> dict:
+    r = _rng("movie", mid)
+    return {
+        "id": mid,
+        "title": f"{r.choice(_WORDS).capitalize()} {r.choice(_WORDS)} {mid}",
+        "original_title": f"Movie {mid}",
+        "poster_path": f"/fake{mid}.jpg",
+        "release_date": f"{r.randint(1950, 2025)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}",
+        "overview": "Synopsis factice. " * 8,
+        "popularity": round(r.lognormvariate(1.0, 1.2), 3),
+        "vote_average": round(min(10.0, max(0.0, r.gauss(6.3, 1.0))), 1),
+        "vote_count": r.randint(0, 20000),
+        "genre_ids": [g for g, _ in r.sample(_GENRES, r.randint(1, 3))],
+        "adult": False,
+    }
+
+
+def movie_payload(mid: int) -> dict:
+    r = _rng("credits", mid)
+    m = _summary(mid)
+    genre_ids = m.pop("genre_ids")
+    m["genres"] = [{"id": g, "name": n} for g, n in _GENRES if g in genre_ids]
+    m["credits"] = {
+        "cast": [{"id": 2_000_000 + r.randint(1, 5000), "name": f"Acteur {i}", "order": i} for i in range(10)],
+        "crew": [{"id": 1_000_000 + r.randint(1, 2000), "name": "Réalisateur", "job": "Director"}],
+    }
+    return m
+
+
+def _page(key, page: int, n: int = 20) -> dict:
+    r = _rng(key, page)
+    return {"page": page, "total_pages": 50, "total_results": 1000,
+            "results": [_summary(r.randint(1, MAX_ID)) for _ in range(n)]}
+
+
+def search_payload(query: str, page: int) -> dict:
+    data = _page(("search", query.lower()), page)
+    for m in data["results"]:
+        m["title"] = f"{query} {m['title']}"
+    return data
+
+
+def route(path: str, query: Dict[str, str]) -> Tuple[Optional[str], Optional[dict]]:
+    """(endpoint normalisé, payload) ; (None, None) si la route est inconnue."""
+    page = int(query.get("page") or 1)
+    for rx, name in _ROUTES:
+        m = rx.match(path)
+        if not m:
+            continue
+        if name == "/movie/{id}":
+            return name, movie_payload(int(m.group(1)))
+        if name == "/movie/{id}/similar":
+            return name, _page(("similar", int(m.group(1))), page)
+        if name == "/movie/popular":
+            return name, _page("popular", page)
+        if name == "/movie/changes":
+            r = _rng("changes", query.get("start_date"), page)
+            return name, {"page": page, "total_pages": 1,
+                          "results": [{"id": r.randint(1, MAX_ID), "adult": False} for _ in range(100)]}
+        if name == "/discover/movie":
+            key = tuple(query.get(f) for f in ("with_cast", "with_crew", "with_genres"))
+            return name, _page(("discover",) + key, page)
+        return name, search_payload(query.get("query", ""), page)
+    return None, None
+
+
+# ---------- Serveur ----------
+class FakeTMDb:
+    """Serveur HTTP dans un thread ; `stats()` donne les appels par (endpoint, statut)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, faults: Optional[Faults] = None,
+                 fixtures: Optional[str] = None):
+        self.faults = faults or Faults()
+        self.fixtures = fixtures
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._limiter = RateLimiter(self.faults.limit_rps) if self.faults.limit_rps > 0 else None
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeTMDb":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        out: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for (endpoint, status), n in self._counts.items():
+                out.setdefault(endpoint, {})[str(status)] = n
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def _count(self, endpoint: str, status: int) -> None:
+        with self._lock:
+            self._counts[(endpoint, status)] += 1
+
+    def _throttled(self) -> bool:
+        f = self.faults
+        if f.rate_429 and random.random() < f.rate_429:
+            return True
+        return self._limiter is not None and not self._limiter.try_acquire()
+
+    def _fixture(self, path: str) -> Optional[dict]:
+        if not self.fixtures:
+            return None
+        fp = os.path.join(self.fixtures, path.strip("/").replace("/", "_") + ".json")
+        if not os.path.exists(fp):
+            return None
+        with open(fp, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict) -> None:
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json;charset=utf-8")
+                self.send_header("Content-Length", str(len(raw)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                u = urlparse(self.path)
+                if u.path == "/__stats":
+                    return self._send(200, fake.stats())
+                query = {k: v[0] for k, v in parse_qs(u.query).items()}
+                endpoint, body = route(u.path, query)
+                if endpoint is None:
+                    return self._send(404, {"status_code": 34, "status_message": "Not found"})
+
+                f = fake.faults
+                delay = max(0.0, f.latency_ms + random.uniform(-f.jitter_ms, f.jitter_ms)) / 1000.0
+                if delay:
+                    time.sleep(delay)
+                if fake._throttled():
+                    fake._count(endpoint, 429)
+                    return self._send(429, {"status_code": 25, "status_message": "Rate limit exceeded"})
+                if f.error_rate and random.random() < f.error_rate:
+                    fake._count(endpoint, 500)
+                    return self._send(500, {"status_code": 11, "status_message": "Internal error"})
+                fake._count(endpoint, 200)
+                self._send(200, fake._fixture(u.path) or body)
+
+            def do_POST(self):
+                if urlparse(self.path).path == "/__reset":
+                    fake.reset()
+                    return self._send(200, {"ok": True})
+                self._send(404, {})
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--limit-rps", type=float, default=0.0, help="429 au-delà de ce débit (0 = aucun)")
+    parser.add_argument("--fixtures", default=None, help="répertoire de réponses JSON")
+    args = parser.parse_args()
+    server = FakeTMDb(args.host, args.port, Faults(args.latency_ms, args.jitter_ms, args.error_rate,
+                                                   args.rate_429, args.limit_rps), args.fixtures)
+    print(f"Faux TMDb sur {server.url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
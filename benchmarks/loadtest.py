@@ -0,0 +1,283 @@
+# benchmarks/loadtest.py
+"""
+Test de charge HTTP hors-ligne de src/api/app.py.
+
+1. démarre le faux TMDb (benchmarks/fake_tmdb.py) avec la latence / les erreurs / les 429 voulus
+2. démarre l'API (uvicorn, process séparé) avec TMDB_BASE pointé sur ce serveur
+3. envoie `/recommend`, `/tmdb/search` et `/catalog/top-rated` à débit cible (boucle ouverte :
+   les requêtes partent à heure fixe, la latence compte depuis l'heure prévue, donc l'attente
+   en file est incluse)
+4. rapporte par endpoint : percentiles de latence, taux d'erreurs, codes HTTP, et les appels
+   TMDb amont par endpoint/statut
+
+Usage (depuis la racine) :
+    python -m benchmarks.loadtest --rps 30 --duration 30
+    python -m benchmarks.loadtest --rps 50 --tmdb-latency-ms 120 --tmdb-rate-429 0.05 \
+        --db-url sqlite:///benchmarks/.data/catalog_10000_0.db
+    python -m benchmarks.loadtest --api-url http://127.0.0.1:8000 --tmdb-url http://127.0.0.1:8765
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+from benchmarks.fake_tmdb import MAX_ID, Faults, FakeTMDb
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_MIX = {"recommend": 5, "search": 4, "top_rated": 1}
+ENDPOINTS = {"recommend": "/recommend", "search": "/tmdb/search", "top_rated": "/catalog/top-rated"}
+_WORDS = ("nuit", "retour", "dernier", "jour", "ombre", "amour", "guerre", "ville", "secret", "voyage",
+          "star", "matrix", "parrain", "titanic", "alien", "batman", "amélie", "inception")
+
+_local = threading.local()
+
+
+# ---------- Démarrage ----------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(tmdb_url: str, db_url: Optional[str], env_extra: Dict[str, str]) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {**os.environ, "TMDB_BASE": tmdb_url, "TMDB_API_KEY": os.getenv("TMDB_API_KEY") or "fake", **env_extra}
+    if db_url:
+        env["DB_URL"] = db_url
+    else:
+        env.pop("DB_URL", None)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.app:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"l'API s'est arrêtée au démarrage (code {proc.returncode})")
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("l'API n'a pas répondu sur /health")
+
+
+def seed_pool(db_url: Optional[str], size: int = 2000) -> List[int]:
+    """Films graines : les plus populaires du catalogue si une base est fournie, sinon data/top_ids.json."""
+    if db_url:
+        from sqlalchemy import create_engine, text
+        try:
+            with create_engine(db_url).connect() as conn:
+                rows = conn.execute(text(
+                    f"SELECT tmdb_id FROM film ORDER BY popularity DESC LIMIT {int(size)}")).fetchall()
+            if rows:
+                return [int(r[0]) for r in rows]
+        except Exception:
+            pass
+    path = os.path.join(ROOT, "data", "top_ids.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            ids = [x if isinstance(x, int) else x.get("id") for x in json.load(f)]
+        ids = [int(i) for i in ids if i]
+        if ids:
+            return ids
+    return random.Random(0).sample(range(1, MAX_ID), size)
+
+
+# ---------- Requêtes ----------
+def _session() -> requests.Session:
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+    return s
+
+
+def make_request(kind: str, rng: random.Random, seeds: List[int]) -> Tuple[str, str, dict]:
+    """(méthode, chemin, kwargs requests) pour un type de requête."""
+    if kind == "recommend":
+        body = {"seed_ids": rng.sample(seeds, min(len(seeds), rng.choice((1, 1, 2, 3)))), "k": 12}
+        return "POST", ENDPOINTS[kind], {"json": body}
+    if kind == "search":
+        word = rng.choice(_WORDS)
+        return "GET", ENDPOINTS[kind], {"params": {"q": word[: rng.randint(2, len(word))]}}
+    return "GET", ENDPOINTS[kind], {"params": {"limit": 40}}
+
+
+def _call(api_url: str, kind: str, method: str, path: str, kwargs: dict, t_sched: float, timeout: float):
+    t_send = time.perf_counter()
+    try:
+        r = _session().request(method, api_url + path, timeout=timeout, **kwargs)
+        status = r.status_code
+    except requests.RequestException as e:
+        status = type(e).__name__
+    t_end = time.perf_counter()
+    return kind, status, t_end - t_sched, t_end - t_send
+
+
+def drive(api_url: str, rps: float, duration: float, mix: Dict[str, float], seeds: List[int],
+          workers: int, timeout: float, seed: int = 0) -> Tuple[List[tuple], float]:
+    """Boucle ouverte : une requête toutes les 1/rps secondes pendant `duration`."""
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    n = int(rps * duration)
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        for i in range(n):
+            t_sched = start + i / rps
+            delay = t_sched - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = rng.choices(kinds, weights)[0]
+            method, path, kwargs = make_request(kind, rng, seeds)
+            futures.append(pool.submit(_call, api_url, kind, method, path, kwargs, t_sched, timeout))
+        wait(futures)
+        elapsed = time.perf_counter() - start
+    return [f.result() for f in futures], elapsed
+
+
+# ---------- Rapport ----------
+def _pcts(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ms = np.asarray(values) * 1000.0
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 2) for p in (50, 95, 99)} | {
+        "max_ms": round(float(ms.max()), 2)}
+
+
+def summarize(samples: List[tuple], elapsed: float) -> Dict[str, dict]:
+    out: Dict[str, dict] = {}
+    groups: Dict[str, List[tuple]] = {}
+    for s in samples:
+        groups.setdefault(ENDPOINTS[s[0]], []).append(s)
+    groups["overall"] = samples
+    for name, group in groups.items():
+        statuses: Dict[str, int] = {}
+        for s in group:
+            statuses[str(s[1])] = statuses.get(str(s[1]), 0) + 1
+        errors = sum(1 for s in group if not (isinstance(s[1], int) and s[1] < 400))
+        out[name] = {
+            "requests": len(group),
+            "errors": errors,
+            "error_rate": round(errors / len(group), 4) if group else 0.0,
+            "status": statuses,
+            "achieved_rps": round(len(group) / elapsed, 2) if elapsed > 0 else None,
+            "latency": _pcts([s[2] for s in group]),
+            "service_time": _pcts([s[3] for s in group]),
+        }
+    return out
+
+
+def _print(report: dict) -> None:
+    print(f"{'endpoint':<20} {'req':>6} {'err%':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>7}")
+    for name, r in report["endpoints"].items():
+        lat = r["latency"]
+        print(f"{name:<20} {r['requests']:>6} {r['error_rate'] * 100:>5.1f}% "
+              f"{lat.get('p50_ms', 0):>7.1f}ms {lat.get('p95_ms', 0):>7.1f}ms "
+              f"{lat.get('p99_ms', 0):>7.1f}ms {r['achieved_rps']:>7}")
+    print("Appels TMDb amont :")
+    for endpoint, statuses in sorted(report["upstream"].items()):
+        print(f"  {endpoint:<22} " + ", ".join(f"{k}: {v}" for k, v in sorted(statuses.items())))
+
+
+def _parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        k, _, v = part.partition("=")
+        if k.strip() not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"type inconnu : {k} (attendu : {', '.join(ENDPOINTS)})")
+        mix[k.strip()] = float(v or 1)
+    return mix
+
+
+def main(args) -> dict:
+    fake = None
+    tmdb_url = args.tmdb_url
+    if tmdb_url is None:
+        fake = FakeTMDb(port=0, faults=Faults(args.tmdb_latency_ms, args.tmdb_jitter_ms, args.tmdb_error_rate,
+                                              args.tmdb_rate_429, args.tmdb_limit_rps),
+                        fixtures=args.fixtures).start()
+        tmdb_url = fake.url
+
+    proc = None
+    api_url = args.api_url
+    if api_url is None:
+        extra = {"TMDB_RATE_LIMIT": str(args.client_rate_limit)} if args.client_rate_limit is not None else {}
+        proc, api_url = start_api(tmdb_url, args.db_url, extra)
+    try:
+        seeds = seed_pool(args.db_url)
+        if args.warmup > 0:
+            drive(api_url, args.rps, args.warmup, args.mix, seeds, args.workers, args.timeout, seed=1)
+        if fake is not None:
+            fake.reset()
+        else:
+            requests.post(f"{tmdb_url}/__reset", timeout=5)
+        samples, elapsed = drive(api_url, args.rps, args.duration, args.mix, seeds, args.workers, args.timeout)
+        upstream = fake.stats() if fake is not None else requests.get(f"{tmdb_url}/__stats", timeout=5).json()
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+        if fake is not None:
+            fake.stop()
+
+    return {
+        "meta": {
+            "created_at": dt.datetime.now().replace(microsecond=0).isoformat(),
+            "target_rps": args.rps, "duration_s": args.duration, "mix": args.mix,
+            "db_url": args.db_url, "workers": args.workers,
+            "tmdb": {"latency_ms": args.tmdb_latency_ms, "jitter_ms": args.tmdb_jitter_ms,
+                     "error_rate": args.tmdb_error_rate, "rate_429": args.tmdb_rate_429,
+                     "limit_rps": args.tmdb_limit_rps} if fake is not None else {"url": tmdb_url},
+        },
+        "endpoints": summarize(samples, elapsed),
+        "upstream": upstream,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0, help="secondes de chauffe (non mesurées)")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX, help="ex. recommend=5,search=4,top_rated=1")
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--db-url", default=None, help="catalogue de l'API (ex. une base de benchmarks/.data)")
+    parser.add_argument("--api-url", default=None, help="API déjà lancée (sinon démarrée ici)")
+    parser.add_argument("--tmdb-url", default=None, help="faux TMDb déjà lancé (sinon démarré ici)")
+    parser.add_argument("--tmdb-latency-ms", type=float, default=60.0)
+    parser.add_argument("--tmdb-jitter-ms", type=float, default=30.0)
+    parser.add_argument("--tmdb-error-rate", type=float, default=0.0)
+    parser.add_argument("--tmdb-rate-429", type=float, default=0.0)
+    parser.add_argument("--tmdb-limit-rps", type=float, default=0.0)
+    parser.add_argument("--client-rate-limit", type=float, default=None, help="TMDB_RATE_LIMIT de l'API")
+    parser.add_argument("--fixtures", default=None)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    report = main(args)
+    _print(report)
+    out = args.out or os.path.join(RESULTS_DIR, f"loadtest-{dt.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats : {out}")
@@ -0,0 +1,238 @@
+# benchmarks/run.py
+"""
+Benchmarks du recommender sur catalogue synthétique (benchmarks/synthetic.py).
+
+Pour chaque taille de catalogue et chaque cible :
+  - build_s            : temps de construction de l'index (refresh_cache)
+  - peak_rss_mb        : pic de mémoire résidente du process de mesure
+  - query              : latence d'une requête (p50 / p95 / p99, ms)
+  - batch              : débit d'un lot de requêtes enchaînées (req/s)
+  - threaded           : débit du même lot sur N threads (req/s)
+
+Chaque mesure tourne dans un process neuf (pic RSS non pollué par la génération).
+Les bases SQLite générées sont gardées dans benchmarks/.data (réutilisées à seed égale).
+Résultats : JSON dans benchmarks/results/, comparables avec benchmarks/compare.py.
+
+Usage (depuis la racine) :
+    python -m benchmarks.run --sizes 10000 100000 1000000
+    python -m benchmarks.run --sizes 10000 --targets recommender recommender_service --queries 500
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, ".data")
+RESULTS_DIR = os.path.join(HERE, "results")
+
+TARGETS = ("recommender", "recommender_service")
+# recommender_service construit une matrice dense (get_dummies) : inutilisable au-delà
+SERVICE_MAX_FILMS = 20_000
+
+
+# ---------- Catalogue ----------
+def catalog_db(n_films: int, seed: int) -> str:
+    """URL d'une base SQLite synthétique de `n_films` films (générée si absente)."""
+    from benchmarks.synthetic import make_catalog, to_sqlite
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"catalog_{n_films}_{seed}.db")
+    if os.path.exists(path):
+        return f"sqlite:///{path}"
+    t0 = time.perf_counter()
+    catalog = make_catalog(n_films, seed=seed)
+    to_sqlite(catalog, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    print(f"  catalogue {n_films} films généré en {time.perf_counter() - t0:.1f}s", flush=True)
+    return f"sqlite:///{path}"
+
+
+def sample_seeds(url: str, n: int, seed: int) -> List[List[int]]:
+    """Listes de 1 à 3 films graines, tirées selon la popularité (comme de vrais utilisateurs)."""
+    import sqlite3
+
+    conn = sqlite3.connect(url.replace("sqlite:///", ""))
+    try:
+        rows = conn.execute("SELECT tmdb_id, popularity FROM film").fetchall()
+    finally:
+        conn.close()
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    p = np.array([r[1] or 0.0 for r in rows], dtype=np.float64) + 1e-3
+    p /= p.sum()
+    rng = np.random.default_rng(seed)
+    sizes = rng.choice([1, 2, 3], size=n, p=[0.5, 0.3, 0.2])
+    return [rng.choice(ids, size=s, replace=False, p=p).tolist() for s in sizes]
+
+
+# ---------- Mesure (process fils) ----------
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentiles(lat_s: List[float]) -> Dict[str, float]:
+    ms = np.asarray(lat_s) * 1000.0
+    return {
+        "n": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def _measure(url: str, target: str, seeds: List[List[int]], k: int, threads: int, out) -> None:
+    os.environ["DB_URL"] = url
+    os.environ["TMDB_BASE"] = "http://127.0.0.1:9"  # tout repli TMDb échoue immédiatement
+    os.environ.pop("CATALOG_SNAPSHOT_PATH", None)
+    try:
+        if target == "recommender":
+            from src.ml import recommender as mod
+        else:
+            from src.ml import recommender_service as mod
+        rss0 = _rss_mb()
+
+        t0 = time.perf_counter()
+        mod.refresh_cache()
+        build_s = time.perf_counter() - t0
+        res: Dict[str, object] = {
+            "build_s": round(build_s, 3),
+            "rss_before_build_mb": round(rss0, 1),
+            "rss_after_build_mb": round(_rss_mb(), 1),
+        }
+        if target == "recommender":
+            X = mod._cache["X"]
+            res["matrix"] = {"rows": int(X.shape[0]), "cols": int(X.shape[1]), "nnz": int(X.nnz)}
+
+        warm, timed = seeds[:5], seeds[5:]
+        for s in warm:
+            mod.recommend(s, k)
+
+        lat = []
+        empty = 0
+        t_batch = time.perf_counter()
+        for s in timed:
+            t = time.perf_counter()
+            got = mod.recommend(s, k)
+            lat.append(time.perf_counter() - t)
+            empty += not got
+        batch_s = time.perf_counter() - t_batch
+        res["query"] = _percentiles(lat)
+        res["query"]["empty_results"] = empty
+        res["batch"] = {"queries": len(timed), "seconds": round(batch_s, 3),
+                        "qps": round(len(timed) / batch_s, 2) if batch_s > 0 else None}
+
+        t = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda s: mod.recommend(s, k), timed))
+        th_s = time.perf_counter() - t
+        res["threaded"] = {"threads": threads, "seconds": round(th_s, 3),
+                           "qps": round(len(timed) / th_s, 2) if th_s > 0 else None}
+        res["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+        out.put(res)
+    except BaseException as e:  # remonté tel quel dans les résultats
+        out.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def measure(url: str, target: str, seeds: List[List[int]], k: int, threads: int, timeout: float) -> Dict[str, object]:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(url, target, seeds, k, threads, q))
+    p.start()
+    try:
+        return q.get(timeout=timeout)
+    except Exception:
+        return {"error": f"timeout après {timeout:.0f}s"}
+    finally:
+        p.join(5)
+        if p.is_alive():
+            p.terminate()
+
+
+# ---------- Orchestration ----------
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run(sizes: List[int], targets: List[str], queries: int, k: int, threads: int,
+        seed: int, timeout: float, service_max: int) -> Dict[str, object]:
+    runs = []
+    for n in sizes:
+        print(f"[{n} films]", flush=True)
+        url = catalog_db(n, seed)
+        seeds = sample_seeds(url, queries + 5, seed)
+        for target in targets:
+            if target == "recommender_service" and n > service_max:
+                runs.append({"films": n, "target": target, "skipped": f"> {service_max} films"})
+                continue
+            res = measure(url, target, seeds, k, threads, timeout)
+            runs.append({"films": n, "target": target, **res})
+            summary = res.get("error") or (
+                f"build {res['build_s']}s, p50 {res['query']['p50_ms']}ms, "
+                f"p99 {res['query']['p99_ms']}ms, {res['batch']['qps']} req/s, "
+                f"pic {res['peak_rss_mb']} Mo")
+            print(f"  {target}: {summary}", flush=True)
+    return {
+        "meta": {
+            "created_at": dt.datetime.now().replace(microsecond=0).isoformat(),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "args": {"sizes": sizes, "targets": targets, "queries": queries, "k": k,
+                     "threads": threads, "seed": seed},
+        },
+        "runs": runs,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=12)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=3600.0, help="par mesure (s)")
+    parser.add_argument("--service-max", type=int, default=SERVICE_MAX_FILMS)
+    parser.add_argument("--out", default=None, help="fichier JSON (défaut : benchmarks/results/<date>.json)")
+    args = parser.parse_args()
+
+    result = run(args.sizes, args.targets, args.queries, args.k, args.threads,
+                 args.seed, args.timeout, args.service_max)
+    out = args.out or os.path.join(RESULTS_DIR, f"bench-{dt.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Résultats : {out}")
@@ -0,0 +1,198 @@
+# benchmarks/synthetic.py
+"""
+Catalogue synthétique pour les benchmarks (aucune base externe).
+
+Distributions :
+  - genres : 19 genres TMDb, fréquences proches du catalogue réel (drame > comédie > ...),
+    1 à 4 genres par film
+  - réalisateurs : ~1 pour 4 films, nombre de films par réalisateur en loi de Zipf
+  - acteurs : ~2 par film au total, 10 par distribution, popularité en loi de Zipf
+    (quelques acteurs très présents, une longue traîne d'apparitions uniques)
+  - popularité log-normale, notes ~ N(6.3, 1)
+
+`make_catalog(n)` renvoie des DataFrames au format des tables (film, directors, actors,
+genre, film_genre) ; `to_sqlite(catalog, path)` les charge dans une base SQLite migrée.
+
+`make_interactions(film_ids, n_users, n)` : journal utilisateur × film pour le filtrage
+collaboratif (src/ml/als.py). Films répartis en grappes de goût ; chaque utilisateur a une
+grappe favorite (INTERACTIONS_IN_TASTE de ses interactions), une activité zipfienne et,
+dans une grappe, les films sont tirés selon une popularité zipfienne.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# (id TMDb, nom, poids relatif)
+GENRES = [
+    (18, "Drame", 30), (35, "Comédie", 22), (53, "Thriller", 12), (28, "Action", 11),
+    (10749, "Romance", 10), (27, "Horreur", 9), (80, "Crime", 8), (99, "Documentaire", 8),
+    (12, "Aventure", 6), (878, "Science-Fiction", 5), (10751, "Familial", 5), (9648, "Mystère", 4),
+    (14, "Fantastique", 4), (16, "Animation", 4), (36, "Histoire", 3), (10402, "Musique", 3),
+    (10752, "Guerre", 2), (37, "Western", 2), (10770, "Téléfilm", 2),
+]
+GENRES_PER_FILM = ([1, 2, 3, 4], [0.3, 0.4, 0.2, 0.1])
+FILMS_PER_DIRECTOR = 4
+ACTORS_PER_FILM_POOL = 2
+CAST_SIZE = 10
+ZIPF_DIRECTORS = 1.05
+ZIPF_ACTORS = 1.1
+
+_WORDS = ("nuit", "retour", "dernier", "jour", "ombre", "amour", "guerre", "ville", "secret",
+          "voyage", "mer", "feu", "roi", "étoile", "silence", "rêve", "loup", "sang", "été", "hiver")
+
+PERSON_ID_BASE = 10_000_000  # ids de personnes disjoints des ids de films
+
+TASTE_CLUSTERS = 50
+INTERACTIONS_IN_TASTE = 0.8
+ZIPF_USERS = 0.8
+ZIPF_ITEMS = 1.0
+
+
+def _zipf_choice(rng: np.random.Generator, pool: int, size, s: float) -> np.ndarray:
+    """Tirage de rangs 0..pool-1 avec P(r) ∝ 1/(r+1)^s (Zipf borné)."""
+    p = 1.0 / np.arange(1, pool + 1, dtype=np.float64) ** s
+    p /= p.sum()
+    return rng.choice(pool, size=size, p=p)
+
+
+def _first_occurrences(ids: np.ndarray) -> np.ndarray:
+    """Masque (n, m) : True à la première apparition de chaque valeur sur sa ligne."""
+    order = np.argsort(ids, axis=1, kind="stable")
+    s = np.take_along_axis(ids, order, axis=1)
+    dup_sorted = np.zeros_like(s, dtype=bool)
+    dup_sorted[:, 1:] = s[:, 1:] == s[:, :-1]
+    keep = np.empty_like(dup_sorted)
+    np.put_along_axis(keep, order, ~dup_sorted, axis=1)
+    return keep
+
+
+def make_catalog(n_films: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    film_ids = np.cumsum(rng.integers(1, 4, size=n_films)).astype(np.int64)
+
+    # FILM
+    popularity = rng.lognormal(mean=1.0, sigma=1.2, size=n_films).round(3)
+    vote_count = np.minimum(rng.poisson(popularity * 40), 40_000)
+    vote_average = np.clip(rng.normal(6.3, 1.0, size=n_films), 0, 10).round(1)
+    w = rng.integers(0, len(_WORDS), size=(n_films, 2))
+    titles = [f"{_WORDS[a].capitalize()} {_WORDS[b]} {i}" for i, (a, b) in zip(film_ids, w)]
+    film = pd.DataFrame({
+        "tmdb_id": film_ids,
+        "title": titles,
+        "release_year": rng.integers(1930, 2026, size=n_films),
+        "poster_path": [f"/p{i}.jpg" for i in film_ids],
+        "overview": "Synopsis " * 20,
+        "popularity": popularity,
+        "vote_average": vote_average,
+        "vote_count": vote_count,
+    })
+
+    # GENRES
+    gid = np.array([g[0] for g in GENRES])
+    gp = np.array([g[2] for g in GENRES], dtype=np.float64)
+    gp /= gp.sum()
+    counts = rng.choice(GENRES_PER_FILM[0], size=n_films, p=GENRES_PER_FILM[1])
+    draws = rng.choice(len(GENRES), size=(n_films, 4), p=gp)
+    keep = _first_occurrences(draws) & (np.arange(4) < counts[:, None])
+    rows, cols = np.nonzero(keep)
+    film_genre = pd.DataFrame({"film_id": film_ids[rows], "genre_id": gid[draws[rows, cols]]})
+    genre = pd.DataFrame({"id": gid, "name": [g[1] for g in GENRES]})
+
+    # DIRECTORS (un par film, parfois deux)
+    n_dir = max(1, n_films // FILMS_PER_DIRECTOR)
+    d_rank = _zipf_choice(rng, n_dir, n_films, ZIPF_DIRECTORS)
+    second = rng.random(n_films) < 0.05
+    d_film = np.concatenate([film_ids, film_ids[second]])
+    d_ids = np.concatenate([d_rank, _zipf_choice(rng, n_dir, int(second.sum()), ZIPF_DIRECTORS)])
+    directors = pd.DataFrame({"film_tmdb_id": d_film, "tmdb_id": PERSON_ID_BASE + d_ids})
+    directors = directors.drop_duplicates()
+    directors["name"] = "Réalisateur " + (directors["tmdb_id"] - PERSON_ID_BASE).astype(str)
+
+    # ACTORS (distribution de CAST_SIZE, popularité zipfienne)
+    n_act = max(CAST_SIZE, n_films * ACTORS_PER_FILM_POOL)
+    a_rank = _zipf_choice(rng, n_act, (n_films, CAST_SIZE + 2), ZIPF_ACTORS)
+    keep = _first_occurrences(a_rank)
+    order = np.cumsum(keep, axis=1) - 1
+    keep &= order < CAST_SIZE
+    rows, cols = np.nonzero(keep)
+    a_ids = PERSON_ID_BASE * 2 + a_rank[rows, cols]
+    actors = pd.DataFrame({
+        "film_tmdb_id": film_ids[rows],
+        "tmdb_id": a_ids,
+        "name": "Acteur " + pd.Series(a_ids - PERSON_ID_BASE * 2).astype(str),
+        "cast_order": order[rows, cols],
+    })
+
+    return {"film": film, "directors": directors, "actors": actors, "genre": genre, "film_genre": film_genre}
+
+
+def migrate_sqlite(path: str) -> str:
+    """Crée `path` (base SQLite vide) au schéma des migrations (alembic upgrade head). Retourne l'URL."""
+    from alembic import command
+    from alembic.config import Config
+
+    if os.path.exists(path):
+        os.remove(path)
+    url = f"sqlite:///{os.path.abspath(path)}"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cfg = Config(os.path.join(root, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(root, "migrations"))
+    prev = os.environ.get("DB_URL")
+    os.environ["DB_URL"] = url  # lu en priorité par migrations/env.py
+    try:
+        command.upgrade(cfg, "head")
+    finally:
+        if prev is None:
+            os.environ.pop("DB_URL", None)
+        else:
+            os.environ["DB_URL"] = prev
+    return url
+
+
+def to_sqlite(catalog: Dict[str, pd.DataFrame], path: str) -> str:
+    """Crée `path` au schéma des migrations et y charge le catalogue."""
+    url = migrate_sqlite(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        for table in ("film", "genre", "film_genre", "directors", "actors"):
+            df = catalog[table]
+            cols = ", ".join(df.columns)
+            marks = ", ".join("?" * len(df.columns))
+            # Series.tolist() -> types Python natifs (sqlite3 refuse numpy.int64)
+            conn.executemany(f"INSERT INTO {table} ({cols}) VALUES ({marks})",
+                             zip(*(df[c].tolist() for c in df.columns)))
+        conn.commit()
+    finally:
+        conn.close()
+    return url
+
+
+def make_interactions(film_ids: np.ndarray, n_users: int, n_interactions: int, seed: int = 0,
+                      clusters: int = TASTE_CLUSTERS) -> pd.DataFrame:
+    """Interactions (user_id, tmdb_id, weight) ; doublons possibles (revisionnages), comme un vrai journal."""
+    rng = np.random.default_rng(seed)
+    film_ids = np.asarray(film_ids, dtype=np.int64)
+    clusters = max(1, min(clusters, film_ids.size))
+
+    # grappes de films : permutation aléatoire découpée en `clusters` morceaux
+    members = rng.permutation(film_ids.size)
+    bounds = np.linspace(0, film_ids.size, clusters + 1).astype(np.int64)
+    sizes = np.diff(bounds)
+
+    users = _zipf_choice(rng, n_users, n_interactions, ZIPF_USERS)
+    taste = rng.integers(0, clusters, size=n_users)
+    in_taste = rng.random(n_interactions) < INTERACTIONS_IN_TASTE
+    cluster = np.where(in_taste, taste[users], rng.integers(0, clusters, size=n_interactions))
+
+    # rang zipfien dans la grappe (tiré pour la plus grande grappe, replié sur la taille réelle)
+    rank = _zipf_choice(rng, int(sizes.max()), n_interactions, ZIPF_ITEMS) % sizes[cluster]
+    items = film_ids[members[bounds[cluster] + rank]]
+    weight = np.where(rng.random(n_interactions) < 0.3, 1.0, 0.3).astype(np.float32)  # like / vu
+    return pd.DataFrame({"user_id": users.astype(np.int64), "tmdb_id": items, "weight": weight})
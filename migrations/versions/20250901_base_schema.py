@@ -0,0 +1,45 @@
+"""create base tables film and directors (cf. src/etl/schema.sql)
+
+Revision ID: 20250901_base_schema
+Revises:
+Create Date: 2025-09-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250901_base_schema"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Les bases existantes ont été créées via schema.sql : on ne recrée rien.
+    bind = op.get_bind()
+    if not bind.dialect.has_table(bind, "film"):
+        op.create_table(
+            "film",
+            sa.Column("tmdb_id", sa.Integer, primary_key=True, autoincrement=False),
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("release_year", sa.SmallInteger, nullable=True),
+            sa.Column("poster_path", sa.String(255), nullable=True),
+            sa.Column("last_tmdb_sync", sa.DateTime, nullable=True),
+            mysql_charset="utf8mb4",
+        )
+    if not bind.dialect.has_table(bind, "directors"):
+        op.create_table(
+            "directors",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("film_tmdb_id", sa.Integer, nullable=False),
+            sa.Column("tmdb_id", sa.Integer, nullable=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.ForeignKeyConstraint(["film_tmdb_id"], ["film.tmdb_id"], ondelete="CASCADE"),
+            mysql_charset="utf8mb4",
+        )
+
+def downgrade():
+    for table in ("directors", "film"):
+        try:
+            op.drop_table(table)
+        except Exception:
+            pass
@@ -1,14 +1,14 @@
 """create genre and film_genre tables
 
 Revision ID: 20250915_add_genres_tables
-Revises: 20250915_add_overview_to_film  # remplace par TON dernier revision id
+Revises: 20250901_base_schema
 Create Date: 2025-09-15
 """
 from alembic import op
 import sqlalchemy as sa
 
 revision = "20250915_add_genres_tables"
-down_revision = None
+down_revision = "20250901_base_schema"
 branch_labels = None
 depends_on = None
 
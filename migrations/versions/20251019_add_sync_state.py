@@ -0,0 +1,30 @@
+"""create sync_state table (high-water marks des jobs de synchro)
+
+Revision ID: 20251019_add_sync_state
+Revises: 20250915_add_genres_tables
+Create Date: 2025-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_add_sync_state"
+down_revision = "20250915_add_genres_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not op.get_bind().dialect.has_table(op.get_bind(), "sync_state"):
+        op.create_table(
+            "sync_state",
+            sa.Column("name", sa.String(64), primary_key=True),
+            sa.Column("value", sa.String(64), nullable=False),
+            sa.Column("updated_at", sa.DateTime, nullable=False),
+            mysql_charset="utf8mb4",
+        )
+
+def downgrade():
+    try:
+        op.drop_table("sync_state")
+    except Exception:
+        pass
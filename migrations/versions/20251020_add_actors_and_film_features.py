@@ -0,0 +1,49 @@
+"""create actors and film_features tables
+
+Revision ID: 20251020_add_actors_and_film_features
+Revises: 20251019_add_sync_state
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251020_add_actors_and_film_features"
+down_revision = "20251019_add_sync_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # distribution principale (une ligne par film/acteur, comme `directors`)
+    if not bind.dialect.has_table(bind, "actors"):
+        op.create_table(
+            "actors",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("film_tmdb_id", sa.Integer, nullable=False, index=True),
+            sa.Column("tmdb_id", sa.Integer, nullable=True, index=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("cast_order", sa.SmallInteger, nullable=True),
+            sa.ForeignKeyConstraint(["film_tmdb_id"], ["film.tmdb_id"], ondelete="CASCADE"),
+            mysql_charset="utf8mb4",
+        )
+
+    # features dénormalisées : listes d'ids int32 packées (cf. src/core/packed_ids.py)
+    if not bind.dialect.has_table(bind, "film_features"):
+        op.create_table(
+            "film_features",
+            sa.Column("film_tmdb_id", sa.Integer, primary_key=True, autoincrement=False),
+            sa.Column("genre_ids", sa.LargeBinary, nullable=False),
+            sa.Column("director_ids", sa.LargeBinary, nullable=False),
+            sa.Column("actor_ids", sa.LargeBinary, nullable=False),
+            sa.Column("updated_at", sa.DateTime, nullable=False, index=True),
+            sa.ForeignKeyConstraint(["film_tmdb_id"], ["film.tmdb_id"], ondelete="CASCADE"),
+            mysql_charset="utf8mb4",
+        )
+
+def downgrade():
+    for table in ("film_features", "actors"):
+        try:
+            op.drop_table(table)
+        except Exception:
+            pass
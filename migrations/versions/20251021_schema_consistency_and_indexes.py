@@ -0,0 +1,83 @@
+"""schema consistency (film_genre.film_id, colonnes film) + index des requêtes chaudes
+
+Revision ID: 20251021_schema_consistency_and_indexes
+Revises: 20251020_add_actors_and_film_features
+Create Date: 2025-10-21
+
+- film_genre.film_tmdb_id -> film_id (nom attendu par schema.sql, features.load_catalog, le writer)
+- film : overview / popularity / vote_average / vote_count si absentes
+- index couvrants pour les requêtes du recommender et de l'API
+  (vérifiés par scripts/check_query_plans.py)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251021_schema_consistency_and_indexes"
+down_revision = "20251020_add_actors_and_film_features"
+branch_labels = None
+depends_on = None
+
+FILM_COLUMNS = [
+    ("overview", sa.Text),
+    ("popularity", sa.Float),
+    ("vote_average", sa.Float),
+    ("vote_count", sa.Integer),
+]
+
+# (nom, table, colonnes) -- créés seulement si la table et les colonnes existent
+INDEXES = [
+    ("ix_directors_film_person", "directors", ["film_tmdb_id", "tmdb_id"]),   # chargement par film
+    ("ix_directors_person", "directors", ["tmdb_id"]),                        # nom d'une feature
+    ("ix_actors_film_person", "actors", ["film_tmdb_id", "tmdb_id", "cast_order"]),
+    ("ix_actors_person", "actors", ["tmdb_id"]),
+    ("ix_film_person_role_film", "film_person", ["role", "film_tmdb_id", "person_tmdb_id"]),
+    ("ix_film_genre_film", "film_genre", ["film_id", "genre_id"]),
+    ("ix_film_score", "film", ["score", "tmdb_id"]),                          # top-rated ORDER BY ... LIMIT
+    ("ix_film_avg_rating", "film", ["avg_rating", "tmdb_id"]),
+    ("ix_film_last_tmdb_sync", "film", ["last_tmdb_sync"]),                   # refresh de local_index
+]
+
+
+def _covered(insp, table, cols) -> bool:
+    """Un index (ou la PK) existant commence-t-il déjà par `cols` ?"""
+    existing = [ix["column_names"] for ix in insp.get_indexes(table)]
+    existing.append(insp.get_pk_constraint(table).get("constrained_columns") or [])
+    return any(list(e[:len(cols)]) == list(cols) for e in existing)
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+
+    # film_genre : une seule convention de nommage
+    if "film_genre" in tables:
+        cols = {c["name"] for c in insp.get_columns("film_genre")}
+        if "film_tmdb_id" in cols and "film_id" not in cols:
+            with op.batch_alter_table("film_genre") as batch:
+                batch.alter_column("film_tmdb_id", new_column_name="film_id",
+                                   existing_type=sa.Integer, existing_nullable=False)
+
+    if "film" in tables:
+        cols = {c["name"] for c in insp.get_columns("film")}
+        for name, type_ in FILM_COLUMNS:
+            if name not in cols:
+                op.add_column("film", sa.Column(name, type_, nullable=True))
+
+    insp = sa.inspect(bind)  # colonnes renommées/ajoutées
+    for name, table, cols in INDEXES:
+        if table not in tables:
+            continue
+        have = {c["name"] for c in insp.get_columns(table)}
+        if set(cols) <= have and not _covered(insp, table, cols):
+            op.create_index(name, table, cols)
+
+
+def downgrade():
+    # on retire les index ; le renommage et les colonnes ajoutées sont conservés
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    for name, table, _ in reversed(INDEXES):
+        if table in tables and name in {ix["name"] for ix in insp.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
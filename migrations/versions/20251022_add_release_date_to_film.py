@@ -0,0 +1,24 @@
+"""film.release_date : date de sortie complète (TMDb), servie telle quelle par /tmdb/search
+
+Revision ID: 20251022_add_release_date_to_film
+Revises: 20251021_schema_consistency_and_indexes
+Create Date: 2025-10-22
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251022_add_release_date_to_film"
+down_revision = "20251021_schema_consistency_and_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    if "film" in insp.get_table_names() and "release_date" not in {c["name"] for c in insp.get_columns("film")}:
+        op.add_column("film", sa.Column("release_date", sa.Date, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("film") as batch:
+        batch.drop_column("release_date")
@@ -0,0 +1,14 @@
+"""
+Remplit `film_features` pour les films ingérés avant la migration
+20251020_add_actors_and_film_features.
+Usage (depuis la racine) :
+    python -m scripts.backfill_film_features
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.ml.recommender import backfill_film_features  # noqa: E402  (DB_URL lu à l'import)
+
+if __name__ == "__main__":
+    print(f"film_features : {backfill_film_features()} lignes écrites")
@@ -5,12 +5,15 @@ Usage (depuis la racine) :
 """
 
 import argparse
-from src.api.app import admin_bootstrap  # réutilise la logique de l'endpoint
+import logging
+from src.ingest.bulk_ingest import bulk_ingest, ids_from_listing
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument("--source", choices=["popular", "trending"], default="popular")
     parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--checkpoint", default="data/bootstrap.ckpt.json")
     args = parser.parse_args()
-    res = admin_bootstrap(source=args.source, pages=args.pages)
+    res = bulk_ingest(ids_from_listing(args.source, args.pages), checkpoint=args.checkpoint)
     print(res)
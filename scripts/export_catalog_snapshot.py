@@ -0,0 +1,27 @@
+"""
+Exporte le catalogue de service en snapshot portable (src/core/catalog_snapshot.py) :
+films, champs d'affichage, notes, listes d'ids de features et noms.
+Un nœud d'API qui dispose du snapshot démarre sans MySQL.
+
+Usage (depuis la racine) :
+    python -m scripts.export_catalog_snapshot [--out data/catalog_snapshot]
+Puis sur le nœud de service : CATALOG_SNAPSHOT_PATH=data/catalog_snapshot
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.core.catalog_snapshot import default_path  # noqa: E402
+from src.ml.recommender import export_snapshot  # noqa: E402  (DB_URL lu à l'import)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=None, help="répertoire cible (défaut : CATALOG_SNAPSHOT_PATH)")
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    manifest = export_snapshot(args.out or default_path())
+    print(f"Snapshot écrit dans {args.out or default_path()} : {manifest['films']} films "
+          f"en {time.perf_counter() - t0:.1f}s")
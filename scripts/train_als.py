@@ -0,0 +1,74 @@
+"""
+Entraîne le modèle de filtrage collaboratif implicite (src/ml/als.py) et écrit l'artefact
+lu par le service (ALS_MODEL_PATH). L'API le recharge au prochain refresh_cache.
+
+Sources d'interactions :
+  - défaut : journal des événements utilisateurs (USER_PROFILES_PATH, table user_event)
+  - --synthetic USERS INTERACTIONS : journal synthétique (benchmarks/synthetic.py) sur les
+    films du snapshot de catalogue ou de la base DB_URL
+
+Usage (depuis la racine) :
+    python -m scripts.train_als [--out data/als_model] [--factors 64] [--iterations 12]
+    python -m scripts.train_als --synthetic 500000 5000000
+Puis : GET /users/{id}/recommendations?blend=0.5 (ou CF_BLEND=0.5)
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.core import catalog_snapshot  # noqa: E402
+from src.ml import als  # noqa: E402
+
+
+def _film_ids() -> np.ndarray:
+    snap = catalog_snapshot.get()
+    if snap is not None:
+        return np.asarray(snap.ids)
+    from sqlalchemy import create_engine, text
+
+    eng = create_engine(os.environ["DB_URL"])
+    with eng.connect() as conn:
+        return np.array([r[0] for r in conn.execute(text("SELECT tmdb_id FROM film"))], dtype=np.int64)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=None, help="répertoire cible (défaut : ALS_MODEL_PATH)")
+    parser.add_argument("--events", default=None, help="fichier de profils (défaut : USER_PROFILES_PATH)")
+    parser.add_argument("--synthetic", type=int, nargs=2, metavar=("USERS", "INTERACTIONS"), default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--factors", type=int, default=als.FACTORS)
+    parser.add_argument("--reg", type=float, default=als.REGULARIZATION)
+    parser.add_argument("--alpha", type=float, default=als.ALPHA)
+    parser.add_argument("--iterations", type=int, default=als.ITERATIONS)
+    parser.add_argument("--workers", type=int, default=als.WORKERS)
+    args = parser.parse_args()
+    out = args.out or als.default_path()
+
+    t0 = time.perf_counter()
+    if args.synthetic:
+        from benchmarks.synthetic import make_interactions
+
+        df = make_interactions(_film_ids(), args.synthetic[0], args.synthetic[1], seed=args.seed)
+        C, users, items = als.interactions_matrix(df["user_id"].to_numpy(), df["tmdb_id"].to_numpy(),
+                                                  df["weight"].to_numpy())
+    else:
+        C, users, items = als.load_events(args.events)
+    print(f"{C.shape[0]} utilisateurs × {C.shape[1]} films, {C.nnz} interactions "
+          f"({time.perf_counter() - t0:.1f}s)", flush=True)
+
+    t1 = time.perf_counter()
+    X, Y = als.train(C, factors=args.factors, reg=args.reg, alpha=args.alpha, iterations=args.iterations,
+                     workers=args.workers, seed=args.seed,
+                     callback=lambda it, s: print(f"  itération {it + 1}/{args.iterations} : {s:.1f}s", flush=True))
+    train_s = time.perf_counter() - t1
+    params = {"factors": args.factors, "reg": args.reg, "alpha": args.alpha, "iterations": args.iterations,
+              "train_s": round(train_s, 1), "source": "synthetic" if args.synthetic else "events"}
+    manifest = als.save(out, C, users, items, X, Y, params)
+    print(f"Modèle écrit dans {out} : {manifest['users']} utilisateurs, {manifest['items']} films, "
+          f"entraînement {train_s:.1f}s")
@@ -2,17 +2,26 @@
 from __future__ import annotations
 
 import os
+import base64
+import hmac
+import json
 import logging
 import asyncio
+import math
 import numbers
 from typing import List, Dict, Any, Iterable, Tuple, Optional
 
-import requests
-from fastapi import FastAPI, Query, HTTPException
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 
-from src.core.tmdb_client import search_movie, movie_details, similar_movies
+from src.core.tmdb_client import search_movie, movie_details, similar_movies, popular_movies
+from src.core import catalog_snapshot, local_index, metrics, profiling, reco_cache, search_index
 
 # --- SQLAlchemy (DB) ---
 try:
@@ -21,19 +30,107 @@ except Exception:
     create_engine = None  # type: ignore
     text = None  # type: ignore
 
-# ---------- Recommender (optionnel) ----------
-try:
-    from src.ml.recommender import recommend as recommend_db  # -> List[int] | List[dict] | mixed
-    HAS_DB_RECO = True
-except Exception:
-    HAS_DB_RECO = False
-
 # ---------- Logger ----------
 log = logging.getLogger("api")
 logging.basicConfig(level=logging.INFO)
 
+# ---------- Recommender (optionnel, import paresseux) ----------
+# src.ml.recommender tire pandas / scipy / scikit-learn : importé au warm-up (ou au premier
+# besoin), pas au démarrage du process
+_RECO_LOCK = threading.Lock()
+_reco_module: Any = None
+_reco_checked = False
+
+def _recommender():
+    """Module src.ml.recommender, ou None s'il est inutilisable (dépendance absente...)."""
+    global _reco_module, _reco_checked
+    if _reco_checked:
+        return _reco_module
+    with _RECO_LOCK:
+        if not _reco_checked:
+            try:
+                from src.ml import recommender as mod
+                if RECO_CACHE:
+                    mod.on_build(_schedule_reco_cache)  # cache précalculé rafraîchi à chaque build
+                _reco_module = mod
+            except Exception as e:
+                log.warning("DB recommender unavailable: %s", e)
+            _reco_checked = True
+    return _reco_module
+
+# ---------- Warm-up / readiness ----------
+WARMUP = os.getenv("WARMUP", "1") == "1"
+WARMUP_TOP_RATED = int(os.getenv("WARMUP_TOP_RATED", "160"))
+
+_readiness: Dict[str, Any] = {
+    "index": "pending",       # pending | building | ready | failed | disabled | lazy (WARMUP=0)
+    "top_rated": "pending",   # pending | ready | failed | skipped
+    "reco_cache": "pending",  # pending | building | ready | failed | disabled (RECO_CACHE=0)
+    "started_at": None,
+    "ready_at": None,
+    "error": None,
+}
+
+def _index_ready() -> bool:
+    return _readiness["index"] == "ready"
+
+def _warm_index() -> None:
+    mod = _recommender()
+    if mod is None:
+        _readiness["index"] = "disabled"
+        return
+    _readiness["index"] = "building"
+    try:
+        with metrics.stage("warmup_index"):
+            n = mod.warm_up()
+        _readiness["index"] = "ready"
+        log.info("Warm-up: index ready (%d films)", n)
+    except Exception as e:
+        _readiness["index"] = "failed"
+        _readiness["error"] = str(e)
+        log.warning("Warm-up: index build failed: %s", e)
+
+def _warm_top_rated() -> None:
+    if WARMUP_TOP_RATED <= 0:
+        _readiness["top_rated"] = "skipped"
+        return
+    try:
+        with metrics.stage("warmup_top_rated"):
+            ids = [mid for mid, _ in (_top_rated_ids(WARMUP_TOP_RATED) or _load_top_ids_from_json(WARMUP_TOP_RATED))]
+            hydrate_ids(ids)  # remplit le cache movie_details
+        _readiness["top_rated"] = "ready"
+        log.info("Warm-up: %d top-rated films hydrated", len(ids))
+    except Exception as e:
+        _readiness["top_rated"] = "failed"
+        log.warning("Warm-up: top-rated failed: %s", e)
+
+async def _warm_up() -> None:
+    _readiness["started_at"] = time.time()
+    # l'index d'abord : c'est lui qui conditionne /ready ; TMDb ensuite, en tâche de fond
+    await asyncio.to_thread(_warm_index)
+    _readiness["ready_at"] = time.time()
+    await asyncio.to_thread(_warm_top_rated)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [asyncio.create_task(_event_loop_lag_probe())]
+    if WARMUP:
+        tasks.append(asyncio.create_task(_warm_up()))
+    else:
+        _readiness.update(index="lazy", top_rated="skipped")
+    if not RECO_CACHE:
+        _readiness["reco_cache"] = "disabled"
+    periodic = profiling.start_periodic()
+    try:
+        yield
+    finally:
+        for t in tasks:
+            t.cancel()
+        if periodic is not None:
+            periodic.stop()
+
 # ---------- App & CORS ----------
-app = FastAPI(title="Movie Algorithm API")
+app = FastAPI(title="Movie Algorithm API", lifespan=lifespan)
 
 origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
 app.add_middleware(
@@ -42,12 +139,95 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
+# ---------- Métriques (Prometheus /metrics + Server-Timing) ----------
+@app.middleware("http")
+async def _timing_middleware(request: Request, call_next):
+    # profilage à la demande (X-Profile / ?profile=, cf. src/core/profiling.py) : None sinon
+    mode = profiling.requested_mode(request.headers, request.query_params)
+    if mode is not None:
+        meta = {"method": request.method, "path": request.url.path, "mode": mode}
+        with profiling.profile("request", sample=(mode == "sample"), meta=meta) as prof:
+            response = await _timed(request, call_next)
+        response.headers["X-Profile-Id"] = prof.id
+        return response
+    return await _timed(request, call_next)
+
+async def _timed(request: Request, call_next):
+    token = metrics.start_request()
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        total = time.perf_counter() - t0
+        timings = metrics.end_request(token)
+        route = request.scope.get("route")
+        metrics.HTTP_LATENCY.observe(total, route=getattr(route, "path", "unmatched"),
+                                     method=request.method, status=status)
+    response.headers["Server-Timing"] = metrics.server_timing(timings, total)
+    return response
+
+EVENT_LOOP_PROBE_S = 0.5
+
+async def _event_loop_lag_probe():
+    """Mesure le retard de réveil d'un sleep : > 0 si la boucle est bloquée (code synchrone)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(EVENT_LOOP_PROBE_S)
+        metrics.EVENT_LOOP_LAG.observe(max(0.0, loop.time() - t0 - EVENT_LOOP_PROBE_S))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ---------- Profils (admin, même jeton que X-Profile) ----------
+def _require_profile_token(request: Request) -> None:
+    if not profiling.authorized(request.headers, request.query_params):
+        raise HTTPException(status_code=403, detail="Profile token required")
+
+# jeton de synchro du catalogue (/admin/reindex_films, /admin/sync_changes), en-tête X-Admin-Token ;
+# distinct de PROFILE_TOKEN : X-Profile déclencherait le profilage de chaque appel.
+# Sans ADMIN_TOKEN, ces endpoints sont fermés.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+def _require_admin_token(request: Request) -> None:
+    given = request.headers.get("x-admin-token")
+    if ADMIN_TOKEN is None or not given or not hmac.compare_digest(given, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/admin/profiles")
+def admin_profiles(request: Request):
+    _require_profile_token(request)
+    return {"profiles": profiling.list_profiles()}
+
+@app.get("/admin/profiles/{name}")
+def admin_profile(name: str, request: Request):
+    _require_profile_token(request)
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    media = "application/json" if name.endswith(".json") else "text/plain; charset=utf-8"
+    return FileResponse(path, media_type=media)
+
 # ---------- Models ----------
 class RecommendBody(BaseModel):
-    seed_ids: List[int]
+    seed_ids: List[int] = []
     k: int = 12
+    engine: str = "knn"  # knn (features communes) | graph (PageRank personnalisé, src/ml/graph.py)
+    priors: Optional[Dict[str, float]] = None  # knn : coefficients popularity / quality / recency
+    cursor: Optional[str] = None  # next_cursor d'une réponse précédente (remplace seed_ids / engine / priors)
+
+class ReindexBody(BaseModel):
+    ids: List[int]
+
+class UserEventBody(BaseModel):
+    tmdb_id: int
+    kind: str = "like"  # like | dislike | seen
 
 # ---------- Utils ----------
 def normalize_movie(m: Dict[str, Any]) -> Dict[str, Any]:
@@ -162,6 +342,19 @@ def _score_scale() -> float:
     except Exception:
         return 100.0
 
+TOP_RATED_TTL_S = float(os.getenv("TOP_RATED_TTL_S", "300"))
+_top_rated_cache: Dict[str, Any] = {"limit": 0, "pairs": [], "at": 0.0}
+
+def _top_rated_ids(limit: int) -> List[Tuple[int, float]]:
+    """`_query_top_rated_ids` avec cache (TOP_RATED_TTL_S) : la liste bouge peu, rempli au warm-up."""
+    c = _top_rated_cache
+    if c["pairs"] and c["limit"] >= limit and time.time() - c["at"] < TOP_RATED_TTL_S:
+        return c["pairs"][:limit]
+    pairs = _query_top_rated_ids(limit)
+    if pairs:
+        _top_rated_cache.update(limit=limit, pairs=pairs, at=time.time())
+    return pairs
+
 def _query_top_rated_ids(limit: int) -> List[Tuple[int, float]]:
     """
     Renvoie [(tmdb_id, score_brut)] triés par score décroissant depuis TA base.
@@ -171,7 +364,12 @@ def _query_top_rated_ids(limit: int) -> List[Tuple[int, float]]:
       - CATALOG_SCORE_COL (ex: 'avg_rating' ou 'score')
       - CATALOG_SCORE_MAX (ex: 100, 10, 5) -> scaling
     Sinon on essaie plusieurs combinaisons usuelles.
+    Un snapshot de catalogue (CATALOG_SNAPSHOT_PATH) avec des notes est prioritaire : aucun accès base.
     """
+    snap = catalog_snapshot.get()
+    if snap is not None and snap.manifest.get("score_col"):
+        return snap.top_rated(limit)
+
     eng = _get_db_engine()
     if eng is None or text is None:
         return []
@@ -261,22 +459,54 @@ def _attach_local_scores(movies: List[Dict[str, Any]], id_to_pct: Dict[int, int]
         if isinstance(mid, int) and mid in id_to_pct:
             m["local_score"] = id_to_pct[mid]
 
-# ---------- Health ----------
+# ---------- Health / Readiness ----------
 @app.get("/health")
 def health():
+    """Liveness : le process répond (ne dit rien de l'index)."""
     return {"ok": True}
 
+@app.get("/ready")
+def ready():
+    """Readiness : 200 quand l'index est construit (ou sans recommender local / WARMUP=0), 503 sinon."""
+    ok = _readiness["index"] in ("ready", "disabled", "lazy")
+    body = {"ready": ok, **_readiness}
+    if not ok:
+        return JSONResponse(body, status_code=503)
+    return body
+
 # ---------- TMDb: Search / Details / Similar / Popular ----------
+def _search_local_min() -> int:
+    """Nombre de résultats locaux à partir duquel on ne sollicite pas TMDb."""
+    try:
+        return int(os.getenv("SEARCH_LOCAL_MIN", "8"))
+    except Exception:
+        return 8
+
 @app.get("/tmdb/search")
 def tmdb_search(q: str = Query(..., min_length=1), page: int = 1):
     try:
-        data = search_movie(q, page=page)
+        # 1) index local (page 1 uniquement : l'autocomplétion ne pagine pas)
+        local: List[Dict[str, Any]] = []
+        if page == 1:
+            with metrics.stage("local_search"):
+                local = search_index.search(q, limit=20)
+            if len(local) >= _search_local_min():
+                return {"query": q, "page": page, "results": local,
+                        "total_results": len(local), "source": "local"}
+
+        # 2) résultats locaux trop maigres -> TMDb, en gardant les locaux en tête
+        with metrics.stage("tmdb_search"):
+            data = search_movie(q, page=page)
         results = [
             normalize_movie(m)
             for m in data.get("results", [])
             if (m.get("title") or m.get("original_title"))
         ]
-        return {"query": q, "page": page, "results": results, "total_results": data.get("total_results")}
+        if local:
+            local_ids = {m["id"] for m in local}
+            results = local + [m for m in results if m.get("id") not in local_ids]
+        return {"query": q, "page": page, "results": results,
+                "total_results": data.get("total_results"), "source": "tmdb"}
     except Exception as e:
         log.exception("Search failed")
         raise HTTPException(status_code=500, detail=f"Search failed: {e}") from e
@@ -304,15 +534,7 @@ def tmdb_similar(id: int, page: int = 1):
 @app.get("/tmdb/popular")
 def tmdb_popular(page: int = 1):
     try:
-        base = "https://api.themoviedb.org/3"
-        params = {
-            "api_key": os.getenv("TMDB_API_KEY"),
-            "page": page,
-            "language": os.getenv("TMDB_LANG", "fr-FR"),
-        }
-        r = requests.get(f"{base}/movie/popular", params=params, timeout=10)
-        r.raise_for_status()
-        data = r.json()
+        data = popular_movies(page)
         results = [
             normalize_movie(m)
             for m in data.get("results", [])
@@ -331,7 +553,8 @@ def catalog_top_rated(limit: int = 160):
     """
     try:
         limit = max(10, int(limit))
-        pairs: List[Tuple[int, float]] = _query_top_rated_ids(limit)
+        with metrics.stage("top_rated_query"):
+            pairs: List[Tuple[int, float]] = _top_rated_ids(limit)
         id_to_pct: Dict[int, int] = {}
 
         if not pairs:
@@ -349,7 +572,8 @@ def catalog_top_rated(limit: int = 160):
                 id_to_pct[int(mid)] = max(0, min(100, int(round(float(sc) / scale * 100))))
             ids = [int(mid) for mid, _ in pairs]
 
-        full = hydrate_ids(ids)
+        with metrics.stage("hydrate"):
+            full = hydrate_ids(ids)
         if id_to_pct:
             _attach_local_scores(full, id_to_pct)
 
@@ -359,40 +583,303 @@ def catalog_top_rated(limit: int = 160):
         raise HTTPException(status_code=500, detail=f"Top-rated failed: {e}") from e
 
 # ---------- Recommendations ----------
+# Pagination : la première page calcule une liste classée de RECO_PAGE_MAX ids (un seul top-k,
+# même coût que k=12) gardée en mémoire (reco_cache.RankedLists) ; les pages suivantes ne font
+# qu'un découpage + l'hydratation des nouveaux films. Le curseur est autoporteur (graines,
+# paramètres, position, version d'index) : un autre worker ou une liste expirée la recalcule.
+RECO_PAGE_MAX = int(os.getenv("RECO_PAGE_MAX", "200"))          # profondeur maximale paginable
+RECO_CURSOR_TTL_S = float(os.getenv("RECO_CURSOR_TTL_S", "900"))
+_ranked_lists = reco_cache.RankedLists(RECO_CURSOR_TTL_S, int(os.getenv("RECO_CURSOR_MAX", "2048")))
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """État d'un curseur ; ValueError s'il est illisible."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        state["s"] = [int(x) for x in state["s"]]
+        state["o"] = int(state["o"])
+        if state["o"] < 0:
+            raise ValueError("negative offset")
+        if state["e"] not in ("knn", "graph"):
+            raise ValueError("unknown engine")
+        state["p"] = state.get("p")
+        if state["p"] is not None:
+            state["p"] = {str(k): float(v) for k, v in state["p"].items()}
+        return state
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+# a priori acceptés (= recommender.PRIORS) : validés ici, sans le module du recommender
+# (indisponible, ou index en cours de chauffe : la requête part alors sur le repli TMDb)
+RECO_PRIORS = ("popularity", "quality", "recency")
+
+def _parse_priors(priors: Optional[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    """Coefficients d'a priori validés (None si vides) ; ValueError si clé inconnue ou valeur non finie."""
+    if not priors:
+        return None
+    unknown = set(priors) - set(RECO_PRIORS)
+    if unknown:
+        raise ValueError(f"unknown priors: {', '.join(sorted(map(str, unknown)))} "
+                         f"(expected: {', '.join(RECO_PRIORS)})")
+    weights = {str(p): float(w) for p, w in priors.items()}
+    if not all(math.isfinite(w) for w in weights.values()):
+        raise ValueError("prior weights must be finite numbers")
+    return weights
+
+def _ranked_key(version: Optional[str], seeds: List[int], engine: str,
+                priors: Optional[Dict[str, float]]) -> Tuple:
+    return (version, tuple(sorted(seeds)), engine, tuple(sorted((priors or {}).items())))
+
+def _extend_ranked(ranked: reco_cache.RankedList, seeds: List[int], need: int) -> None:
+    """Complète la liste via TMDb /similar si elle a moins de `need` ids (demande doublée à chaque fois)."""
+    need = min(need, RECO_PAGE_MAX)
+    with ranked.lock:
+        if len(ranked.ids) >= need or ranked.tmdb_asked >= RECO_PAGE_MAX:
+            return
+        ask = min(RECO_PAGE_MAX, max(need - len(ranked.ids), 2 * ranked.tmdb_asked))
+        if ask <= ranked.tmdb_asked:
+            return
+        ranked.tmdb_asked = ask
+        with metrics.stage("tmdb_fallback"):
+            tmdb_ids = collect_similar_ids_from_tmdb(seeds, max_needed=ask, max_pages=5)
+        seed_set = set(seeds)
+        ranked.ids = dedup_preserve_order(ranked.ids + [i for i in tmdb_ids if i not in seed_set])
+
+def _hydrate_page(ids: List[int], start: int, k: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Hydrate ids[start:] jusqu'à k films valides ; retourne (films, position suivante)."""
+    out: List[Dict[str, Any]] = []
+    i = start
+    with metrics.stage("hydrate"):
+        while len(out) < k and i < len(ids):
+            batch = ids[i: i + k - len(out)]
+            out.extend(hydrate_ids(batch))
+            i += len(batch)
+    return out, i
+
+def _page(ranked: reco_cache.RankedList, seeds: List[int], start: int, k: int) -> Tuple[List[Dict[str, Any]], int]:
+    # une page d'avance : la présence d'un curseur suivant garantit une page non vide
+    _extend_ranked(ranked, seeds, start + k + len(seeds) * 2)
+    return _hydrate_page(ranked.ids, start, k)
+
+def _next_cursor(state: Dict[str, Any], items: List[Dict[str, Any]], end: int, total: int) -> Optional[str]:
+    if not items or end >= min(total, RECO_PAGE_MAX):
+        return None
+    return _encode_cursor({**state, "o": end, "l": items[-1].get("id")})
+
+async def _ranked_for(mod, seeds: List[int], engine: str, priors: Optional[Dict[str, float]],
+                      version: Optional[str]) -> reco_cache.RankedList:
+    """Liste classée en mémoire (version du curseur, puis version courante), sinon calculée."""
+    current = mod.index_version() if mod is not None else None
+    for v in dict.fromkeys((version, current)):
+        got = _ranked_lists.get(_ranked_key(v, seeds, engine, priors))
+        if got is not None:
+            return got
+    ids: List[int] = []
+    ok = False
+    if mod is not None:
+        try:
+            with metrics.stage("recommend_db"):
+                ids = await asyncio.wait_for(
+                    asyncio.to_thread(mod.rank, seeds, RECO_PAGE_MAX, engine, priors), timeout=3.0)
+            ok = True
+        except asyncio.TimeoutError:
+            log.warning("DB recommender timeout -> fallback TMDb")
+        except Exception as e:
+            log.warning("DB recommender error -> fallback TMDb: %s", e)
+    seed_set = set(seeds)
+    ranked = reco_cache.RankedList(dedup_preserve_order(i for i in ids if i not in seed_set))
+    if ok or mod is None:  # un échec ponctuel de l'index n'est pas mémorisé
+        _ranked_lists.put(_ranked_key(current, seeds, engine, priors), ranked)
+    return ranked
+
 @app.post("/recommend")
 async def recommend(body: RecommendBody):
-    seeds = [int(s) for s in body.seed_ids]
+    if body.cursor:
+        try:
+            state = _decode_cursor(body.cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+    else:
+        state = {"s": [int(s) for s in body.seed_ids], "e": body.engine, "p": body.priors or None, "o": 0}
+    try:
+        state["p"] = _parse_priors(state["p"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    seeds, engine, priors = state["s"], state["e"], state["p"]
     if not seeds:
         raise HTTPException(status_code=400, detail="seed_ids is required")
-    seed_set = set(seeds)
+    if engine not in ("knn", "graph"):
+        raise HTTPException(status_code=400, detail="engine must be 'knn' or 'graph'")
+    k = body.k
     try:
-        candidate_ids: List[int] = []
-
-        if HAS_DB_RECO:
+        # index en cours de construction : repli TMDb direct plutôt qu'un thread bloqué 3 s
+        mod = _recommender() if (_index_ready() or not WARMUP) else None
+        state["v"] = mod.index_version() if mod is not None else None
+
+        # première page précalculée (graines populaires / combinaisons fréquentes, paramètres par défaut)
+        if (RECO_CACHE and mod is not None and not body.cursor and engine == "knn" and not priors
+                and len(set(seeds)) == len(seeds) <= reco_cache.MAX_SEEDS):
+            store = reco_cache.get_store()
+            store.log_seeds(seeds)
+            if state["v"] is not None and k <= RECO_CACHE_K:
+                with metrics.stage("reco_cache"):
+                    hit = store.get(state["v"], seeds)
+                if hit is not None:
+                    items = hit[:k]
+                    more = len(hit) > k or len(hit) >= RECO_CACHE_K
+                    return {"seed_ids": seeds, "recommendations": items,
+                            "next_cursor": _next_cursor(state, items, len(items), RECO_PAGE_MAX if more else 0)}
+
+        ranked = await _ranked_for(mod, seeds, engine, priors, state.get("v"))
+        start = state["o"]
+        last = state.get("l")
+        if last is not None:
+            # position du dernier film affiché (la page précédente a pu venir du cache précalculé)
             try:
-                raw = await asyncio.wait_for(
-                    asyncio.to_thread(recommend_db, seeds, body.k + len(seeds) * 2),
-                    timeout=3.0,
-                )
-                candidate_ids = coerce_to_id_list(raw)
-            except asyncio.TimeoutError:
-                log.warning("DB recommender timeout -> fallback TMDb")
-            except Exception as e:
-                log.warning("DB recommender error -> fallback TMDb: %s", e)
-
-        need = max(0, body.k + len(seeds) * 2 - len(candidate_ids))
-        if need > 0:
-            tmdb_ids = collect_similar_ids_from_tmdb(seeds, max_needed=need, max_pages=5)
-            candidate_ids.extend(tmdb_ids)
+                start = ranked.ids.index(int(last)) + 1
+            except ValueError:
+                pass
+        items, end = _page(ranked, seeds, start, k)
+        return {"seed_ids": seeds, "recommendations": items,
+                "next_cursor": _next_cursor(state, items, end, len(ranked.ids))}
 
-        candidate_ids = dedup_preserve_order(candidate_ids)
-        candidate_ids = [cid for cid in candidate_ids if cid not in seed_set]
+    except Exception as e:
+        log.exception("Recommend failed")
+        raise HTTPException(status_code=500, detail=f"Recommend failed: {e}") from e
 
-        full = hydrate_ids(candidate_ids)
-        full = full[: body.k]
+# ---------- Cache de recommandations précalculées (src/core/reco_cache.py) ----------
+RECO_CACHE = os.getenv("RECO_CACHE", "1") == "1"
+RECO_CACHE_K = int(os.getenv("RECO_CACHE_K", "24"))                # films stockés par entrée (k servi <= K)
+RECO_CACHE_COMBOS = int(os.getenv("RECO_CACHE_COMBOS", "200"))     # paires / triplets fréquents précalculés
+RECO_CACHE_MIN_COUNT = int(os.getenv("RECO_CACHE_MIN_COUNT", "3"))  # requêtes minimum pour une combinaison
+
+_reco_cache_lock = threading.Lock()
+_reco_cache_thread: Optional[threading.Thread] = None
+_reco_cache_dirty = False
+
+def _reco_cache_seeds() -> List[List[int]]:
+    """Graines à précalculer : films de la page d'accueil (top_ids.json, top-rated) puis combinaisons fréquentes."""
+    store = reco_cache.get_store()
+    singles = [mid for mid, _ in _load_top_ids_from_json(10_000)]
+    if WARMUP_TOP_RATED > 0:
+        singles += [mid for mid, _ in _top_rated_ids(WARMUP_TOP_RATED)]
+    singles += [ids[0] for ids, _ in store.frequent(1, RECO_CACHE_COMBOS, RECO_CACHE_MIN_COUNT)]
+    combos = [c for size in range(2, reco_cache.MAX_SEEDS + 1)
+              for c in store.frequent(size, RECO_CACHE_COMBOS, RECO_CACHE_MIN_COUNT)]
+    combos.sort(key=lambda c: -c[1])
+    out = [[mid] for mid in dict.fromkeys(singles)] + [ids for ids, _ in combos[:RECO_CACHE_COMBOS]]
+    return out
 
-        return {"seed_ids": seeds, "recommendations": full}
+def _build_reco_cache(mod) -> Optional[str]:
+    """Un passage complet pour la version courante de l'index ; None si l'index a changé en cours."""
+    store = reco_cache.get_store()
+    version = mod.index_version()
+    if version is None:
+        return None
+    done = store.keys(version)  # déjà calculées (ex. redémarrage sur le même catalogue)
+    n_new = 0
+    for seeds in _reco_cache_seeds():
+        if mod.index_version() != version:
+            return None
+        if reco_cache.seed_key(seeds) in done:
+            continue
+        seed_set = set(seeds)
+        ranked = reco_cache.RankedList([i for i in mod.rank(seeds, RECO_PAGE_MAX) if i not in seed_set])
+        store.put(version, seeds, _page(ranked, seeds, 0, RECO_CACHE_K)[0])
+        n_new += 1
+    n = store.prune(version)
+    log.info("Reco cache: %d entries for index %s (%d computed)", n, version, n_new)
+    return version
+
+def _reco_cache_worker() -> None:
+    global _reco_cache_thread, _reco_cache_dirty
+    while True:
+        with _reco_cache_lock:
+            if not _reco_cache_dirty:
+                _reco_cache_thread = None
+                return
+            _reco_cache_dirty = False
+        _readiness["reco_cache"] = "building"
+        try:
+            with metrics.stage("reco_cache_build"):
+                if _build_reco_cache(_recommender()) is not None:
+                    _readiness["reco_cache"] = "ready"
+        except Exception as e:
+            _readiness["reco_cache"] = "failed"
+            log.warning("Reco cache build failed: %s", e)
+
+def _schedule_reco_cache(version: Optional[str] = None) -> None:
+    """Abonné de recommender.on_build : (re)lance le job en tâche de fond, un seul à la fois."""
+    global _reco_cache_thread, _reco_cache_dirty
+    with _reco_cache_lock:
+        _reco_cache_dirty = True  # le job en cours repartira sur la nouvelle version
+        if _reco_cache_thread is None:
+            _reco_cache_thread = threading.Thread(target=_reco_cache_worker, name="reco-cache", daemon=True)
+            _reco_cache_thread.start()
+
+# ---------- Profils utilisateurs ----------
+def _require_recommender():
+    mod = _recommender()
+    if mod is None:
+        raise HTTPException(status_code=503, detail="Local recommender unavailable")
+    return mod
+
+@app.post("/users/{user_id}/events")
+async def user_event(user_id: str, body: UserEventBody):
+    mod = _require_recommender()
+    try:
+        profile = await asyncio.to_thread(mod.record_event, user_id, int(body.tmdb_id), body.kind)
+        return {"profile": profile}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        log.exception("User event failed")
+        raise HTTPException(status_code=500, detail=f"User event failed: {e}") from e
+
+@app.get("/users/{user_id}/recommendations")
+async def user_recommendations(user_id: str, k: int = Query(12, ge=1, le=100),
+                               blend: Optional[float] = Query(None, ge=0.0, le=1.0)):
+    """`blend` : part du filtrage collaboratif (ALS) dans le score, défaut CF_BLEND."""
+    mod = _require_recommender()
+    try:
+        with metrics.stage("recommend_user"):
+            results = await asyncio.to_thread(mod.recommend_for_user, user_id, k, blend)
+        return {"user_id": user_id, "recommendations": results}
+    except Exception as e:
+        log.exception("User recommend failed")
+        raise HTTPException(status_code=500, detail=f"User recommend failed: {e}") from e
+
+# ---------- Admin: synchro incrémentale ----------
+def _reindex(ids: List[int]) -> int:
+    if ids:
+        # movie_details est en lru_cache : on évite de resservir une version périmée
+        movie_details.cache_clear()
+        local_index.add_local_ids(ids)  # ingérés par un autre process (job de synchro en CLI)
+    mod = _recommender()
+    if mod is None:
+        return 0
+    return mod.refresh_incremental(ids)
+
+@app.post("/admin/reindex_films")
+async def admin_reindex_films(body: ReindexBody, request: Request):
+    _require_admin_token(request)
+    try:
+        n = await asyncio.to_thread(_reindex, [int(i) for i in body.ids])
+        return {"updated": n}
+    except Exception as e:
+        log.exception("Reindex failed")
+        raise HTTPException(status_code=500, detail=f"Reindex failed: {e}") from e
 
+@app.post("/admin/sync_changes")
+async def admin_sync_changes(request: Request):
+    """Un passage du job de synchro (flux /movie/changes) + mise à jour incrémentale de l'index."""
+    _require_admin_token(request)
+    try:
+        from src.ingest.sync_changes import run_sync
+        return await asyncio.to_thread(run_sync, push=_reindex)
     except Exception as e:
-        log.exception("Recommend failed")
-        raise HTTPException(status_code=500, detail=f"Recommend failed: {e}") from e
+        log.exception("Sync failed")
+        raise HTTPException(status_code=500, detail=f"Sync failed: {e}") from e
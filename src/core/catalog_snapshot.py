@@ -0,0 +1,277 @@
+# src/core/catalog_snapshot.py
+"""
+Snapshot portable du catalogue de service (pour des nœuds d'API sans MySQL).
+
+Un snapshot est un répertoire de fichiers `.npy` (chargés en mmap) + un manifest :
+
+    manifest.json                  version, date, nb de films, colonne de score, blocs
+    ids.npy                        int64, ordre du catalogue
+    release_year.npy               int16 (0 = inconnue)
+    release_date.npy               int32 AAAAMMJJ (0 = inconnue ; absent des anciens snapshots)
+    popularity.npy / vote_average.npy / score.npy   float32 (NaN = absent)
+    vote_count.npy                 int32
+    title.* / poster_path.* / overview.*            tables de chaînes (offsets int64 + octets utf-8)
+    <bloc>.indptr.npy / <bloc>.ids.npy              listes d'ids de features (format CSR)
+    names.<bloc>.ids.npy + names.<bloc>.*           id de feature -> nom (genres, réalisateurs, acteurs)
+
+Chaque écriture produit un répertoire versionné (<chemin>.v<horodatage>) ; le chemin
+lui-même est un lien symbolique basculé par un rename atomique : un lecteur voit toujours
+un snapshot complet, jamais un chemin absent (cf. _publish). La version précédente est
+gardée pour les chargements en cours, les plus anciennes sont supprimées.
+
+CATALOG_SNAPSHOT_PATH (défaut data/catalog_snapshot) : emplacement lu par l'API,
+src/core/local_index.py et le recommender.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+FORMAT_VERSION = 1
+BLOCKS = ("genres", "directors", "actors")
+NUMERIC = {
+    "release_year": np.int16,
+    "release_date": np.int32,
+    "popularity": np.float32,
+    "vote_average": np.float32,
+    "vote_count": np.int32,
+    "score": np.float32,
+}
+STRINGS = ("title", "poster_path", "overview")
+
+KEEP_VERSIONS = 2  # répertoires versionnés gardés : le courant + le précédent
+
+_SNAPSHOT: Optional["Snapshot"] = None
+_LOCK = threading.Lock()
+
+
+def default_path() -> str:
+    return os.getenv("CATALOG_SNAPSHOT_PATH", "data/catalog_snapshot")
+
+
+# ---------- Tables de chaînes ----------
+class StringTable:
+    """Chaînes utf-8 concaténées + offsets ; décodage à la demande (None si vide)."""
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return int(self.offsets.size - 1)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        a, b = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.data[a:b].tobytes().decode("utf-8") if b > a else None
+
+    def tolist(self) -> List[Optional[str]]:
+        return [self[i] for i in range(len(self))]
+
+
+def _write_strings(root: str, name: str, values: Iterable[Optional[str]]) -> None:
+    encoded = [(v or "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    np.save(os.path.join(root, f"{name}.offsets.npy"), offsets)
+    with open(os.path.join(root, f"{name}.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+
+
+def _read_strings(root: str, name: str, mmap: bool) -> StringTable:
+    offsets = np.load(os.path.join(root, f"{name}.offsets.npy"), mmap_mode="r" if mmap else None)
+    path = os.path.join(root, f"{name}.bin")
+    if os.path.getsize(path) == 0:
+        data = np.empty(0, dtype=np.uint8)
+    elif mmap:
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        data = np.fromfile(path, dtype=np.uint8)
+    return StringTable(offsets, data)
+
+
+# ---------- Écriture ----------
+def _publish(tmp: str, path: str) -> None:
+    """
+    Publie le répertoire complet `tmp` sous `path` sans fenêtre où `path` manque :
+    `tmp` devient <path>.v<horodatage>, puis un lien symbolique vers lui remplace `path`
+    (rename(2) atomique sur un lien existant). Sert aussi à l'artefact ALS (src/ml/als.py).
+    """
+    base = path.rstrip("/")
+    target = f"{base}.v{time.time_ns():020d}"
+    os.replace(tmp, target)
+    if os.path.isdir(base) and not os.path.islink(base):
+        # ancien format (répertoire réel) : un lien ne peut pas le remplacer atomiquement,
+        # il est écarté une fois (seule écriture où un lecteur peut ne rien trouver)
+        legacy = f"{base}.v{0:020d}"
+        shutil.rmtree(legacy, ignore_errors=True)
+        os.replace(base, legacy)
+    link = base + ".lnk"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(target), link)  # relatif : le répertoire parent peut être déplacé
+    os.replace(link, base)
+
+    parent = os.path.dirname(base) or "."
+    prefix = os.path.basename(base) + ".v"
+    versions = sorted(n for n in os.listdir(parent) if n.startswith(prefix) and n[len(prefix):].isdigit())
+    for name in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def _open_published(loader, path: str, attempts: int = 3):
+    """`loader(path)` ; relu via le lien si la version visée a été supprimée pendant le chargement."""
+    for attempt in range(attempts):
+        try:
+            return loader(path)
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+
+
+def write_snapshot(
+    path: str,
+    ids: Sequence[int],
+    columns: Dict[str, Sequence],
+    features: Dict[str, List[np.ndarray]],
+    names: Dict[str, Dict[int, str]],
+    score_col: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    Écrit un snapshot. `columns` : champs d'affichage (STRINGS) et numériques (NUMERIC),
+    alignés sur `ids` ; `features` : un tableau d'ids par film et par bloc ;
+    `names` : id de feature -> nom, par bloc. Retourne le manifest.
+    """
+    n = len(ids)
+    tmp = path.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    np.save(os.path.join(tmp, "ids.npy"), np.asarray(ids, dtype=np.int64))
+    for col, dtype in NUMERIC.items():
+        raw = columns.get(col)
+        if raw is None:
+            raw = [None] * n
+        fill = np.nan if np.issubdtype(dtype, np.floating) else 0
+        arr = np.array([fill if v is None or v != v else v for v in raw], dtype=dtype)
+        np.save(os.path.join(tmp, f"{col}.npy"), arr)
+    for col in STRINGS:
+        _write_strings(tmp, col, columns.get(col) or [None] * n)
+
+    for b in BLOCKS:
+        lists = features.get(b) or [np.empty(0, dtype=np.int32)] * n
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([v.size for v in lists], out=indptr[1:])
+        flat = np.concatenate(lists).astype(np.int32) if n else np.empty(0, dtype=np.int32)
+        np.save(os.path.join(tmp, f"{b}.indptr.npy"), indptr)
+        np.save(os.path.join(tmp, f"{b}.ids.npy"), flat)
+
+        table = names.get(b) or {}
+        keys = np.array(sorted(table), dtype=np.int32)
+        np.save(os.path.join(tmp, f"names.{b}.ids.npy"), keys)
+        _write_strings(tmp, f"names.{b}", (table[int(k)] for k in keys))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": dt.datetime.utcnow().replace(microsecond=0).isoformat(),
+        "films": n,
+        "score_col": score_col,
+        "blocks": list(BLOCKS),
+        "nnz": {b: int(sum(v.size for v in features.get(b) or [])) for b in BLOCKS},
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    _publish(tmp, path)
+    return manifest
+
+
+# ---------- Lecture ----------
+class Snapshot:
+    """Snapshot chargé (tableaux en mmap par défaut)."""
+
+    def __init__(self, path: str, mmap: bool = True):
+        mode = "r" if mmap else None
+        self.path = path
+        # lien résolu une fois : tous les fichiers viennent de la même version, même si
+        # une publication bascule le lien pendant le chargement
+        path = os.path.realpath(path)
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest: Dict[str, object] = json.load(f)
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Format de snapshot non supporté : {self.manifest.get('format')}")
+        self.ids: np.ndarray = np.load(os.path.join(path, "ids.npy"), mmap_mode=mode)
+        self.columns: Dict[str, np.ndarray] = {
+            col: (np.load(os.path.join(path, f"{col}.npy"), mmap_mode=mode)
+                  if os.path.exists(os.path.join(path, f"{col}.npy"))
+                  else np.zeros(self.ids.size, dtype=dtype))  # colonne ajoutée après ce snapshot
+            for col, dtype in NUMERIC.items()
+        }
+        self.strings: Dict[str, StringTable] = {col: _read_strings(path, col, mmap) for col in STRINGS}
+        self.features = {
+            b: (np.load(os.path.join(path, f"{b}.indptr.npy"), mmap_mode=mode),
+                np.load(os.path.join(path, f"{b}.ids.npy"), mmap_mode=mode))
+            for b in BLOCKS
+        }
+        self.names = {
+            b: (np.load(os.path.join(path, f"names.{b}.ids.npy"), mmap_mode=mode),
+                _read_strings(path, f"names.{b}", mmap))
+            for b in BLOCKS
+        }
+        self._order: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self.ids.size)
+
+    @property
+    def version(self) -> str:
+        return str(self.manifest.get("created_at"))
+
+    def positions(self, ids: Iterable[int]) -> np.ndarray:
+        """Positions des `ids` présents dans le snapshot (ordre du snapshot)."""
+        wanted = np.fromiter((int(i) for i in ids), dtype=np.int64)
+        return np.flatnonzero(np.isin(self.ids, wanted))
+
+    def feature_lists(self, block: str, positions: Optional[np.ndarray] = None) -> List[np.ndarray]:
+        """Un tableau int32 trié par film (vues sur le fichier mmap)."""
+        indptr, flat = self.features[block]
+        pos = range(len(self)) if positions is None else positions
+        return [flat[indptr[i]:indptr[i + 1]] for i in pos]
+
+    def name(self, block: str, fid: int) -> Optional[str]:
+        keys, table = self.names[block]
+        i = int(np.searchsorted(keys, fid))
+        if i < keys.size and int(keys[i]) == int(fid):
+            return table[i]
+        return None
+
+    def top_rated(self, limit: int) -> List[tuple]:
+        """[(tmdb_id, score)] par score décroissant (films sans score exclus)."""
+        if self._order is None:
+            score = np.asarray(self.columns["score"])
+            ok = np.flatnonzero(~np.isnan(score))
+            self._order = ok[np.argsort(-score[ok], kind="stable")]
+        top = self._order[: int(limit)]
+        score = self.columns["score"]
+        return [(int(self.ids[i]), float(score[i])) for i in top]
+
+
+def get(path: Optional[str] = None, reload: bool = False) -> Optional[Snapshot]:
+    """Snapshot courant (chargé une fois), ou None s'il n'y en a pas."""
+    global _SNAPSHOT
+    path = path or default_path()
+    with _LOCK:
+        if _SNAPSHOT is not None and not reload and _SNAPSHOT.path == path:
+            return _SNAPSHOT
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            _SNAPSHOT = None
+            return None
+        _SNAPSHOT = _open_published(Snapshot, path)
+        return _SNAPSHOT
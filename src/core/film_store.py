@@ -0,0 +1,235 @@
+# src/core/film_store.py
+"""
+Catalogue de service en colonnes : champs d'affichage et numériques des films de l'index,
+sans objet Python par film.
+
+    ids            int64, ordre des lignes de l'index
+    release_year   int16 (0 = inconnue)
+    release_date   int32 AAAAMMJJ (0 = inconnue)
+    popularity     float32
+    vote_average   float32 (NaN = absente)
+    vote_count     int32
+    title / poster_path   tables de chaînes en mémoire (offsets int64 + octets utf-8)
+    overview              table de chaînes sur disque, en mmap : seuls les synopsis des films
+                          renvoyés sont lus (et seulement leurs OVERVIEW_CHARS premiers caractères)
+
+Les tables viennent du snapshot (src/core/catalog_snapshot.py, déjà en mmap) quand il existe ;
+sinon les synopsis sont écrits dans un fichier de FILM_STORE_DIR (défaut : répertoire temporaire),
+projeté en mémoire puis supprimé du répertoire (l'espace est rendu à la fermeture du process).
+
+Les mises à jour incrémentales ne réécrivent pas les tables : les lignes modifiées ou ajoutées
+sont gardées à part (_Overlay), jusqu'à la prochaine reconstruction complète.
+"""
+from __future__ import annotations
+
+import ctypes
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.core.catalog_snapshot import StringTable
+
+OVERVIEW_CHARS = 360  # longueur servie par les recommandations
+NUMERIC = {
+    "release_year": np.int16,
+    "release_date": np.int32,
+    "popularity": np.float32,
+    "vote_average": np.float32,
+    "vote_count": np.int32,
+}
+STRINGS = ("title", "poster_path", "overview")
+
+
+def _encode(values: Iterable[Optional[str]]) -> tuple:
+    # colonnes NULL : None, ou NaN (float) une fois passées par pandas -> chaîne vide
+    encoded = [v.encode("utf-8") if isinstance(v, str) else b"" for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def date_keys(values: Iterable[Any]) -> np.ndarray:
+    """Dates (date, datetime, 'AAAA-MM-JJ') -> AAAAMMJJ en float64, NaN si absente ou invalide."""
+    d = pd.to_datetime(pd.Series(list(values), dtype=object), errors="coerce")
+    return (d.dt.year * 10000 + d.dt.month * 100 + d.dt.day).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def format_date_key(key: int) -> Optional[str]:
+    """AAAAMMJJ -> 'AAAA-MM-JJ' (None si 0)."""
+    key = int(key)
+    return f"{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}" if key else None
+
+
+def memory_strings(values: Iterable[Optional[str]]) -> StringTable:
+    offsets, data = _encode(values)
+    return StringTable(offsets, np.frombuffer(data, dtype=np.uint8))
+
+
+def disk_strings(values: Iterable[Optional[str]], directory: Optional[str] = None) -> StringTable:
+    """Table de chaînes dont les octets restent sur disque (mmap d'un fichier anonyme)."""
+    offsets, data = _encode(values)
+    if not data:
+        return StringTable(offsets, np.empty(0, dtype=np.uint8))
+    directory = directory or os.getenv("FILM_STORE_DIR") or None
+    fd, path = tempfile.mkstemp(prefix="film-store-", suffix=".bin", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        mm = np.memmap(path, dtype=np.uint8, mode="r")
+    finally:
+        os.unlink(path)  # le mapping garde le fichier ; rien à nettoyer à l'arrêt
+    return StringTable(offsets, mm)
+
+
+def prefix(table: Any, i: int, n_chars: int) -> Optional[str]:
+    """Les `n_chars` premiers caractères de la chaîne i, sans décoder la suite."""
+    if isinstance(table, _Overlay):
+        s = table[i]
+        return s[:n_chars] if s is not None else None
+    a, b = int(table.offsets[i]), int(table.offsets[i + 1])
+    if b <= a:
+        return None
+    return table.data[a:min(b, a + 4 * n_chars)].tobytes().decode("utf-8", errors="ignore")[:n_chars]
+
+
+def trim_heap() -> None:
+    """
+    Rend au système les pages libres du tas (glibc uniquement, sinon sans effet) : après une
+    construction, les temporaires (DataFrame, listes de chaînes) laisseraient le RSS au niveau du pic.
+    """
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class _Overlay:
+    """Table de chaînes de base + lignes remplacées / ajoutées (mises à jour incrémentales)."""
+    __slots__ = ("base", "extra", "n")
+
+    def __init__(self, base: Any, extra: Dict[int, Optional[str]], n: int):
+        self.base = base
+        self.extra = extra
+        self.n = n
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if i in self.extra:
+            return self.extra[i]
+        return self.base[i]
+
+    def tolist(self) -> List[Optional[str]]:
+        return [self[i] for i in range(self.n)]
+
+
+class FilmStore:
+    """Colonnes du catalogue, alignées sur les lignes de l'index."""
+    __slots__ = ("ids", "columns", "strings", "_order", "_sorted")
+
+    def __init__(self, ids: np.ndarray, columns: Dict[str, np.ndarray], strings: Dict[str, Any]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.columns = columns
+        self.strings = strings
+        self._order = np.argsort(self.ids, kind="stable")
+        self._sorted = self.ids[self._order]
+
+    @classmethod
+    def build(cls, ids: Sequence[int], columns: Dict[str, Sequence], strings: Dict[str, Any],
+              overview_on_disk: bool = True) -> "FilmStore":
+        """
+        `columns` : valeurs numériques (NUMERIC, None / NaN = absente) ;
+        `strings` : listes de chaînes, ou StringTable déjà construites (snapshot).
+        """
+        n = len(ids)
+        cols = {}
+        for col, dtype in NUMERIC.items():
+            raw = columns.get(col)
+            if raw is None:
+                raw = np.zeros(n) if col != "vote_average" else np.full(n, np.nan)
+            arr = np.asarray(raw, dtype=np.float64)
+            if col != "vote_average":  # seule colonne où « absente » (NaN) se distingue de 0
+                arr = np.nan_to_num(arr, nan=0.0)
+            cols[col] = arr.astype(dtype)
+        tables = {}
+        for col in STRINGS:
+            v = strings.get(col)
+            if v is None:
+                v = [None] * n
+            if not isinstance(v, (StringTable, _Overlay)):
+                v = disk_strings(v) if (col == "overview" and overview_on_disk) else memory_strings(v)
+            tables[col] = v
+        return cls(np.asarray(ids, dtype=np.int64), cols, tables)
+
+    def __len__(self) -> int:
+        return int(self.ids.size)
+
+    # ---------- Recherche par id TMDb ----------
+    def rows_of(self, tmdb_ids: Iterable[int]) -> np.ndarray:
+        """Ligne de chaque id (-1 si absent), dans l'ordre donné."""
+        wanted = np.fromiter((int(i) for i in tmdb_ids), dtype=np.int64)
+        if self.ids.size == 0 or wanted.size == 0:
+            return np.full(wanted.size, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted, wanted), self.ids.size - 1)
+        return np.where(self._sorted[pos] == wanted, self._order[pos], -1)
+
+    def row(self, tmdb_id: int) -> Optional[int]:
+        i = int(self.rows_of([tmdb_id])[0])
+        return i if i >= 0 else None
+
+    # ---------- Champs ----------
+    def title(self, i: int) -> str:
+        return (self.strings["title"][i] or "").strip()
+
+    def year(self, i: int) -> Optional[int]:
+        y = int(self.columns["release_year"][i])
+        return y or None
+
+    def display(self, i: int) -> Dict[str, Any]:
+        """Champs d'affichage d'une recommandation (synopsis tronqué à OVERVIEW_CHARS)."""
+        return {
+            "tmdb_id": int(self.ids[i]),
+            "title": self.title(i),
+            "poster_path": self.strings["poster_path"][i] or None,
+            "overview": (prefix(self.strings["overview"], i, OVERVIEW_CHARS) or "").strip(),
+        }
+
+    # ---------- Mise à jour incrémentale ----------
+    def merge(self, fresh: "FilmStore") -> tuple:
+        """
+        Nouveau store où les films de `fresh` remplacent (ou s'ajoutent à) ceux-ci.
+        Retourne (store, lignes de chaque film de `fresh`).
+        """
+        n_old = len(self)
+        rows = self.rows_of(fresh.ids)
+        new = rows < 0
+        rows[new] = n_old + np.arange(int(new.sum()))
+        n = n_old + int(new.sum())
+
+        cols = {}
+        for col, arr in self.columns.items():
+            out = np.empty(n, dtype=arr.dtype)
+            out[:n_old] = arr
+            out[rows] = fresh.columns[col]
+            cols[col] = out
+        ids = np.concatenate([self.ids, fresh.ids[new]])
+        strings = {}
+        for col, table in self.strings.items():
+            base, extra = (table.base, dict(table.extra)) if isinstance(table, _Overlay) else (table, {})
+            extra.update({int(r): fresh.strings[col][j] for j, r in enumerate(rows)})
+            strings[col] = _Overlay(base, extra, n)
+        return FilmStore(ids, cols, strings), rows
+
+    def nbytes(self) -> Dict[str, int]:
+        """Mémoire résidente par colonne (hors pages mmap) : suivi / debug."""
+        out = {"ids": self.ids.nbytes + self._order.nbytes + self._sorted.nbytes}
+        out.update({c: a.nbytes for c, a in self.columns.items()})
+        for c, t in self.strings.items():
+            base = t.base if isinstance(t, _Overlay) else t
+            data = 0 if isinstance(base.data, np.memmap) else base.data.nbytes
+            out[c] = base.offsets.nbytes + data
+        return out
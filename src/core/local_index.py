@@ -1,14 +1,28 @@
 # src/core/local_index.py
 from __future__ import annotations
-import os, json
-from functools import lru_cache
-from typing import Set, Optional
+import os, json, threading
+from typing import Iterable, Optional, Tuple
 from contextlib import suppress
 
-from sqlalchemy import create_engine, text
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
 
 _ENGINE = None
-_IDS_CACHE: Optional[Set[int]] = None
+# Appartenance au catalogue : tableau trié d'ids TMDb (searchsorted / isin)
+_IDS: Optional[np.ndarray] = None
+# Source courante des ids + high-water mark pour les rafraîchissements incrémentaux
+_SOURCE: Optional[Tuple[str, str]] = None   # (table, colonne id)
+_WATERMARK = None                            # valeur max de last_tmdb_sync vue
+_AT_WATERMARK: set = set()                   # ids déjà lus dont last_tmdb_sync == _WATERMARK
+_LOCK = threading.Lock()
+
+_CANDIDATES = [
+    ("film", "tmdb_id"),
+    ("films", "tmdb_id"),
+    ("movie", "tmdb_id"),
+    ("movies", "tmdb_id"),
+]
+_WATERMARK_COL = "last_tmdb_sync"
 
 def _init_engine():
     global _ENGINE
@@ -19,54 +33,138 @@ def _init_engine():
         except Exception:
             _ENGINE = None
 
-def _load_ids_from_json() -> Optional[Set[int]]:
+def _as_sorted_ids(values: Iterable) -> np.ndarray:
+    arr = np.fromiter((int(x) for x in values if x is not None), dtype=np.int64)
+    return np.unique(arr)
+
+def _load_ids_from_json() -> Optional[np.ndarray]:
     path = os.getenv("CATALOG_IDS_PATH", "data/catalog_ids.json")
     if not os.path.exists(path):
         return None
     try:
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        return {int(x) for x in data if x is not None}
+        return _as_sorted_ids(data)
     except Exception:
         return None
 
-def _probe_db_has_id(tmdb_id: int) -> bool:
-    """Tente plusieurs tables/colonnes courantes. Adapte si besoin."""
+def _load_ids_from_snapshot() -> Optional[np.ndarray]:
+    """Ids du snapshot de catalogue (cf. src/core/catalog_snapshot.py), sans base."""
+    from src.core import catalog_snapshot
+    with suppress(Exception):
+        snap = catalog_snapshot.get()
+        if snap is not None:
+            return np.unique(np.asarray(snap.ids, dtype=np.int64))
+    return None
+
+def _has_col(table: str, col: str) -> bool:
+    with suppress(Exception):
+        return col in {c["name"] for c in inspect(_ENGINE).get_columns(table)}
+    return False
+
+def _load_ids_from_db() -> Optional[np.ndarray]:
+    """Charge tous les ids en UNE requête (première table candidate qui répond)."""
+    global _SOURCE, _WATERMARK, _AT_WATERMARK
     if _ENGINE is None:
-        return False
-    candidates = [
-        ("film", "tmdb_id"),
-        ("films", "tmdb_id"),
-        ("movie", "tmdb_id"),
-        ("movies", "tmdb_id"),
-    ]
+        return None
     with _ENGINE.connect() as conn:
-        for table, col in candidates:
+        for table, col in _CANDIDATES:
             with suppress(Exception):
-                row = conn.execute(
-                    text(f"SELECT 1 FROM {table} WHERE {col} = :id LIMIT 1"),
-                    {"id": int(tmdb_id)},
-                ).first()
-                if row:
-                    return True
-    return False
+                # watermark lu AVANT les ids : une écriture concurrente sera relue au prochain refresh
+                wm, at = None, set()
+                if _has_col(table, _WATERMARK_COL):
+                    wm = conn.execute(text(f"SELECT MAX({_WATERMARK_COL}) FROM {table}")).scalar()
+                    if wm is not None:
+                        at = {int(r[0]) for r in conn.execute(
+                            text(f"SELECT {col} FROM {table} WHERE {_WATERMARK_COL} = :wm"), {"wm": wm})}
+                rows = conn.execute(text(f"SELECT {col} FROM {table} WHERE {col} IS NOT NULL")).fetchall()
+                _SOURCE = (table, col)
+                _WATERMARK, _AT_WATERMARK = wm, at
+                return _as_sorted_ids(r[0] for r in rows)
+    return None
 
 def init_local_index():
     """À appeler au démarrage de l'app."""
-    global _IDS_CACHE
+    global _IDS
     _init_engine()
-    # Priorité à un fichier JSON si dispo (rapide)
-    _IDS_CACHE = _load_ids_from_json()
+    # Priorité à un fichier JSON si dispo (rapide), puis au snapshot, sinon un seul SELECT sur la base
+    ids = _load_ids_from_json()
+    if ids is None:
+        ids = _load_ids_from_snapshot()
+    if ids is None:
+        ids = _load_ids_from_db()
+    with _LOCK:
+        _IDS = ids if ids is not None else np.empty(0, dtype=np.int64)
+
+def add_local_ids(ids: Iterable[int]) -> int:
+    """
+    Ajoute des ids fraîchement ingérés (appelé par writer.write_movies et /admin/reindex_films).
+    Sans catalogue encore chargé, rien à faire : le premier chargement les lira en base.
+    Retourne la taille du catalogue (0 s'il n'est pas chargé).
+    """
+    global _IDS
+    new = _as_sorted_ids(ids)
+    with _LOCK:
+        if _IDS is None:
+            return 0
+        _IDS = np.union1d(_IDS, new)
+        return int(_IDS.size)
+
+def refresh_local_index() -> int:
+    """
+    Rafraîchissement incrémental depuis la base : seuls les films dont
+    `last_tmdb_sync` atteint le dernier watermark sont relus. La colonne est à la
+    seconde, d'où `>=` : les films déjà vus à ce watermark sont écartés, ceux écrits
+    dans la même seconde après la lecture précédente sont pris. Sans cette colonne,
+    rechargement complet (toujours une seule requête).
+    """
+    global _IDS, _WATERMARK, _AT_WATERMARK
+    if _ENGINE is None or _SOURCE is None:
+        init_local_index()
+        return int(_IDS.size)
+    table, col = _SOURCE
+    if _WATERMARK is None:
+        ids = _load_ids_from_db()
+        with _LOCK:
+            _IDS = ids if ids is not None else _IDS
+        return int(_IDS.size)
+
+    with _ENGINE.connect() as conn:
+        rows = conn.execute(
+            text(f"SELECT {col}, {_WATERMARK_COL} FROM {table} WHERE {_WATERMARK_COL} >= :wm"),
+            {"wm": _WATERMARK},
+        ).fetchall()
+    rows = [r for r in rows if not (r[1] == _WATERMARK and int(r[0]) in _AT_WATERMARK)]
+    if rows:
+        wm = max(r[1] for r in rows)
+        at = {int(r[0]) for r in rows if r[1] == wm}
+        if wm == _WATERMARK:
+            _AT_WATERMARK |= at
+        else:
+            _WATERMARK, _AT_WATERMARK = wm, at
+    return add_local_ids(r[0] for r in rows)
+
+def _ensure_ids() -> np.ndarray:
+    if _IDS is None:
+        init_local_index()
+    return _IDS  # type: ignore[return-value]
 
 def has_local_data(tmdb_id: int) -> bool:
     """True si l'ID est dans le catalogue local (JSON ou DB)."""
     if tmdb_id is None:
         return False
-    # Cache JSON → O(1)
-    if _IDS_CACHE is not None:
-        return int(tmdb_id) in _IDS_CACHE
-    # Sinon, requête DB rapide (fallback)
-    return _probe_db_has_id(int(tmdb_id))
+    ids = _ensure_ids()
+    if ids.size == 0:
+        return False
+    i = int(np.searchsorted(ids, int(tmdb_id)))
+    return i < ids.size and int(ids[i]) == int(tmdb_id)
 
 def filter_to_local(ids: list[int]) -> list[int]:
-    return [int(i) for i in ids if has_local_data(int(i))]
+    """Garde l'ordre d'entrée ; un seul `isin` vectorisé sur le tableau trié."""
+    if not ids:
+        return []
+    local = _ensure_ids()
+    if local.size == 0:
+        return []
+    arr = np.asarray([int(i) for i in ids], dtype=np.int64)
+    return arr[np.isin(arr, local, assume_unique=False)].tolist()
@@ -0,0 +1,211 @@
+# src/core/metrics.py
+"""
+Métriques internes au format texte Prometheus (sans dépendance prometheus_client).
+
+- Counter / Gauge / Histogram avec labels, thread-safe
+- valeurs calculées à la lecture (`set_function`) pour ce qui existe déjà ailleurs
+  (ex. `movie_details.cache_info()`)
+- `stage(name)` : chronomètre une étape, l'enregistre dans `stage_duration_seconds{stage=...}`
+  et dans les timings de la requête en cours (en-tête Server-Timing, cf. src/api/app.py) ;
+  pendant un profil (src/core/profiling.py), l'étape devient aussi un noeud de l'arbre
+
+Exposition : `render()` -> texte pour GET /metrics.
+"""
+from __future__ import annotations
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.core import profiling
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUILD_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_REGISTRY: List["_Metric"] = []
+_LOCK = threading.Lock()
+
+# timings (nom, secondes) de la requête HTTP en cours ; None hors requête
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = \
+    contextvars.ContextVar("request_timings", default=None)
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if math.isnan(v):
+        return "NaN"
+    if v == int(v) and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: object) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._fn: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+        with _LOCK:
+            _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def set_function(self, fn: Callable[[], object]) -> None:
+        """Valeur calculée à chaque lecture : float, ou {tuple de labels: float}."""
+        self._fn = fn
+
+    def _samples(self) -> List[str]:
+        if self._fn is not None:
+            try:
+                got = self._fn()
+            except Exception:
+                return []
+            items = got.items() if isinstance(got, dict) else [((), got)]
+            return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(float(v))}" for k, v in items]
+        with _LOCK:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(float(v))}" for k, v in items]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self._samples())
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with _LOCK:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with _LOCK:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts, _, _ = state
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[str]:
+        with _LOCK:
+            items = [(k, (list(s[0]), s[1], s[2])) for k, s in self._values.items()]
+        out = []
+        for key, (counts, total, n) in items:
+            acc = 0
+            for b, c in zip(self.buckets, counts):
+                acc += c
+                le = 'le="%s"' % _fmt(b)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return out
+
+
+def render() -> str:
+    with _LOCK:
+        metrics = list(_REGISTRY)
+    return "\n".join(m.render() for m in metrics) + "\n"
+
+
+# ---------- Métriques de l'application ----------
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Latence des requêtes HTTP par route",
+                         ["route", "method", "status"])
+STAGE_LATENCY = Histogram("stage_duration_seconds", "Durée des étapes d'une requête (recommend_db, tmdb_fallback, hydrate...)",
+                          ["stage"])
+TMDB_REQUESTS = Counter("tmdb_requests_total", "Appels HTTP à TMDb par endpoint et statut", ["endpoint", "status"])
+TMDB_LATENCY = Histogram("tmdb_request_duration_seconds", "Latence des appels TMDb par endpoint", ["endpoint"])
+INDEX_BUILD = Histogram("index_build_duration_seconds", "Durée de construction de l'index du recommender",
+                        ["kind"], buckets=BUILD_BUCKETS)
+INDEX_LAST_BUILD = Gauge("index_last_build_timestamp_seconds", "Horodatage de la dernière (re)construction de l'index")
+CATALOG_FILMS = Gauge("catalog_films", "Films indexés par le recommender")
+INDEX_NNZ = Gauge("index_matrix_nnz", "Éléments non nuls de la matrice de features")
+INDEX_COLS = Gauge("index_matrix_columns", "Colonnes (features) de la matrice")
+EVENT_LOOP_LAG = Histogram("event_loop_lag_seconds", "Retard de la boucle asyncio (réveil programmé vs effectif)",
+                           buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+
+def record_index(kind: str, seconds: float, films: int, nnz: int, cols: int) -> None:
+    INDEX_BUILD.observe(seconds, kind=kind)
+    INDEX_LAST_BUILD.set(time.time())
+    CATALOG_FILMS.set(films)
+    INDEX_NNZ.set(nnz)
+    INDEX_COLS.set(cols)
+
+
+# ---------- Étapes / Server-Timing ----------
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    span = profiling.enter(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        profiling.leave(span)
+        STAGE_LATENCY.observe(dt, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, dt))
+
+
+def start_request() -> contextvars.Token:
+    """Ouvre la collecte des timings de la requête courante (middleware HTTP)."""
+    return _request_timings.set([])
+
+
+def end_request(token: contextvars.Token) -> List[Tuple[str, float]]:
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return timings
+
+
+def server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    """Valeur d'en-tête Server-Timing (durées en ms, étapes répétées cumulées)."""
+    agg: Dict[str, float] = {}
+    for name, dt in timings:
+        agg[name] = agg.get(name, 0.0) + dt
+    parts = [f"{n};dur={d * 1000:.1f}" for n, d in agg.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
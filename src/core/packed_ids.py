@@ -0,0 +1,32 @@
+# src/core/packed_ids.py
+"""
+Encodage compact des listes d'ids (genres, réalisateurs, acteurs) stockées dans
+`film_features` : int32 little-endian, triés, sans doublon.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+_DTYPE = np.dtype("<i4")
+
+
+def pack_ids(ids: Iterable[int]) -> bytes:
+    arr = np.fromiter((int(i) for i in ids if i is not None), dtype=np.int64)
+    return np.unique(arr).astype(_DTYPE).tobytes()
+
+
+def unpack_ids(blob: Optional[bytes]) -> np.ndarray:
+    if not blob:
+        return np.empty(0, dtype=np.int32)
+    return np.frombuffer(blob, dtype=_DTYPE).astype(np.int32)
+
+
+def unpack_many(blobs: Sequence[Optional[bytes]]) -> List[np.ndarray]:
+    """Décode une colonne entière en un seul buffer ; renvoie des vues par ligne."""
+    parts = [bytes(b) if b else b"" for b in blobs]
+    flat = np.frombuffer(b"".join(parts), dtype=_DTYPE).astype(np.int32)
+    bounds = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(p) // _DTYPE.itemsize for p in parts], out=bounds[1:])
+    return [flat[bounds[i]:bounds[i + 1]] for i in range(len(parts))]
@@ -0,0 +1,339 @@
+# src/core/profiling.py
+"""
+Profilage à la demande, utilisable en production (coût nul quand rien n'est demandé).
+
+Deux outils :
+  - arbre des étapes : chaque `metrics.stage(name)` ouvert pendant un profil devient un
+    noeud (nom, début, durée, enfants) ; hors profil, `enter()` se limite à la lecture
+    d'une ContextVar
+  - échantillonneur : un thread lit `sys._current_frames()` toutes les PROFILE_SAMPLE_MS
+    et agrège les piles au format « folded » (une ligne `a;b;c N`), lisible par
+    flamegraph.pl, speedscope ou inferno
+
+Déclenchement :
+  - requête HTTP : en-tête `X-Profile: <PROFILE_TOKEN>` ou `?profile=<PROFILE_TOKEN>`,
+    mode `tree` (défaut) ou `sample` via `X-Profile-Mode` / `profile_mode`
+    (sans PROFILE_TOKEN, le profilage par requête est désactivé)
+  - construction d'index : PROFILE_INDEX_BUILDS=1 (cf. src/ml/recommender.py)
+  - profils périodiques : PROFILE_PERIODIC_S > 0 -> une fenêtre de PROFILE_PERIODIC_WINDOW_S
+    échantillonnée toutes les PROFILE_PERIODIC_S secondes
+
+Les profils sont écrits dans PROFILE_DIR (`<id>.json` pour l'arbre, `<id>.folded` pour les
+échantillons) ; seuls les PROFILE_KEEP plus récents sont gardés.
+
+L'échantillonneur voit tous les threads du process : sous charge, le profil d'une requête
+contient aussi les piles des requêtes concurrentes (l'arbre des étapes, lui, est exact).
+"""
+from __future__ import annotations
+
+import contextvars
+import datetime as dt
+import hmac
+import json
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+log = logging.getLogger("profiling")
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+SAMPLE_INTERVAL_S = float(os.getenv("PROFILE_SAMPLE_MS", "5")) / 1000.0
+PROFILE_INDEX_BUILDS = os.getenv("PROFILE_INDEX_BUILDS", "0") == "1"
+PERIODIC_EVERY_S = float(os.getenv("PROFILE_PERIODIC_S", "0"))
+PERIODIC_WINDOW_S = float(os.getenv("PROFILE_PERIODIC_WINDOW_S", "10"))
+PERIODIC_INTERVAL_S = float(os.getenv("PROFILE_PERIODIC_SAMPLE_MS", "20")) / 1000.0
+
+MODES = ("tree", "sample")
+
+# feuilles de pile d'un thread qui attend (pool au repos, boucle asyncio sans travail...)
+_IDLE = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socketserver.py", "serve_forever"),
+}
+
+
+# ---------- Arbre des étapes ----------
+class Span:
+    __slots__ = ("name", "start", "duration", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.children: List["Span"] = []
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 3),
+            "children": [c.to_dict(origin) for c in self.children],
+        }
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("profile_span", default=None)
+
+
+def enter(name: str) -> Optional[Tuple[Span, contextvars.Token]]:
+    """Ouvre un noeud sous le noeud courant ; None (et rien d'autre) hors profil."""
+    parent = _current.get()
+    if parent is None:
+        return None
+    span = Span(name)
+    parent.children.append(span)  # append atomique : les threads de to_thread partagent le parent
+    return span, _current.set(span)
+
+
+def leave(handle: Optional[Tuple[Span, contextvars.Token]]) -> None:
+    if handle is None:
+        return
+    span, token = handle
+    span.duration = time.perf_counter() - span.start
+    _current.reset(token)
+
+
+# ---------- Échantillonneur ----------
+_frame_labels: Dict[Any, str] = {}
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+
+def _label(code) -> str:
+    lab = _frame_labels.get(code)
+    if lab is None:
+        path = code.co_filename
+        i = path.rfind("site-packages/")
+        if i >= 0:
+            path = path[i + len("site-packages/"):]
+        elif path.startswith(_STDLIB):
+            path = path[len(_STDLIB):]
+        else:
+            cwd = os.getcwd() + os.sep
+            path = path[len(cwd):] if path.startswith(cwd) else path
+        lab = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ",")
+        _frame_labels[code] = lab
+    return lab
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE
+
+
+class Sampler:
+    """Thread d'échantillonnage : `start()`, puis `stop()` -> Counter {pile folded: n}."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S, include_idle: bool = False):
+        self.interval = max(0.001, interval)
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (not self.include_idle and _is_idle(frame)):
+                continue
+            stack = []
+            f = frame
+            while f is not None:
+                stack.append(_label(f.f_code))
+                f = f.f_back
+            stack.append(names.get(ident, str(ident)).replace(";", ","))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "Sampler":
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+
+def folded(stacks: Counter) -> str:
+    return "".join(f"{s} {n}\n" for s, n in stacks.most_common())
+
+
+# ---------- Fichiers ----------
+def _new_id(kind: str) -> str:
+    return f"{kind}-{dt.datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def _prune() -> None:
+    try:
+        files = [os.path.join(PROFILE_DIR, f) for f in os.listdir(PROFILE_DIR)]
+        files.sort(key=os.path.getmtime, reverse=True)
+    except OSError:  # fichier supprimé entre listdir et stat (autre worker) : au prochain passage
+        return
+    for fp in files[PROFILE_KEEP:]:
+        try:
+            os.remove(fp)
+        except OSError:
+            pass
+
+
+def _write(name: str, content: str) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    tmp = os.path.join(PROFILE_DIR, f".{name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, os.path.join(PROFILE_DIR, name))
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    try:
+        names = [f for f in os.listdir(PROFILE_DIR) if not f.startswith(".")]
+    except OSError:
+        return []
+    out = []
+    for f in names:
+        fp = os.path.join(PROFILE_DIR, f)
+        st = os.stat(fp)
+        out.append({"name": f, "bytes": st.st_size,
+                    "created_at": dt.datetime.fromtimestamp(st.st_mtime).replace(microsecond=0).isoformat()})
+    out.sort(key=lambda p: p["created_at"], reverse=True)
+    return out
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Chemin d'un profil existant ; None si le nom sort de PROFILE_DIR ou n'existe pas."""
+    if os.path.basename(name) != name or name.startswith("."):
+        return None
+    fp = os.path.join(PROFILE_DIR, name)
+    return fp if os.path.isfile(fp) else None
+
+
+# ---------- Profils ----------
+class Profile:
+    def __init__(self, kind: str, sample: bool, meta: Optional[Dict[str, Any]] = None):
+        self.id = _new_id(kind)
+        self.root = Span(kind)
+        self.meta = dict(meta or {})
+        self.sampler = Sampler() if sample else None
+        self.files: List[str] = []
+
+    def save(self) -> None:
+        tree = {"id": self.id, "meta": self.meta, "tree": self.root.to_dict()}
+        if self.sampler is not None:
+            tree["samples"] = self.sampler.samples
+            tree["sample_interval_ms"] = self.sampler.interval * 1000
+            _write(f"{self.id}.folded", folded(self.sampler.stacks))
+            self.files.append(f"{self.id}.folded")
+        _write(f"{self.id}.json", json.dumps(tree, ensure_ascii=False, indent=1))
+        self.files.insert(0, f"{self.id}.json")
+        _prune()
+
+
+@contextmanager
+def profile(kind: str, sample: bool = True, meta: Optional[Dict[str, Any]] = None) -> Iterator[Profile]:
+    """Profile le bloc : arbre des étapes (+ échantillons si `sample`), écrit dans PROFILE_DIR."""
+    prof = Profile(kind, sample, meta)
+    token = _current.set(prof.root)
+    if prof.sampler is not None:
+        prof.sampler.start()
+    try:
+        yield prof
+    finally:
+        if prof.sampler is not None:
+            prof.sampler.stop()
+        prof.root.duration = time.perf_counter() - prof.root.start
+        _current.reset(token)
+        try:
+            prof.save()
+        except Exception as e:  # un profil raté ne doit jamais casser le traitement profilé
+            log.warning("Profil %s non écrit : %s", prof.id, e)
+
+
+@contextmanager
+def maybe_profile(kind: str, enabled: bool, meta: Optional[Dict[str, Any]] = None) -> Iterator[Optional[Profile]]:
+    if not enabled:
+        yield None
+        return
+    with profile(kind, sample=True, meta=meta) as prof:
+        yield prof
+
+
+# ---------- Requêtes HTTP ----------
+def authorized(headers: Mapping[str, str], query: Mapping[str, str]) -> bool:
+    if PROFILE_TOKEN is None:
+        return False
+    given = headers.get("x-profile") or query.get("profile")
+    return bool(given) and hmac.compare_digest(given, PROFILE_TOKEN)
+
+
+def requested_mode(headers: Mapping[str, str], query: Mapping[str, str]) -> Optional[str]:
+    """Mode de profilage demandé par la requête (None : pas de profil, cas normal)."""
+    if PROFILE_TOKEN is None or not ("x-profile" in headers or "profile" in query):
+        return None
+    if not authorized(headers, query):
+        return None
+    mode = headers.get("x-profile-mode") or query.get("profile_mode") or "tree"
+    return mode if mode in MODES else "tree"
+
+
+# ---------- Profils périodiques ----------
+class PeriodicProfiler:
+    """Toutes les `every_s` secondes, échantillonne `window_s` secondes et écrit un .folded."""
+
+    def __init__(self, every_s: float = PERIODIC_EVERY_S, window_s: float = PERIODIC_WINDOW_S,
+                 interval: float = PERIODIC_INTERVAL_S):
+        self.every_s = every_s
+        self.window_s = min(window_s, every_s)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.every_s - self.window_s):
+            sampler = Sampler(self.interval).start()
+            self._stop.wait(self.window_s)
+            stacks = sampler.stop()
+            if not stacks:
+                continue
+            try:
+                _write(f"{_new_id('periodic')}.folded", folded(stacks))
+                _prune()
+            except Exception as e:
+                log.warning("Profil périodique non écrit : %s", e)
+
+    def start(self) -> "PeriodicProfiler":
+        self._thread = threading.Thread(target=self._run, name="profiler-periodic", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def start_periodic() -> Optional[PeriodicProfiler]:
+    if PERIODIC_EVERY_S <= 0:
+        return None
+    log.info("Profils périodiques : %gs toutes les %gs -> %s", PERIODIC_WINDOW_S, PERIODIC_EVERY_S, PROFILE_DIR)
+    return PeriodicProfiler().start()
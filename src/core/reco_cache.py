@@ -0,0 +1,232 @@
+# src/core/reco_cache.py
+"""
+Cache précalculé des réponses de /recommend pour les graines les plus demandées.
+
+Stockage : un fichier SQLite (RECO_CACHE_PATH, défaut data/reco_cache.db) :
+  - reco_cache   (version, seeds) -> réponse JSON déjà hydratée (RECO_CACHE_K films) ;
+                 `version` = version de l'index (recommender.index_version()) : une entrée
+                 calculée sur un autre index n'est jamais servie
+  - seed_log     compteur par combinaison de graines demandée (1 à MAX_SEEDS films) :
+                 sert à choisir les paires / triplets à précalculer
+
+Le journal est agrégé en mémoire (un Counter) et écrit par un thread dédié, toutes les
+LOG_FLUSH_S secondes ou dès LOG_FLUSH requêtes : pas d'écriture SQLite sur le chemin de la requête.
+
+RankedLists : listes classées (ids seuls) des requêtes récentes, en mémoire (TTL + LRU), pour
+servir les pages suivantes de /recommend par simple découpage.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.core import metrics
+
+MAX_SEEDS = 3      # combinaisons journalisées / précalculées : films seuls, paires, triplets
+LOG_FLUSH = 256    # requêtes agrégées en mémoire avant de réveiller l'écriture du journal
+LOG_FLUSH_S = float(os.getenv("RECO_LOG_FLUSH_S", "30"))  # écriture périodique du journal
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reco_cache (
+    version  TEXT NOT NULL,
+    seeds    TEXT NOT NULL,
+    payload  TEXT NOT NULL,
+    built_at REAL NOT NULL,
+    PRIMARY KEY (version, seeds)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seed_log (
+    seeds   TEXT PRIMARY KEY,
+    size    INTEGER NOT NULL,
+    n       INTEGER NOT NULL,
+    last_ts REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_seed_log_size_n ON seed_log (size, n);
+"""
+
+HITS = metrics.Counter("reco_cache_hits_total", "Réponses /recommend servies par le cache précalculé")
+MISSES = metrics.Counter("reco_cache_misses_total", "Requêtes /recommend éligibles absentes du cache précalculé")
+ENTRIES = metrics.Gauge("reco_cache_entries", "Entrées du cache précalculé pour l'index courant")
+
+
+def seed_key(seeds: Iterable[int]) -> str:
+    """Clé canonique d'un ensemble de graines : ids triés, séparés par des virgules."""
+    return ",".join(str(s) for s in sorted({int(s) for s in seeds}))
+
+
+def parse_key(key: str) -> List[int]:
+    return [int(s) for s in key.split(",") if s]
+
+
+class RecoCache:
+    """Accès au fichier de cache ; thread-safe."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()        # connexion SQLite
+        self._log_lock = threading.Lock()    # journal en mémoire (jamais tenu pendant une écriture)
+        self._pending: Counter = Counter()
+        self._pending_n = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush_log()
+        self._conn.close()
+
+    # ---------- Réponses ----------
+    def get(self, version: str, seeds: Iterable[int]) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM reco_cache WHERE version = ? AND seeds = ?",
+                                     (version, seed_key(seeds))).fetchone()
+        if row is None:
+            MISSES.inc()
+            return None
+        HITS.inc()
+        return json.loads(row[0])
+
+    def put(self, version: str, seeds: Iterable[int], payload: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO reco_cache (version, seeds, payload, built_at) VALUES (?, ?, ?, ?)",
+                               (version, seed_key(seeds), json.dumps(payload, ensure_ascii=False), time.time()))
+
+    def keys(self, version: str) -> set:
+        """Clés déjà calculées pour `version`."""
+        with self._lock:
+            rows = self._conn.execute("SELECT seeds FROM reco_cache WHERE version = ?", (version,)).fetchall()
+        return {r[0] for r in rows}
+
+    def prune(self, version: str) -> int:
+        """Supprime les entrées des autres versions d'index ; retourne le nombre d'entrées gardées."""
+        with self._lock:
+            self._conn.execute("DELETE FROM reco_cache WHERE version <> ?", (version,))
+            n = self._conn.execute("SELECT COUNT(*) FROM reco_cache WHERE version = ?", (version,)).fetchone()[0]
+        ENTRIES.set(n)
+        return int(n)
+
+    # ---------- Journal des graines ----------
+    def log_seeds(self, seeds: Iterable[int]) -> None:
+        """Chemin de la requête : incrément en mémoire ; l'écriture revient au thread `reco-cache-log`."""
+        key = seed_key(seeds)
+        if not key or key.count(",") >= MAX_SEEDS:
+            return
+        with self._log_lock:
+            self._pending[key] += 1
+            self._pending_n += 1
+            full = self._pending_n >= LOG_FLUSH
+            if self._flusher is None and not self._closed:
+                self._flusher = threading.Thread(target=self._flush_loop, name="reco-cache-log", daemon=True)
+                self._flusher.start()
+        if full:
+            self._wake.set()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(LOG_FLUSH_S)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.flush_log()
+            except sqlite3.Error:
+                pass  # journal best-effort : les compteurs de ce lot sont perdus, pas la requête
+
+    def flush_log(self) -> None:
+        with self._log_lock:
+            pending, self._pending, self._pending_n = self._pending, Counter(), 0
+        if not pending:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO seed_log (seeds, size, n, last_ts) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(seeds) DO UPDATE SET n = n + excluded.n, last_ts = excluded.last_ts",
+                [(k, k.count(",") + 1, n, now) for k, n in pending.items()],
+            )
+
+    def frequent(self, size: int, limit: int, min_count: int = 1) -> List[Tuple[List[int], int]]:
+        """Combinaisons de `size` graines les plus demandées : [(ids, nombre de requêtes)]."""
+        self.flush_log()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seeds, n FROM seed_log WHERE size = ? AND n >= ? ORDER BY n DESC, last_ts DESC LIMIT ?",
+                (int(size), int(min_count), int(limit)),
+            ).fetchall()
+        return [(parse_key(k), int(n)) for k, n in rows]
+
+
+@dataclass
+class RankedList:
+    """Ids classés d'une requête (hors graines) ; `tmdb_asked` : complément TMDb déjà demandé."""
+    ids: List[int]
+    tmdb_asked: int = 0
+    expires: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class RankedLists:
+    """Cache mémoire TTL + LRU des listes classées, clé = (version d'index, graines, paramètres)."""
+
+    def __init__(self, ttl_s: float, max_entries: int):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Hashable, RankedList]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[RankedList]:
+        now = time.monotonic()
+        with self._lock:
+            got = self._items.get(key)
+            if got is None:
+                return None
+            if got.expires < now:
+                del self._items[key]
+                return None
+            got.expires = now + self.ttl_s  # TTL glissant : un défilement actif garde sa liste
+            self._items.move_to_end(key)
+            return got
+
+    def put(self, key: Hashable, ranked: RankedList) -> RankedList:
+        ranked.expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            self._items[key] = ranked
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return ranked
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+_store: Optional[RecoCache] = None
+_store_lock = threading.Lock()
+
+
+def default_path() -> str:
+    return os.getenv("RECO_CACHE_PATH", "data/reco_cache.db")
+
+
+def get_store() -> RecoCache:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RecoCache(default_path())
+    return _store
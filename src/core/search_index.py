@@ -0,0 +1,275 @@
+# src/core/search_index.py
+"""
+Index de recherche par titre, en mémoire, sur le catalogue local (table `film`).
+
+- titres normalisés (minuscules, accents repliés, ponctuation -> espaces)
+- postings par token (recherche par préfixe via bisect sur le vocabulaire trié)
+- postings par trigramme (tolérance aux fautes de frappe)
+- classement tenant compte de la popularité
+
+Les documents sont numérotés par popularité décroissante : une posting list triée
+par numéro de document est donc déjà triée par popularité, ce qui permet de couper
+tôt sur les préfixes très courants.
+
+Construit en même temps que l'index du recommender (cf. src/ml/recommender.py).
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.film_store import format_date_key, memory_strings
+
+# Nombre max de documents gardés pour les préfixes courts (1-2 caractères)
+SHORT_PREFIX_MAX_LEN = 2
+SHORT_PREFIX_TOP = 256
+# Seuil de similarité trigrammes (part des trigrammes de la requête retrouvés)
+TRIGRAM_MIN_RATIO = 0.5
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+# ---------- Normalisation ----------
+def normalize_title(s: Optional[str]) -> str:
+    """'L'Été meurtrier !' -> 'l ete meurtrier'"""
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = s.lower().replace("œ", "oe").replace("æ", "ae").replace("ß", "ss")
+    return _NON_ALNUM.sub(" ", s).strip()
+
+
+def _trigrams(norm: str) -> set:
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ---------- Index ----------
+class TitleIndex:
+    __slots__ = ("ids", "titles", "posters", "years", "dates", "popularity",
+                 "norm", "norm_offsets", "vocab", "post_ptr", "post_docs", "short_prefix", "trigrams", "_pop_scale")
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        titles: Sequence[str],
+        popularity: Sequence[float],
+        posters: Optional[Sequence[Optional[str]]] = None,
+        years: Optional[Sequence[Optional[int]]] = None,
+        dates: Optional[Sequence[int]] = None,
+    ):
+        n = len(ids)
+        posters = posters if posters is not None else [None] * n
+        years = years if years is not None else [None] * n
+        pop = np.nan_to_num(np.asarray([p if p is not None else 0.0 for p in popularity], dtype=np.float64))
+
+        # doc 0 = le plus populaire ; champs d'affichage en tableaux (pas d'objet Python par titre)
+        order = np.argsort(-pop, kind="stable")
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.titles = memory_strings(titles[i] for i in order)
+        self.posters = memory_strings(posters[i] for i in order)
+        self.years = np.asarray([years[i] or 0 for i in order], dtype=np.int16)
+        # date de sortie complète AAAAMMJJ (0 = inconnue : l'année seule est servie)
+        self.dates = (np.asarray(dates, dtype=np.int32)[order] if dates is not None
+                      else np.zeros(n, dtype=np.int32))
+        self.popularity = pop[order]
+        norm = [normalize_title(titles[i]) for i in order]
+        # titres normalisés (ASCII) concaténés dans une seule chaîne : découpe rapide au scoring
+        self.norm = "".join(norm)
+        self.norm_offsets = array("q", [0])
+        for nt in norm:
+            self.norm_offsets.append(self.norm_offsets[-1] + len(nt))
+        self._pop_scale = math.log1p(float(self.popularity.max(initial=0.0))) or 1.0
+
+        token_post: Dict[str, array] = {}
+        tri_post: Dict[str, array] = {}
+        for doc, nt in enumerate(norm):
+            for tok in set(nt.split()):
+                token_post.setdefault(tok, array("i")).append(doc)
+            for tg in _trigrams(nt):
+                tri_post.setdefault(tg, array("i")).append(doc)
+
+        # vocabulaire trié (bisect directement sur la table) + postings concaténées (CSR)
+        vocab = sorted(token_post)
+        self.vocab = memory_strings(vocab)
+        self.post_ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum([len(token_post[t]) for t in vocab], out=self.post_ptr[1:])
+        self.post_docs = np.empty(int(self.post_ptr[-1]), dtype=np.int32)
+        for i, t in enumerate(vocab):
+            self.post_docs[self.post_ptr[i]:self.post_ptr[i + 1]] = token_post[t]
+        self.trigrams: Dict[str, array] = tri_post
+
+        # préfixes courts : on matérialise directement les meilleurs documents
+        short: Dict[str, array] = {}
+        for tok in vocab:
+            post = token_post[tok]
+            for L in range(1, min(SHORT_PREFIX_MAX_LEN, len(tok)) + 1):
+                short.setdefault(tok[:L], []).append(post)  # type: ignore[arg-type]
+        self.short_prefix: Dict[str, array] = {
+            p: array("i", _merge_topn(lists, SHORT_PREFIX_TOP)) for p, lists in short.items()
+        }
+
+    def __len__(self) -> int:
+        return int(self.ids.size)
+
+    # --- postings ---
+    def _posting(self, i: int, cap: Optional[int] = None) -> List[int]:
+        a, b = int(self.post_ptr[i]), int(self.post_ptr[i + 1])
+        return self.post_docs[a:b if cap is None else min(b, a + cap)].tolist()
+
+    def _prefix_docs(self, prefix: str, cap: Optional[int]) -> set:
+        """Documents dont un token commence par `prefix` ; les `cap` plus populaires, tous si cap=None."""
+        # la table des préfixes courts ne garde que SHORT_PREFIX_TOP documents : elle ne sert
+        # que si la coupe demandée tient dedans (pas pour un token de tête, qui exige tout)
+        if (cap is not None and cap <= SHORT_PREFIX_TOP
+                and len(prefix) <= SHORT_PREFIX_MAX_LEN and prefix in self.short_prefix):
+            return set(self.short_prefix[prefix])
+        lo = bisect_left(self.vocab, prefix)
+        hi = bisect_left(self.vocab, prefix + "\uffff", lo)
+        if hi - lo == 1:
+            return set(self._posting(lo, cap))
+        return set(_merge_topn((self._posting(i) for i in range(lo, hi)), cap))
+
+    def _exact_docs(self, tok: str) -> set:
+        i = bisect_left(self.vocab, tok)
+        if i < len(self.vocab) and self.vocab[i] == tok:
+            return set(self._posting(i))
+        return set()
+
+    # --- scoring ---
+    def _norm(self, doc: int) -> str:
+        return self.norm[self.norm_offsets[doc]:self.norm_offsets[doc + 1]]
+
+    def _score(self, doc: int, nq: str, match: float) -> float:
+        nt = self._norm(doc)
+        if nt == nq:
+            match += 2.0
+        elif nt.startswith(nq):
+            match += 1.0
+        pop = math.log1p(self.popularity[doc]) / self._pop_scale
+        return match + 0.5 * pop
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """Renvoie [(doc, score)] triés par score décroissant."""
+        nq = normalize_title(query)
+        if not nq:
+            return []
+        toks = nq.split()
+        cap = max(SHORT_PREFIX_TOP, limit * 8)
+
+        scored: Dict[int, float] = {}
+        for d in self._token_matches(toks, cap):
+            scored[d] = self._score(d, nq, 1.0)
+
+        if len(scored) < limit:
+            for d, ratio in self._trigram_candidates(nq, cap):
+                if d not in scored:
+                    scored[d] = self._score(d, nq, ratio * 0.9)
+
+        return heapq.nsmallest(limit, scored.items(), key=lambda x: (-x[1], x[0]))
+
+    def _token_matches(self, toks: List[str], cap: int) -> set:
+        """Documents contenant tous les tokens ; le dernier est traité comme un préfixe."""
+        *head, last = toks
+        if not head:
+            # une seule saisie : les postings sont déjà triées par popularité -> on coupe
+            return self._prefix_docs(last, cap)
+
+        sets = []
+        for tok in head:
+            docs = self._exact_docs(tok) or self._prefix_docs(tok, None)
+            if not docs:
+                return set()
+            sets.append(docs)
+        sets.sort(key=len)
+        docs = set.intersection(*sets)
+        # le dernier préfixe est vérifié directement sur les tokens du titre
+        return {d for d in docs if any(t.startswith(last) for t in self._norm(d).split())}
+
+    def _trigram_candidates(self, nq: str, cap: int) -> List[Tuple[int, float]]:
+        qtri = _trigrams(nq)
+        if not qtri:
+            return []
+        need = math.ceil(TRIGRAM_MIN_RATIO * len(qtri))
+        posts = sorted((self.trigrams.get(tg, ()) for tg in qtri), key=len)
+        # un candidat doit partager au moins `need` trigrammes, donc au moins un
+        # des (len - need + 1) plus rares : inutile de parcourir les plus fréquents
+        cands: set = set()
+        for post in posts[: len(qtri) - need + 1]:
+            cands.update(post)
+            if len(cands) > cap * 64:
+                break
+        out = []
+        for d in cands:
+            c = len(qtri & _trigrams(self._norm(d)))
+            if c >= need:
+                out.append((d, c / len(qtri)))
+        return out
+
+    def to_movie(self, doc: int) -> Dict[str, Any]:
+        """Format compatible avec normalize_movie() de l'API."""
+        y = int(self.years[doc])
+        return {
+            "id": int(self.ids[doc]),
+            "title": self.titles[doc] or "",
+            "poster_path": self.posters[doc],
+            "release_date": format_date_key(self.dates[doc]) or (str(y) if y else None),
+            "overview": None,
+            "genres": None,
+            "local_score": None,
+        }
+
+
+def _merge_topn(lists: Iterable[Sequence[int]], n: Optional[int]) -> List[int]:
+    """Union de posting lists triées, limitée aux n premiers documents (= plus populaires)."""
+    out: List[int] = []
+    last = -1
+    for d in heapq.merge(*lists):
+        if d != last:
+            out.append(d)
+            last = d
+            if n is not None and len(out) >= n:
+                break
+    return out
+
+
+# ---------- Singleton ----------
+_INDEX: Optional[TitleIndex] = None
+_LOCK = threading.Lock()
+
+
+def build(
+    ids: Sequence[int],
+    titles: Sequence[str],
+    popularity: Sequence[float],
+    posters: Optional[Sequence[Optional[str]]] = None,
+    years: Optional[Sequence[Optional[int]]] = None,
+    dates: Optional[Sequence[int]] = None,
+) -> int:
+    """(Re)construit l'index global. Retourne le nombre de titres indexés."""
+    global _INDEX
+    idx = TitleIndex(ids, titles, popularity, posters=posters, years=years, dates=dates)
+    with _LOCK:
+        _INDEX = idx
+    return len(idx)
+
+
+def is_ready() -> bool:
+    return _INDEX is not None
+
+
+def search(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Résultats locaux au format API. [] si l'index n'est pas encore construit."""
+    idx = _INDEX
+    if idx is None:
+        return []
+    return [idx.to_movie(doc) for doc, _ in idx.search(query, limit=limit)]
@@ -1,26 +1,84 @@
 import os
+import threading
 import time
 from functools import lru_cache
 
 import requests
 from dotenv import load_dotenv
 
+from src.core import metrics
+
 load_dotenv()
 
-BASE = "https://api.themoviedb.org/3"
+BASE = os.getenv("TMDB_BASE", "https://api.themoviedb.org/3")
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")
 LANG = os.getenv("TMDB_LANG", "fr-FR")
 
 class TMDBError(RuntimeError):
-    pass
+    """Échec d'un appel TMDb ; `status` = dernier code HTTP reçu (None si aucune réponse)."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+class RateLimiter:
+    """Token bucket partagé entre threads : `rate` requêtes/s, rafales jusqu'à `burst`."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Prend un jeton si possible ; sinon renvoie l'attente nécessaire (s)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        """Version non bloquante : False si le seau est vide."""
+        return self.rate <= 0 or self._take() == 0.0
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._take()
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+# TMDb tolère ~50 req/s par IP ; on reste en dessous par défaut
+limiter = RateLimiter(float(os.getenv("TMDB_RATE_LIMIT", "40")))
+
+def _endpoint(path: str) -> str:
+    """/movie/550/similar -> /movie/{id}/similar (labels de métriques à cardinalité bornée)."""
+    return "/".join("{id}" if p.isdigit() else p for p in path.split("/"))
 
 def _req(method: str, path: str, params: dict | None = None, tries: int = 3):
     if not TMDB_API_KEY:
         raise TMDBError("TMDB_API_KEY manquant dans l'environnement")
     params = {"api_key": TMDB_API_KEY, "language": LANG, **(params or {})}
     last = None
+    endpoint = _endpoint(path)
     for i in range(tries):
-        r = requests.request(method, f"{BASE}{path}", params=params, timeout=20)
+        limiter.acquire()
+        t0 = time.perf_counter()
+        try:
+            r = requests.request(method, f"{BASE}{path}", params=params, timeout=20)
+        except requests.RequestException:
+            metrics.TMDB_REQUESTS.inc(endpoint=endpoint, status="error")
+            raise
+        finally:
+            metrics.TMDB_LATENCY.observe(time.perf_counter() - t0, endpoint=endpoint)
+        metrics.TMDB_REQUESTS.inc(endpoint=endpoint, status=r.status_code)
         if r.status_code == 429:  # rate limit
             time.sleep(1.5 * (i + 1))
             last = r
@@ -29,7 +87,8 @@ def _req(method: str, path: str, params: dict | None = None, tries: int = 3):
             return r.json()
         last = r
         time.sleep(0.2)
-    raise TMDBError(f"TMDB {_req.__name__} échec {last.status_code if last else '??'}: {last.text if last else ''}")
+    raise TMDBError(f"TMDB {_req.__name__} échec {last.status_code if last else '??'}: {last.text if last else ''}",
+                    status=last.status_code if last else None)
 
 def tmdb_get(path: str, **params):
     return _req("GET", path, params)
@@ -38,6 +97,13 @@ def tmdb_get(path: str, **params):
 def movie_details(tmdb_id: int):
     return tmdb_get(f"/movie/{tmdb_id}", append_to_response="credits")
 
+_details_hits = metrics.Counter("tmdb_movie_details_cache_hits_total", "Hits du cache mémoire de movie_details")
+_details_hits.set_function(lambda: movie_details.cache_info().hits)
+_details_misses = metrics.Counter("tmdb_movie_details_cache_misses_total", "Misses du cache mémoire de movie_details")
+_details_misses.set_function(lambda: movie_details.cache_info().misses)
+_details_size = metrics.Gauge("tmdb_movie_details_cache_entries", "Entrées du cache mémoire de movie_details")
+_details_size.set_function(lambda: movie_details.cache_info().currsize)
+
 def search_movie(query: str, page: int = 1):
     return tmdb_get("/search/movie", query=query, page=page)
 
@@ -51,8 +117,14 @@ def similar_movies(tmdb_id: int, page: int = 1):
     return tmdb_get(f"/movie/{tmdb_id}/similar", page=page)
 
 def popular_movies(page: int = 1):
-    url = f"{BASE}/movie/popular"
-    params = {"api_key": TMDB_API_KEY, "page": page, "language": LANG}
-    r = requests.get(url, params=params, timeout=10)
-    r.raise_for_status()
-    return r.json()
\ No newline at end of file
+    # même chemin que les autres appels : BASE (TMDB_BASE), rate limiter et reprises
+    return popular(page)
+
+def movie_changes(start_date: str | None = None, end_date: str | None = None, page: int = 1):
+    """Films modifiés sur TMDb (fenêtre de 14 jours max, dates YYYY-MM-DD)."""
+    params = {"page": page}
+    if start_date:
+        params["start_date"] = start_date
+    if end_date:
+        params["end_date"] = end_date
+    return tmdb_get("/movie/changes", **params)
@@ -0,0 +1,227 @@
+# src/core/user_profiles.py
+"""
+Profils de goût persistants (un vecteur par utilisateur dans l'espace des features du recommender).
+
+Stockage : un fichier SQLite (USER_PROFILES_PATH, défaut data/user_profiles.db), une ligne par
+utilisateur, tableaux numpy en BLOB :
+  - keys     int64 triés : (bloc << 32) | id de feature (bloc = index dans recommender.BLOCKS) ;
+             indépendant des colonnes de X, donc valable d'un rebuild d'index à l'autre
+  - weights  float32, poids de chaque feature (négatifs possibles : films non aimés)
+  - liked / disliked / seen : ids TMDb (int32 triés, cf. src/core/packed_ids.py)
+Chaque événement est aussi journalisé (table user_event) : rejouable si la formule change.
+
+Mise à jour incrémentale : poids * décroissance(temps écoulé) + contribution du film
+(demi-vie USER_PROFILE_HALF_LIFE_DAYS, 0 = pas de décroissance).
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.core.packed_ids import pack_ids, unpack_ids
+
+EVENT_KINDS = ("like", "dislike", "seen")
+HALF_LIFE_DAYS = float(os.getenv("USER_PROFILE_HALF_LIFE_DAYS", "0"))
+MIN_WEIGHT = 1e-4  # en dessous, la feature sort du profil (profils bornés malgré la décroissance)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_profile (
+    user_id    TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    n_events   INTEGER NOT NULL DEFAULT 0,
+    keys       BLOB,
+    weights    BLOB,
+    liked      BLOB,
+    disliked   BLOB,
+    seen       BLOB
+);
+CREATE TABLE IF NOT EXISTS user_event (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    tmdb_id INTEGER NOT NULL,
+    kind    TEXT NOT NULL,
+    ts      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_user_event_user_ts ON user_event (user_id, ts);
+"""
+
+
+def feature_keys(block: int, fids: np.ndarray) -> np.ndarray:
+    """Clés int64 (bloc, id de feature) ; les ids négatifs (synthétiques) restent distincts."""
+    return (np.int64(block) << 32) | (np.asarray(fids, dtype=np.int64) & 0xFFFFFFFF)
+
+
+def split_keys(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Inverse de feature_keys : (blocs, ids de feature int32)."""
+    keys = np.asarray(keys, dtype=np.int64)
+    return (keys >> 32).astype(np.int64), (keys & 0xFFFFFFFF).astype(np.uint32).view(np.int32)
+
+
+def decay_factor(elapsed_s: float, half_life_days: float = HALF_LIFE_DAYS) -> float:
+    if half_life_days <= 0 or elapsed_s <= 0:
+        return 1.0
+    return 0.5 ** (elapsed_s / (half_life_days * 86400.0))
+
+
+@dataclass
+class UserProfile:
+    user_id: str
+    updated_at: float = 0.0
+    n_events: int = 0
+    keys: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    weights: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float32))
+    liked: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    disliked: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    seen: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+
+    def add(self, keys: np.ndarray, weights: np.ndarray, now: float) -> None:
+        """Applique la décroissance depuis `updated_at` puis ajoute `weights` sur `keys` (triées, uniques)."""
+        w = self.weights.astype(np.float64) * decay_factor(now - self.updated_at)
+        union = np.union1d(self.keys, keys)
+        merged = np.zeros(union.size, dtype=np.float64)
+        merged[np.searchsorted(union, self.keys)] += w
+        merged[np.searchsorted(union, keys)] += weights
+        keep = np.abs(merged) >= MIN_WEIGHT
+        self.keys = union[keep]
+        self.weights = merged[keep].astype(np.float32)
+
+    def is_seen(self, tmdb_id: int) -> bool:
+        i = np.searchsorted(self.seen, tmdb_id)
+        return bool(i < self.seen.size and self.seen[i] == tmdb_id)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "user_id": self.user_id,
+            "updated_at": self.updated_at,
+            "events": self.n_events,
+            "liked": int(self.liked.size),
+            "disliked": int(self.disliked.size),
+            "seen": int(self.seen.size),
+            "features": int(self.keys.size),
+        }
+
+
+def _add_id(ids: np.ndarray, tmdb_id: int) -> np.ndarray:
+    return np.union1d(ids, np.array([tmdb_id], dtype=np.int32)).astype(np.int32)
+
+
+def _drop_id(ids: np.ndarray, tmdb_id: int) -> np.ndarray:
+    return ids[ids != tmdb_id]
+
+
+class ProfileStore:
+    """Accès au fichier de profils ; thread-safe, une transaction par événement."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _load(self, user_id: str) -> Optional[UserProfile]:
+        row = self._conn.execute(
+            "SELECT updated_at, n_events, keys, weights, liked, disliked, seen FROM user_profile WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return UserProfile(
+            user_id=user_id,
+            updated_at=row[0],
+            n_events=row[1],
+            keys=np.frombuffer(row[2] or b"", dtype="<i8").astype(np.int64),
+            weights=np.frombuffer(row[3] or b"", dtype="<f4").astype(np.float32),
+            liked=unpack_ids(row[4]),
+            disliked=unpack_ids(row[5]),
+            seen=unpack_ids(row[6]),
+        )
+
+    def get(self, user_id: str) -> Optional[UserProfile]:
+        with self._lock:
+            return self._load(user_id)
+
+    def record(self, user_id: str, tmdb_id: int, kind: str,
+               contribution: Callable[[UserProfile, str], Optional[tuple]], now: Optional[float] = None) -> UserProfile:
+        """
+        Journalise l'événement et met à jour le profil dans la même transaction.
+        `contribution(profil, kind)` -> (keys, weights) à ajouter, ou None (pas de changement de vecteur).
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"kind inconnu : {kind!r} (attendu : {', '.join(EVENT_KINDS)})")
+        now = time.time() if now is None else now
+        tmdb_id = int(tmdb_id)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # sérialise aussi les autres process (workers uvicorn)
+            try:
+                self._conn.execute("INSERT INTO user_event (user_id, tmdb_id, kind, ts) VALUES (?, ?, ?, ?)",
+                                   (user_id, tmdb_id, kind, now))
+                prof = self._load(user_id) or UserProfile(user_id)
+                delta = contribution(prof, kind)
+                if delta is not None:
+                    prof.add(delta[0], delta[1], now)
+                if kind == "like":
+                    prof.liked, prof.disliked = _add_id(prof.liked, tmdb_id), _drop_id(prof.disliked, tmdb_id)
+                elif kind == "dislike":
+                    prof.disliked, prof.liked = _add_id(prof.disliked, tmdb_id), _drop_id(prof.liked, tmdb_id)
+                prof.seen = _add_id(prof.seen, tmdb_id)
+                prof.n_events += 1
+                if delta is not None or not prof.updated_at:
+                    prof.updated_at = now  # référence de la décroissance : dernier changement du vecteur
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO user_profile "
+                    "(user_id, updated_at, n_events, keys, weights, liked, disliked, seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, prof.updated_at, prof.n_events,
+                     prof.keys.astype("<i8").tobytes(), prof.weights.astype("<f4").tobytes(),
+                     pack_ids(prof.liked), pack_ids(prof.disliked), pack_ids(prof.seen)),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return prof
+
+    def recent(self, user_id: str, kind: str = "like", limit: int = 50) -> List[int]:
+        """Ids des derniers événements `kind` de l'utilisateur, du plus récent au plus ancien."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tmdb_id FROM user_event WHERE user_id = ? AND kind = ? ORDER BY ts DESC LIMIT ?",
+                (user_id, kind, int(limit)),
+            ).fetchall()
+        return [int(r[0]) for r in rows]
+
+    def delete(self, user_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM user_profile WHERE user_id = ?", (user_id,))
+            self._conn.execute("DELETE FROM user_event WHERE user_id = ?", (user_id,))
+        return cur.rowcount > 0
+
+
+_store: Optional[ProfileStore] = None
+_store_lock = threading.Lock()
+
+
+def default_path() -> str:
+    return os.getenv("USER_PROFILES_PATH", "data/user_profiles.db")
+
+
+def get_store() -> ProfileStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProfileStore(default_path())
+    return _store
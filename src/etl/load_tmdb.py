@@ -1,89 +1,204 @@
-import requests
-import mysql.connector
+"""
+Chargeur TMDb "legacy" (schéma director / actor / genre / film / film_actor / film_genre
+avec ids internes), en version par lots.
+
+- UNE requête par film (/movie/{id}?append_to_response=credits)
+- pages de films populaires et détails téléchargés par N workers, sous rate limiter
+- maps en mémoire tmdb_id -> id interne pour réalisateurs, acteurs, genres et films
+- écritures `executemany` + INSERT IGNORE, un commit par lot
+
+Usage (depuis la racine) :
+    python -m src.etl.load_tmdb --pages 50 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import mysql.connector
+import requests
+from dotenv import load_dotenv
+
+from src.core.tmdb_client import RateLimiter
+
+load_dotenv()
 
 # ----- CONFIGURATION -----
-API_KEY = "94156e9cc0b3e52fedd6d061f16e97c9"  # Remplace par ta clé TMDb
+API_KEY = os.getenv("TMDB_API_KEY")
+TMDB_BASE = os.getenv("TMDB_BASE", "https://api.themoviedb.org/3")
+LANG = os.getenv("TMDB_LANG", "fr-FR")
 DB_CONFIG = {
-    "host": "localhost",
-    "user": "root",
-    "password": "Ademolili0806!",
-    "database": "movies"
+    "host": os.getenv("DB_HOST", "localhost"),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASSWORD", ""),
+    "database": os.getenv("DB_NAME", "movies"),
 }
+TOP_ACTORS = 5
+BATCH_SIZE = 200
 # -------------------------
 
-# Connexion MySQL
-conn = mysql.connector.connect(**DB_CONFIG)
-cursor = conn.cursor()
-
-def insert_unique(table, tmdb_id, name):
-    """Insérer si n'existe pas déjà, retourne l'ID interne"""
-    cursor.execute(f"SELECT id FROM {table} WHERE tmdb_id=%s", (tmdb_id,))
-    res = cursor.fetchone()
-    if res:
-        return res[0]
-    cursor.execute(f"INSERT INTO {table} (tmdb_id, name) VALUES (%s, %s)", (tmdb_id, name))
-    conn.commit()
-    return cursor.lastrowid
-
-def insert_film(film_data, director_id):
-    """Insérer un film si pas déjà présent"""
-    cursor.execute("SELECT id FROM film WHERE tmdb_id=%s", (film_data['id'],))
-    res = cursor.fetchone()
-    if res:
-        return res[0]
-    year = int(film_data.get('release_date', '0000-00-00')[:4] or 0)
-    decade = f"{year//10*10}s" if year else None
-    cursor.execute(
-        "INSERT INTO film (tmdb_id, title, year, decade, director_id) VALUES (%s,%s,%s,%s,%s)",
-        (film_data['id'], film_data['title'], year, decade, director_id)
+_limiter = RateLimiter(float(os.getenv("TMDB_RATE_LIMIT", "40")))
+_local = threading.local()
+
+
+# ---------- HTTP ----------
+def _session() -> requests.Session:
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+    return s
+
+
+def _get(path: str, **params) -> Optional[dict]:
+    params = {"api_key": API_KEY, "language": LANG, **params}
+    for attempt in range(3):
+        _limiter.acquire()
+        r = _session().get(f"{TMDB_BASE}{path}", params=params, timeout=20)
+        if r.status_code == 429:
+            time.sleep(1.5 * (attempt + 1))
+            continue
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return r.json()
+    return None
+
+
+def popular_ids(page: int) -> List[int]:
+    data = _get("/movie/popular", page=page) or {}
+    return [m["id"] for m in data.get("results", []) if m.get("id")]
+
+
+def film_with_credits(tmdb_id: int) -> Optional[dict]:
+    return _get(f"/movie/{tmdb_id}", append_to_response="credits")
+
+
+# ---------- Maps tmdb_id -> id interne ----------
+class IdMap:
+    """Cache tmdb_id -> id interne d'une table (director, actor, genre)."""
+
+    def __init__(self, cursor, table: str):
+        self.table = table
+        cursor.execute(f"SELECT tmdb_id, id FROM {table}")
+        self.ids: Dict[int, int] = {int(t): int(i) for t, i in cursor.fetchall()}
+
+    def ensure(self, cursor, items: Iterable[Tuple[int, str]]) -> None:
+        """Insère en un `executemany` les entrées inconnues, puis relit leurs ids."""
+        missing = {int(t): n for t, n in items if t is not None and int(t) not in self.ids}
+        if not missing:
+            return
+        cursor.executemany(
+            f"INSERT IGNORE INTO {self.table} (tmdb_id, name) VALUES (%s, %s)",
+            list(missing.items()),
+        )
+        self.ids.update(_select_ids(cursor, self.table, list(missing)))
+
+
+def _select_ids(cursor, table: str, tmdb_ids: List[int]) -> Dict[int, int]:
+    out: Dict[int, int] = {}
+    for i in range(0, len(tmdb_ids), 1000):
+        chunk = tmdb_ids[i:i + 1000]
+        marks = ",".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT tmdb_id, id FROM {table} WHERE tmdb_id IN ({marks})", chunk)
+        out.update({int(t): int(v) for t, v in cursor.fetchall()})
+    return out
+
+
+# ---------- Écriture d'un lot ----------
+def _director(d: dict) -> Optional[dict]:
+    for crew in (d.get("credits") or {}).get("crew", []):
+        if crew.get("job") == "Director":
+            return crew
+    return None
+
+
+def write_batch(conn, cursor, maps: Dict[str, IdMap], films: Dict[int, int], batch: List[dict]) -> int:
+    batch = [d for d in batch if d and d.get("id") and int(d["id"]) not in films]
+    if not batch:
+        return 0
+
+    maps["director"].ensure(cursor, ((c["id"], c["name"]) for c in map(_director, batch) if c))
+    maps["actor"].ensure(cursor, (
+        (a["id"], a["name"]) for d in batch for a in (d.get("credits") or {}).get("cast", [])[:TOP_ACTORS]
+    ))
+    maps["genre"].ensure(cursor, ((g["id"], g["name"]) for d in batch for g in d.get("genres", [])))
+
+    rows = []
+    for d in batch:
+        year = int((d.get("release_date") or "0000")[:4] or 0)
+        decade = f"{year//10*10}s" if year else None
+        dr = _director(d)
+        rows.append((d["id"], d.get("title") or "", year, decade,
+                     maps["director"].ids.get(int(dr["id"])) if dr else None))
+    cursor.executemany(
+        "INSERT IGNORE INTO film (tmdb_id, title, year, decade, director_id) VALUES (%s,%s,%s,%s,%s)",
+        rows,
     )
-    conn.commit()
-    return cursor.lastrowid
+    films.update(_select_ids(cursor, "film", [d["id"] for d in batch]))
 
-def insert_film_actor(film_id, actor_id, order):
-    cursor.execute("INSERT IGNORE INTO film_actor (film_id, actor_id, cast_order) VALUES (%s,%s,%s)",
-                   (film_id, actor_id, order))
+    film_actor, film_genre = [], []
+    for d in batch:
+        fid = films.get(int(d["id"]))
+        if fid is None:
+            continue
+        for order, a in enumerate((d.get("credits") or {}).get("cast", [])[:TOP_ACTORS]):
+            aid = maps["actor"].ids.get(int(a["id"]))
+            if aid is not None:
+                film_actor.append((fid, aid, order))
+        for g in d.get("genres", []):
+            gid = maps["genre"].ids.get(int(g["id"]))
+            if gid is not None:
+                film_genre.append((fid, gid))
+    if film_actor:
+        cursor.executemany(
+            "INSERT IGNORE INTO film_actor (film_id, actor_id, cast_order) VALUES (%s,%s,%s)", film_actor
+        )
+    if film_genre:
+        cursor.executemany("INSERT IGNORE INTO film_genre (film_id, genre_id) VALUES (%s,%s)", film_genre)
     conn.commit()
+    return len(batch)
+
+
+# ---------- Pipeline ----------
+def load(pages: int = 2, workers: int = 8, batch_size: int = BATCH_SIZE) -> Dict[str, float]:
+    if not API_KEY:
+        raise RuntimeError("TMDB_API_KEY manquant dans l'environnement")
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    t0 = time.perf_counter()
+    written = 0
+    try:
+        maps = {t: IdMap(cursor, t) for t in ("director", "actor", "genre")}
+        films = IdMap(cursor, "film").ids  # films déjà chargés -> aucun appel réseau
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            ids: List[int] = []
+            for page_ids in pool.map(popular_ids, range(1, pages + 1)):
+                ids.extend(i for i in page_ids if i not in films)
+            ids = list(dict.fromkeys(ids))
+
+            for i in range(0, len(ids), batch_size):
+                details = list(pool.map(film_with_credits, ids[i:i + batch_size]))
+                written += write_batch(conn, cursor, maps, films, details)
+                rate = written / max(1e-9, time.perf_counter() - t0)
+                print(f"{written} films chargés ({rate:.1f} films/s)")
+    finally:
+        cursor.close()
+        conn.close()
+    elapsed = time.perf_counter() - t0
+    return {"written": written, "seconds": round(elapsed, 2),
+            "films_per_minute": round(written / elapsed * 60, 1) if elapsed > 0 else 0.0}
 
-def insert_film_genre(film_id, genre_id):
-    cursor.execute("INSERT IGNORE INTO film_genre (film_id, genre_id) VALUES (%s,%s)", (film_id, genre_id))
-    conn.commit()
 
-# ----- Récupération des films populaires -----
-URL_POPULAR = f"https://api.themoviedb.org/3/movie/popular?api_key={API_KEY}&language=fr-FR&page="
-
-for page in range(1, 3):  # Exemple : 2 pages de films populaires
-    response = requests.get(URL_POPULAR + str(page))
-    data = response.json()
-    for film in data['results']:
-        # Récupérer les détails du film
-        film_id = film['id']
-        details = requests.get(f"https://api.themoviedb.org/3/movie/{film_id}?api_key={API_KEY}&language=fr-FR").json()
-        
-        # Récupérer le réalisateur
-        credits = requests.get(f"https://api.themoviedb.org/3/movie/{film_id}/credits?api_key={API_KEY}").json()
-        director_id = None
-        for crew in credits.get("crew", []):
-            if crew['job'] == "Director":
-                director_id = insert_unique("director", crew['id'], crew['name'])
-                break
-
-        # Insérer le film
-        film_db_id = insert_film(details, director_id)
-
-        # Insérer acteurs principaux (top 5)
-        for order, actor in enumerate(credits.get("cast", [])[:5]):
-            actor_id = insert_unique("actor", actor['id'], actor['name'])
-            insert_film_actor(film_db_id, actor_id, order)
-
-        # Insérer genres
-        for genre in details.get("genres", []):
-            genre_id = insert_unique("genre", genre['id'], genre['name'])
-            insert_film_genre(film_db_id, genre_id)
-
-        time.sleep(0.2)  # éviter d’être bloqué par TMDb
-
-cursor.close()
-conn.close()
-print("Import TMDb terminé !")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    res = load(pages=args.pages, workers=args.workers, batch_size=args.batch_size)
+    print("Import TMDb terminé !", res)
@@ -6,6 +6,7 @@ CREATE TABLE IF NOT EXISTS film (
   tmdb_id       INT                NOT NULL,
   title         VARCHAR(255)       NOT NULL,
   release_year  SMALLINT UNSIGNED  NULL,
+  release_date  DATE               NULL,
   poster_path   VARCHAR(255)       NULL,      -- ex: /abc123.jpg (path TMDb)
   last_tmdb_sync DATETIME          NULL,
   PRIMARY KEY (tmdb_id)
@@ -0,0 +1,233 @@
+# src/ingest/bulk_ingest.py
+"""
+Ingestion en masse depuis l'API TMDb.
+
+- détails récupérés en parallèle (threads), sous le rate limiter de tmdb_client
+- films écrits par lots, une transaction par lot (cf. src/ingest/writer.py)
+- checkpoint JSON : après un crash, on reprend au dernier lot écrit
+- échecs transitoires (429, 5xx, réseau) gardés dans le checkpoint et retentés en fin de
+  passage (RETRY_ROUNDS tours, attente doublée à chaque tour) ; s'il en reste, le checkpoint
+  est conservé et le prochain run les reprend
+- débit (films/s) loggé à chaque lot
+
+Usage (depuis la racine) :
+    python -m src.ingest.bulk_ingest --source popular --pages 50
+    python -m src.ingest.bulk_ingest --ids-file ids.txt --checkpoint data/ingest.ckpt.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from src.core.tmdb_client import TMDBError, popular, tmdb_get, trending_day
+
+log = logging.getLogger("ingest")
+
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+WORKERS = int(os.getenv("INGEST_WORKERS", "16"))
+RETRY_ROUNDS = int(os.getenv("INGEST_RETRY_ROUNDS", "3"))
+RETRY_BACKOFF_S = float(os.getenv("INGEST_RETRY_BACKOFF_S", "5"))
+
+
+# ---------- Sources d'ids ----------
+def ids_from_listing(source: str = "popular", pages: int = 5) -> List[int]:
+    fetch = popular if source == "popular" else trending_day
+    out: List[int] = []
+    seen = set()
+    for p in range(1, pages + 1):
+        try:
+            data = fetch(page=p) or {}
+        except TMDBError as e:
+            log.warning("Listing %s page %s failed: %s", source, p, e)
+            break
+        results = data.get("results") or []
+        if not results:
+            break
+        for m in results:
+            mid = m.get("id")
+            if isinstance(mid, int) and mid not in seen:
+                seen.add(mid)
+                out.append(mid)
+    return out
+
+
+def ids_from_file(path: str) -> List[int]:
+    """Un id par ligne, ou une liste JSON."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read().strip()
+    if raw.startswith("["):
+        return [int(x) for x in json.loads(raw)]
+    return [int(line) for line in raw.splitlines() if line.strip()]
+
+
+# ---------- Checkpoint ----------
+def _load_checkpoint(path: Optional[str]) -> Optional[dict]:
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        log.warning("Checkpoint illisible (%s) -> on repart de zéro", e)
+        return None
+
+
+def _save_checkpoint(path: Optional[str], state: dict) -> None:
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)  # atomique : jamais de checkpoint à moitié écrit
+
+
+# ---------- Pipeline ----------
+def _transient(e: Exception) -> bool:
+    """Vaut la peine de réessayer : rate limit, erreur serveur ou réseau (pas un 404)."""
+    if isinstance(e, TMDBError):
+        return e.status is None or e.status == 429 or e.status >= 500
+    return isinstance(e, requests.RequestException)
+
+
+def _fetch(tmdb_id: int) -> Tuple[Optional[dict], bool]:
+    """(détails + crédits, échec transitoire) en UN appel."""
+    try:
+        return tmdb_get(f"/movie/{int(tmdb_id)}", append_to_response="credits"), False
+    except Exception as e:
+        log.warning("Fetch %s failed: %s", tmdb_id, e)
+        return None, _transient(e)
+
+
+def fetch_details(tmdb_id: int) -> Optional[dict]:
+    """Détails + crédits en UN appel. None si le film n'existe pas / erreur."""
+    return _fetch(tmdb_id)[0]
+
+
+def _chunks(seq: List[int], n: int) -> Iterable[List[int]]:
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def _pipeline(pool: ThreadPoolExecutor, ids: List[int], batch_size: int, engine, on_batch) -> None:
+    """
+    Télécharge et écrit `ids` par lots ; le lot N+1 est déjà en cours de téléchargement
+    pendant l'écriture du lot N. `on_batch(n_ids, écrits, échecs définitifs, ids à retenter)`.
+    """
+    from src.ingest.writer import write_movies
+    batches = list(_chunks(ids, max(1, batch_size)))
+    pending: Optional[Tuple[List[int], List[Future]]] = None
+    for i in range(len(batches) + 1):
+        # précharge le lot suivant avant d'écrire le courant
+        nxt = (batches[i], [pool.submit(_fetch, mid) for mid in batches[i]]) if i < len(batches) else None
+        if pending is not None:
+            batch, futures = pending
+            results = [f.result() for f in futures]
+            ok = [m for m, _ in results if m]
+            retry = [mid for mid, (m, transient) in zip(batch, results) if m is None and transient]
+            on_batch(len(batch), write_movies(engine, ok), len(batch) - len(ok) - len(retry), retry)
+        pending = nxt
+
+
+def bulk_ingest(
+    ids: List[int],
+    engine=None,
+    checkpoint: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+    workers: int = WORKERS,
+    retry_rounds: int = RETRY_ROUNDS,
+) -> Dict[str, object]:
+    """
+    Ingère `ids` par lots, puis retente les échecs transitoires. Retourne des stats (films
+    écrits, échecs, films/s) et `retry_ids` : ids encore en échec transitoire à la fin.
+    """
+    if engine is None:
+        from src.core.db import engine
+
+    state = _load_checkpoint(checkpoint)
+    if state and state.get("ids"):
+        ids = [int(x) for x in state["ids"]]
+        pos = int(state.get("pos", 0))
+        retry = [int(x) for x in state.get("failed") or []]
+        log.info("Reprise depuis le checkpoint : %d/%d (%d à retenter)", pos, len(ids), len(retry))
+    else:
+        pos, retry = 0, []
+        _save_checkpoint(checkpoint, {"ids": ids, "pos": 0, "failed": []})
+
+    written = failed = 0
+    t0 = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def main_batch(n: int, n_written: int, n_failed: int, again: List[int]) -> None:
+            nonlocal pos, written, failed
+            pos += n
+            written += n_written
+            failed += n_failed
+            retry.extend(again)
+            _save_checkpoint(checkpoint, {"ids": ids, "pos": pos, "failed": retry})
+            rate = written / max(1e-9, time.perf_counter() - t0)
+            log.info("Ingest %d/%d (échecs=%d, à retenter=%d) - %.1f films/s", pos, len(ids), failed, len(retry), rate)
+
+        _pipeline(pool, ids[pos:], batch_size, engine, main_batch)
+
+        for r in range(max(0, retry_rounds)):
+            if not retry:
+                break
+            todo, retry = retry, []
+            wait = RETRY_BACKOFF_S * (2 ** r)
+            log.info("Nouvel essai %d/%d de %d films dans %.0f s", r + 1, retry_rounds, len(todo), wait)
+            time.sleep(wait)
+            done = 0
+
+            def retry_batch(n: int, n_written: int, n_failed: int, again: List[int]) -> None:
+                nonlocal done, written, failed
+                done += n
+                written += n_written
+                failed += n_failed
+                retry.extend(again)
+                # reste à faire de ce tour + nouveaux échecs : rien n'est perdu si on s'arrête ici
+                _save_checkpoint(checkpoint, {"ids": ids, "pos": pos, "failed": retry + todo[done:]})
+
+            _pipeline(pool, todo, batch_size, engine, retry_batch)
+
+    elapsed = time.perf_counter() - t0
+    if checkpoint and os.path.exists(checkpoint) and not retry:
+        os.remove(checkpoint)  # terminé : le prochain run repart d'une nouvelle liste
+    elif retry:
+        log.warning("%d films toujours en échec%s", len(retry), " (gardés dans le checkpoint)" if checkpoint else "")
+    return {
+        "written": written,
+        "failed": failed + len(retry),
+        "retry_ids": retry,
+        "seconds": round(elapsed, 3),
+        "films_per_second": round(written / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", choices=["popular", "trending"], default="popular")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--ids-file", default=None)
+    parser.add_argument("--checkpoint", default=os.getenv("INGEST_CHECKPOINT", "data/ingest.ckpt.json"))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    resume = _load_checkpoint(args.checkpoint)
+    if resume and resume.get("ids"):
+        id_list: List[int] = []  # la liste vient du checkpoint
+    elif args.ids_file:
+        id_list = ids_from_file(args.ids_file)
+    else:
+        id_list = ids_from_listing(args.source, args.pages)
+    print(bulk_ingest(id_list, checkpoint=args.checkpoint,
+                      batch_size=args.batch_size, workers=args.workers))
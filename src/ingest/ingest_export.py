@@ -0,0 +1,171 @@
+# src/ingest/ingest_export.py
+"""
+Import hors-ligne depuis les exports quotidiens TMDb (aucun appel réseau).
+
+Formats acceptés (JSON lines, gzip ou non) :
+  - export d'ids TMDb `movie_ids_MM_DD_YYYY.json.gz` :
+        {"adult":false,"id":3924,"original_title":"Blondie","popularity":2.9,"video":false}
+  - dump local de détails, une réponse `/movie/{id}?append_to_response=credits` par ligne
+
+Pipeline de générateurs (mémoire constante) :
+    lecture -> parsing -> filtrage -> lots -> dédoublonnage vs `film.tmdb_id` -> écriture groupée
+
+Usage (depuis la racine) :
+    python -m src.ingest.ingest_export data/movie_ids_09_15_2025.json.gz --min-popularity 1
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+import json
+import logging
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import text
+
+log = logging.getLogger("ingest")
+
+BATCH_SIZE = 1000
+
+
+# ---------- Étapes du pipeline ----------
+def read_lines(path: str) -> Iterator[str]:
+    """Lit un fichier jsonl, gzip détecté à l'octet magique (et non à l'extension)."""
+    with open(path, "rb") as raw:
+        gz = raw.read(2) == b"\x1f\x8b"
+    opener = gzip.open if gz else open
+    with opener(path, "rb") as f:
+        for line in io.TextIOWrapper(f, encoding="utf-8"):
+            line = line.strip()
+            if line:
+                yield line
+
+
+def parse(lines: Iterable[str]) -> Iterator[dict]:
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(rec, dict) and isinstance(rec.get("id"), int):
+            yield rec
+
+
+def to_movie(rec: dict) -> dict:
+    """
+    Ligne d'export d'ids -> dict au format détails TMDb (champs disponibles seulement). Sans
+    `title` ni `credits` / `genres`, write_movies n'écrase que la popularité d'un film existant
+    (le titre original ne sert qu'aux films nouveaux) et ne touche pas à ses tables liées.
+    """
+    if "title" in rec or "credits" in rec:
+        return rec  # déjà une réponse de détails
+    return {
+        "id": rec["id"],
+        "original_title": rec.get("original_title") or "",
+        "popularity": rec.get("popularity"),
+    }
+
+
+def keep(records: Iterable[dict], min_popularity: float = 0.0, include_adult: bool = False) -> Iterator[dict]:
+    for r in records:
+        if not include_adult and r.get("adult"):
+            continue
+        if r.get("video"):
+            continue
+        if float(r.get("popularity") or 0.0) < min_popularity:
+            continue
+        yield to_movie(r)
+
+
+def batched(items: Iterable[dict], n: int) -> Iterator[List[dict]]:
+    batch: Dict[int, dict] = {}
+    for it in items:
+        batch[int(it["id"])] = it  # un id en double dans le lot -> dernière version
+        if len(batch) >= n:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def existing_ids(conn, ids: List[int]) -> set:
+    if not ids:
+        return set()
+    params = {f"i{k}": int(v) for k, v in enumerate(ids)}
+    rows = conn.execute(
+        text(f"SELECT tmdb_id FROM film WHERE tmdb_id IN ({', '.join(':' + p for p in params)})"),
+        params,
+    ).fetchall()
+    return {int(r[0]) for r in rows}
+
+
+def drop_existing(batches: Iterable[List[dict]], engine, stats: Dict[str, int]) -> Iterator[List[dict]]:
+    for batch in batches:
+        with engine.connect() as conn:
+            known = existing_ids(conn, [m["id"] for m in batch])
+        stats["existing"] += len(known)
+        fresh = [m for m in batch if int(m["id"]) not in known]
+        if fresh:
+            yield fresh
+
+
+# ---------- Point d'entrée ----------
+def ingest_export(
+    path: str,
+    engine=None,
+    min_popularity: float = 0.0,
+    include_adult: bool = False,
+    update_existing: bool = False,
+    batch_size: int = BATCH_SIZE,
+    limit: Optional[int] = None,
+) -> Dict[str, float]:
+    """
+    Importe `path` dans la base. Les films déjà présents sont ignorés sauf si
+    `update_existing` (utile avec un dump de détails plus récent).
+    """
+    from src.ingest.writer import write_movies
+    if engine is None:
+        from src.core.db import engine
+
+    stats: Dict[str, int] = {"read": 0, "existing": 0, "written": 0}
+
+    def counted(recs: Iterable[dict]) -> Iterator[dict]:
+        for i, r in enumerate(recs):
+            if limit is not None and i >= limit:
+                return
+            stats["read"] += 1
+            yield r
+
+    pipeline: Iterable[List[dict]] = batched(
+        keep(counted(parse(read_lines(path))), min_popularity, include_adult), batch_size
+    )
+    if not update_existing:
+        pipeline = drop_existing(pipeline, engine, stats)
+
+    t0 = time.perf_counter()
+    for batch in pipeline:
+        stats["written"] += write_movies(engine, batch)
+        log.info("Export %s : %d lus, %d écrits, %d déjà en base",
+                 path, stats["read"], stats["written"], stats["existing"])
+    elapsed = time.perf_counter() - t0
+    return {
+        **stats,
+        "seconds": round(elapsed, 3),
+        "films_per_second": round(stats["written"] / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="export TMDb (.json.gz) ou dump de détails (.jsonl[.gz])")
+    parser.add_argument("--min-popularity", type=float, default=0.0)
+    parser.add_argument("--include-adult", action="store_true")
+    parser.add_argument("--update-existing", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+    print(ingest_export(args.path, min_popularity=args.min_popularity, include_adult=args.include_adult,
+                        update_existing=args.update_existing, batch_size=args.batch_size, limit=args.limit))
@@ -1,52 +1,110 @@
 from __future__ import annotations
 
+import datetime as dt
+
 from sqlalchemy import text
-from src.core.db import engine, exec_many
+from src.core.db import engine
+from src.core.packed_ids import pack_ids
 from src.core.tmdb_client import movie_details
 
-def upsert_movie(m: dict):
-    poster = m.get("poster_path")
+TOP_CAST = 10            # acteurs écrits dans `actors` (ordre d'affiche)
+FEATURE_TOP_ACTORS = 5   # acteurs retenus dans `film_features` (= TOP_ACTORS_PER_FILM du recommender)
+
+# ---------- Mapping réponse TMDb -> lignes SQL ----------
+def film_row(m: dict) -> dict:
     year = 0
     rd = m.get("release_date") or ""
     try:
         year = int(rd[:4]) if len(rd) >= 4 else 0
     except Exception:
         year = 0
+    return {
+        "tmdb_id": m["id"],
+        "title": m.get("title") or m.get("original_title") or "",
+        "release_year": year,
+        "release_date": rd[:10] if year and len(rd) >= 10 else None,
+        "poster_path": m.get("poster_path"),
+        "overview": m.get("overview"),
+        "popularity": m.get("popularity"),
+        "vote_average": m.get("vote_average"),
+        "vote_count": m.get("vote_count"),
+    }
+
+def director_rows(movie_id: int, credits: dict) -> list[dict]:
+    crew = (credits or {}).get("crew", [])
+    directors = [c for c in crew if (c.get("job") == "Director" or c.get("known_for_department") == "Directing")]
+    return [{"f": movie_id, "t": d.get("id"), "n": d.get("name", "")} for d in directors]
+
+def actor_rows(movie_id: int, credits: dict, top: int = TOP_CAST) -> list[dict]:
+    cast = sorted((credits or {}).get("cast", []) or [], key=lambda a: a.get("order", 999))[:top]
+    return [{"f": movie_id, "t": a.get("id"), "n": a.get("name", ""), "o": a.get("order", i)}
+            for i, a in enumerate(cast) if a.get("id")]
+
+def film_features_row(m: dict) -> dict:
+    """Ligne dénormalisée de `film_features` : listes d'ids packées (cf. src/core/packed_ids.py)."""
+    credits = m.get("credits")
+    return {
+        "film_tmdb_id": m["id"],
+        "genre_ids": pack_ids(g["id"] for g in (m.get("genres") or [])),
+        "director_ids": pack_ids(d["t"] for d in director_rows(m["id"], credits)),
+        "actor_ids": pack_ids(a["t"] for a in actor_rows(m["id"], credits, FEATURE_TOP_ACTORS)),
+        "updated_at": dt.datetime.utcnow().replace(microsecond=0),
+    }
+
+def genre_rows(genres: list[dict]) -> list[dict]:
+    return [{"id": g["id"], "name": g["name"]} for g in (genres or [])]
+
+def film_genre_rows(movie_id: int, genres: list[dict]) -> list[dict]:
+    return [{"f": movie_id, "g": g["id"]} for g in (genres or [])]
 
+# ---------- Écritures unitaires ----------
+def upsert_movie(m: dict):
+    """Upsert de la ligne `film` : mêmes colonnes que l'ingestion groupée (cf. writer.write_movies)."""
+    from src.ingest.writer import insert_rows, table_columns  # writer importe ce module
+    row = film_row(m)
     with engine.begin() as conn:
-        conn.execute(
-            text("""
-                INSERT INTO film (tmdb_id, title, release_year, poster_path)
-                VALUES (:id, :title, :year, :poster)
-                ON DUPLICATE KEY UPDATE
-                    title=VALUES(title),
-                    release_year=VALUES(release_year),
-                    poster_path=VALUES(poster_path)
-            """),
-            {"id": m["id"], "title": m.get("title", ""), "year": year, "poster": poster},
-        )
+        film_cols = table_columns(conn, "film")
+        if "last_tmdb_sync" in film_cols:
+            row["last_tmdb_sync"] = dt.datetime.utcnow().replace(microsecond=0)
+        cols = [c for c in row if c in film_cols]
+        insert_rows(conn, "film", cols, [row], on_conflict="update", keys=("tmdb_id",))
 
 def upsert_directors(movie_id: int, credits: dict):
-    crew = (credits or {}).get("crew", [])
-    directors = [c for c in crew if (c.get("job") == "Director" or c.get("known_for_department") == "Directing")]
-    exec_many(
-        "INSERT IGNORE INTO directors (film_tmdb_id, tmdb_id, name) VALUES (:f,:t,:n)",
-        [{"f": movie_id, "t": d.get("id"), "n": d.get("name", "")} for d in directors],
-    )
+    """Remplace les réalisateurs du film (suppression + insertion, une transaction)."""
+    from src.ingest.writer import delete_for_films, insert_rows
+    rows = [{"film_tmdb_id": d["f"], "tmdb_id": d["t"], "name": d["n"]} for d in director_rows(movie_id, credits)]
+    with engine.begin() as conn:
+        delete_for_films(conn, "directors", "film_tmdb_id", [movie_id])
+        insert_rows(conn, "directors", ["film_tmdb_id", "tmdb_id", "name"], rows)
+
+def upsert_actors(movie_id: int, credits: dict):
+    from src.ingest.writer import delete_for_films, insert_rows
+    rows = [{"film_tmdb_id": a["f"], "tmdb_id": a["t"], "name": a["n"], "cast_order": a["o"]}
+            for a in actor_rows(movie_id, credits)]
+    with engine.begin() as conn:
+        delete_for_films(conn, "actors", "film_tmdb_id", [movie_id])
+        insert_rows(conn, "actors", ["film_tmdb_id", "tmdb_id", "name", "cast_order"], rows)
+
+def upsert_film_features(m: dict):
+    from src.ingest.writer import insert_rows
+    row = film_features_row(m)
+    with engine.begin() as conn:
+        insert_rows(conn, "film_features", list(row), [row], on_conflict="update", keys=("film_tmdb_id",))
 
 def upsert_genres(movie_id: int, genres: list[dict]):
-    exec_many(
-        "INSERT IGNORE INTO genre (id, name) VALUES (:id,:name)",
-        [{"id": g["id"], "name": g["name"]} for g in (genres or [])],
-    )
-    exec_many(
-        "INSERT IGNORE INTO film_genre (film_id, genre_id) VALUES (:f,:g)",
-        [{"f": movie_id, "g": g["id"]} for g in (genres or [])],
-    )
+    from src.ingest.writer import delete_for_films, film_genre_fk, insert_rows
+    with engine.begin() as conn:
+        insert_rows(conn, "genre", ["id", "name"], genre_rows(genres), on_conflict="ignore")
+        fk = film_genre_fk(conn)
+        delete_for_films(conn, "film_genre", fk, [movie_id])
+        rows = [{fk: r["f"], "genre_id": r["g"]} for r in film_genre_rows(movie_id, genres)]
+        insert_rows(conn, "film_genre", [fk, "genre_id"], rows, on_conflict="ignore")
 
 def ingest_one(tmdb_id: int):
     m = movie_details(int(tmdb_id))
     upsert_movie(m)
     upsert_directors(m["id"], m.get("credits"))
+    upsert_actors(m["id"], m.get("credits"))
     upsert_genres(m["id"], m.get("genres"))
+    upsert_film_features(m)
     return {"ingested": m["id"], "title": m.get("title", "")}
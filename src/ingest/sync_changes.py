@@ -0,0 +1,144 @@
+# src/ingest/sync_changes.py
+"""
+Synchro incrémentale du catalogue à partir du flux TMDb `/movie/changes`.
+
+1. lit le high-water mark (table `sync_state`)
+2. liste les films modifiés depuis (fenêtres de 14 jours, toutes les pages)
+3. ne garde que ceux déjà présents dans le catalogue local (ids relus en base au préalable)
+4. les ré-ingère par lots (src/ingest/bulk_ingest.py)
+5. pousse uniquement ces ids au recommender (mise à jour incrémentale)
+6. avance le watermark, sauf si des films restent en échec transitoire (429, 5xx, réseau) :
+   la même fenêtre est alors relue au passage suivant
+
+TMDB_BASE peut pointer vers un serveur local de substitution pour les essais.
+
+Usage (depuis la racine) :
+    python -m src.ingest.sync_changes --api-url http://localhost:8000
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from src.core.tmdb_client import movie_changes
+
+log = logging.getLogger("ingest")
+
+WATERMARK_NAME = "tmdb_movie_changes"
+MAX_WINDOW_DAYS = 14  # limite imposée par TMDb
+DEFAULT_LOOKBACK_DAYS = 1
+
+
+# ---------- Watermark ----------
+def get_watermark(engine, name: str = WATERMARK_NAME) -> Optional[dt.datetime]:
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT value FROM sync_state WHERE name = :n"), {"n": name}).first()
+    return dt.datetime.fromisoformat(row[0]) if row else None
+
+
+def set_watermark(engine, value: dt.datetime, name: str = WATERMARK_NAME) -> None:
+    from src.ingest.writer import insert_rows
+    with engine.begin() as conn:
+        insert_rows(
+            conn, "sync_state", ["name", "value", "updated_at"],
+            [{"name": name, "value": value.isoformat(), "updated_at": dt.datetime.utcnow()}],
+            on_conflict="update", keys=("name",),
+        )
+
+
+# ---------- Flux de changements ----------
+def changed_ids(start: dt.datetime, end: dt.datetime) -> List[int]:
+    """Ids modifiés entre start et end (dédoublonnés, ordre d'apparition)."""
+    out: Dict[int, None] = {}
+    lo = start
+    while lo < end:
+        hi = min(end, lo + dt.timedelta(days=MAX_WINDOW_DAYS))
+        page, total = 1, 1
+        while page <= total:
+            data = movie_changes(lo.date().isoformat(), hi.date().isoformat(), page=page) or {}
+            total = int(data.get("total_pages") or 1)
+            for r in data.get("results") or []:
+                if isinstance(r.get("id"), int) and not r.get("adult"):
+                    out[r["id"]] = None
+            page += 1
+        lo = hi
+    return list(out)
+
+
+# ---------- Job ----------
+def run_sync(
+    engine=None,
+    only_local: bool = True,
+    push: Optional[Callable[[List[int]], object]] = None,
+    batch_size: int = 200,
+    workers: int = 16,
+    now: Optional[dt.datetime] = None,
+) -> Dict[str, object]:
+    """Un passage de synchro. `push(ids)` reçoit les films effectivement ré-ingérés."""
+    from src.core import local_index
+    from src.ingest.bulk_ingest import bulk_ingest
+    if engine is None:
+        from src.core.db import engine
+
+    end = now or dt.datetime.utcnow().replace(microsecond=0)
+    start = get_watermark(engine) or end - dt.timedelta(days=DEFAULT_LOOKBACK_DAYS)
+
+    ids = changed_ids(start, end)
+    n_changed = len(ids)
+    if only_local:
+        local_index.refresh_local_index()  # films ingérés depuis le chargement du catalogue
+        ids = local_index.filter_to_local(ids)
+
+    stats = bulk_ingest(ids, engine=engine, checkpoint=None, batch_size=batch_size, workers=workers) if ids else {}
+    retry = stats.get("retry_ids") or []
+    failed = set(retry)
+    done = [i for i in ids if i not in failed]
+    if done and push is not None:
+        push(done)
+    if retry:
+        log.warning("Sync : %d films en échec, watermark laissé à %s", len(retry), start)
+    set_watermark(engine, start if retry else end)
+
+    log.info("Sync %s -> %s : %d changés, %d ré-ingérés", start, end, n_changed, len(done))
+    return {
+        "since": start.isoformat(),
+        "until": end.isoformat(),
+        "watermark": (start if retry else end).isoformat(),
+        "changed": n_changed,
+        "reingested": len(done),
+        **stats,
+    }
+
+
+def push_to_api(api_url: str, token: Optional[str] = None) -> Callable[[List[int]], object]:
+    """Pousse les ids à une API en cours d'exécution (/admin/reindex_films, jeton ADMIN_TOKEN)."""
+    import requests
+    token = token or os.getenv("ADMIN_TOKEN") or ""
+
+    def _push(ids: List[int]):
+        r = requests.post(f"{api_url.rstrip('/')}/admin/reindex_films", json={"ids": ids},
+                          headers={"X-Admin-Token": token}, timeout=120)
+        r.raise_for_status()
+        return r.json()
+    return _push
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--api-url", default=None, help="API à notifier après ré-ingestion")
+    parser.add_argument("--include-new", action="store_true", help="ingérer aussi les films absents du catalogue")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+    print(run_sync(
+        only_local=not args.include_new,
+        push=push_to_api(args.api_url) if args.api_url else None,
+        batch_size=args.batch_size,
+        workers=args.workers,
+    ))
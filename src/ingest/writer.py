@@ -0,0 +1,198 @@
+# src/ingest/writer.py
+"""
+Écritures groupées pour l'ingestion en masse.
+
+Chaque lot de films est écrit dans UNE transaction, avec des INSERT multi-lignes
+(film, directors, actors, genre, film_genre, film_features) au lieu d'un aller-retour par ligne.
+Les requêtes s'adaptent au dialecte (MySQL en prod, SQLite pour les essais hors-ligne).
+"""
+from __future__ import annotations
+
+import datetime as dt
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import inspect, text
+
+from src.core import local_index
+from src.ingest.ingest_tmdb import (
+    actor_rows, director_rows, film_features_row, film_genre_rows, film_row, genre_rows,
+)
+
+# lignes par INSERT (reste sous les limites de placeholders MySQL/SQLite)
+ROWS_PER_STATEMENT = 500
+
+_COLS_CACHE: Dict[tuple, set] = {}
+
+
+def table_columns(conn, table: str) -> set:
+    """Colonnes d'une table (mis en cache par base). set() si la table n'existe pas."""
+    key = (str(conn.engine.url), table)
+    if key not in _COLS_CACHE:
+        try:
+            _COLS_CACHE[key] = {c["name"] for c in inspect(conn).get_columns(table)}
+        except Exception:
+            _COLS_CACHE[key] = set()
+    return _COLS_CACHE[key]
+
+
+def film_genre_fk(conn) -> str:
+    """`film_genre` utilise `film_id` (schema.sql) ou `film_tmdb_id` (migration genres)."""
+    cols = table_columns(conn, "film_genre")
+    return "film_tmdb_id" if "film_tmdb_id" in cols and "film_id" not in cols else "film_id"
+
+
+def insert_rows(
+    conn,
+    table: str,
+    cols: Sequence[str],
+    rows: Sequence[Dict[str, Any]],
+    on_conflict: Optional[str] = None,
+    keys: Sequence[str] = (),
+    update: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    INSERT multi-lignes. `on_conflict` :
+      - None     : INSERT simple
+      - "ignore" : INSERT IGNORE / ON CONFLICT DO NOTHING
+      - "update" : upsert des colonnes `update` (défaut : toutes les colonnes hors `keys`)
+    """
+    if not rows or not cols:
+        return 0
+    dialect = conn.dialect.name
+    col_sql = ", ".join(cols)
+    updates = [c for c in (cols if update is None else update) if c not in keys]
+    if on_conflict == "update" and not updates:
+        on_conflict = "ignore"
+
+    if on_conflict == "ignore" and dialect == "mysql":
+        head, tail = f"INSERT IGNORE INTO {table} ({col_sql}) VALUES ", ""
+    elif on_conflict == "ignore":
+        head, tail = f"INSERT INTO {table} ({col_sql}) VALUES ", " ON CONFLICT DO NOTHING"
+    elif on_conflict == "update" and dialect == "mysql":
+        head = f"INSERT INTO {table} ({col_sql}) VALUES "
+        tail = " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c}=VALUES({c})" for c in updates)
+    elif on_conflict == "update":
+        head = f"INSERT INTO {table} ({col_sql}) VALUES "
+        tail = (f" ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+                + ", ".join(f"{c}=excluded.{c}" for c in updates))
+    else:
+        head, tail = f"INSERT INTO {table} ({col_sql}) VALUES ", ""
+
+    n = 0
+    for start in range(0, len(rows), ROWS_PER_STATEMENT):
+        chunk = rows[start:start + ROWS_PER_STATEMENT]
+        params: Dict[str, Any] = {}
+        values = []
+        for i, r in enumerate(chunk):
+            names = []
+            for j, c in enumerate(cols):
+                p = f"p{i}_{j}"
+                params[p] = r.get(c)
+                names.append(f":{p}")
+            values.append("(" + ", ".join(names) + ")")
+        conn.execute(text(head + ", ".join(values) + tail), params)
+        n += len(chunk)
+    return n
+
+
+def delete_for_films(conn, table: str, fk: str, film_ids: Sequence[int]) -> None:
+    if not film_ids:
+        return
+    params = {f"i{k}": int(v) for k, v in enumerate(film_ids)}
+    conn.execute(
+        text(f"DELETE FROM {table} WHERE {fk} IN ({', '.join(':' + p for p in params)})"),
+        params,
+    )
+
+
+# colonnes de `film` -> clés de la réponse TMDb qui les renseignent : un enregistrement partiel
+# (ligne d'export d'ids) ne met à jour que les colonnes dont il a la source
+_FILM_SOURCES = {
+    "title": ("title",),
+    "release_year": ("release_date",),
+    "release_date": ("release_date",),
+    "poster_path": ("poster_path",),
+    "overview": ("overview",),
+    "popularity": ("popularity",),
+    "vote_average": ("vote_average",),
+    "vote_count": ("vote_count",),
+}
+
+
+def _film_updates(m: dict, cols: Sequence[str]) -> tuple:
+    """Colonnes de `film` que `m` peut écraser sur un film déjà en base."""
+    return tuple(c for c in cols if c not in _FILM_SOURCES or any(k in m for k in _FILM_SOURCES[c]))
+
+
+def write_movies(engine, movies: Iterable[dict]) -> int:
+    """
+    Écrit un lot de réponses TMDb `/movie/{id}?append_to_response=credits`
+    en une transaction (film, directors, actors, genre, film_genre, film_features).
+    Enregistrements partiels (ex. export d'ids) : seules les colonnes présentes écrasent un film
+    existant, et les tables liées ne sont remplacées que si `credits` / `genres` sont fournis.
+    Retourne le nombre de films écrits.
+    """
+    movies = [m for m in movies if m and m.get("id")]
+    if not movies:
+        return 0
+    now = dt.datetime.utcnow().replace(microsecond=0)
+
+    with engine.begin() as conn:
+        # FILM : on n'écrit que les colonnes présentes dans le schéma
+        film_cols = table_columns(conn, "film")
+        films = [film_row(m) for m in movies]
+        if "last_tmdb_sync" in film_cols:
+            for f in films:
+                f["last_tmdb_sync"] = now
+        cols = [c for c in films[0] if c in film_cols]
+        groups: Dict[tuple, List[dict]] = {}
+        for m, f in zip(movies, films):
+            groups.setdefault(_film_updates(m, cols), []).append(f)
+        for updates, rows in groups.items():
+            insert_rows(conn, "film", cols, rows, on_conflict="update", keys=("tmdb_id",), update=updates)
+        ids = [f["tmdb_id"] for f in films]
+        with_credits = [m for m in movies if "credits" in m]
+        credit_ids = [int(m["id"]) for m in with_credits]
+        with_genres = [m for m in movies if "genres" in m]
+
+        # DIRECTORS : remplacement complet pour les films du lot
+        dir_cols = table_columns(conn, "directors")
+        if dir_cols and with_credits:
+            delete_for_films(conn, "directors", "film_tmdb_id", credit_ids)
+            rows = []
+            for m in with_credits:
+                for d in director_rows(m["id"], m.get("credits")):
+                    rows.append({"film_tmdb_id": d["f"], "tmdb_id": d["t"], "name": d["n"]})
+            cols = [c for c in ("film_tmdb_id", "tmdb_id", "name") if c in dir_cols]
+            insert_rows(conn, "directors", cols, rows)
+
+        # ACTORS (distribution principale, ordre d'affiche)
+        act_cols = table_columns(conn, "actors")
+        if act_cols and with_credits:
+            delete_for_films(conn, "actors", "film_tmdb_id", credit_ids)
+            rows = [{"film_tmdb_id": a["f"], "tmdb_id": a["t"], "name": a["n"], "cast_order": a["o"]}
+                    for m in with_credits for a in actor_rows(m["id"], m.get("credits"))]
+            cols = [c for c in ("film_tmdb_id", "tmdb_id", "name", "cast_order") if c in act_cols]
+            insert_rows(conn, "actors", cols, rows)
+
+        # GENRE + FILM_GENRE
+        if table_columns(conn, "genre"):
+            uniq = {g["id"]: g for m in with_genres for g in genre_rows(m.get("genres"))}
+            insert_rows(conn, "genre", ["id", "name"], list(uniq.values()), on_conflict="ignore")
+        if table_columns(conn, "film_genre") and with_genres:
+            fk = film_genre_fk(conn)
+            delete_for_films(conn, "film_genre", fk, [int(m["id"]) for m in with_genres])
+            rows = [{fk: r["f"], "genre_id": r["g"]}
+                    for m in with_genres for r in film_genre_rows(m["id"], m.get("genres"))]
+            insert_rows(conn, "film_genre", [fk, "genre_id"], rows, on_conflict="ignore")
+
+        # FILM_FEATURES : une ligne dénormalisée par film, maintenue à l'écriture (films complets seulement)
+        complete = [m for m in with_credits if "genres" in m]
+        if table_columns(conn, "film_features") and complete:
+            rows = [film_features_row(m) for m in complete]
+            insert_rows(conn, "film_features", list(rows[0]), rows,
+                        on_conflict="update", keys=("film_tmdb_id",))
+
+    # appartenance au catalogue (filtres has_local_data / filter_to_local) : ids visibles sans rechargement
+    local_index.add_local_ids(ids)
+    return len(movies)
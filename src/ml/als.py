@@ -0,0 +1,254 @@
+# src/ml/als.py
+"""
+Filtrage collaboratif implicite : ALS pondéré (Hu, Koren & Volinsky 2008).
+
+Entrée : matrice creuse utilisateurs × films d'interactions r_ui (likes, vues...),
+confiance c_ui = 1 + alpha * r_ui, préférence p_ui = 1 si r_ui > 0.
+Chaque demi-itération résout, pour toutes les lignes à la fois,
+    (YᵀY + Yᵀ(C_u − I)Y + λI) x_u = Yᵀ C_u p_u
+par quelques pas de gradient conjugué vectorisés (démarrage à chaud sur l'itération
+précédente) : seuls des produits matrice creuse × dense et des einsum, par blocs de
+lignes (CHUNK_NNZ interactions) répartis sur ALS_WORKERS threads (numpy / scipy
+relâchent le GIL pendant les calculs).
+
+Artefact (ALS_MODEL_PATH, défaut data/als_model) : facteurs en .npy chargés en mmap,
+ids des films, ids utilisateurs (table de chaînes), films vus à l'entraînement (CSR)
+et manifest.json. Le service (src/ml/recommender.py) se contente de lire les facteurs.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from src.core.catalog_snapshot import StringTable, _open_published, _publish, _read_strings, _write_strings
+
+log = logging.getLogger("als")
+
+FORMAT_VERSION = 1
+FACTORS = int(os.getenv("ALS_FACTORS", "64"))
+REGULARIZATION = float(os.getenv("ALS_REG", "0.05"))
+ALPHA = float(os.getenv("ALS_ALPHA", "20"))
+ITERATIONS = int(os.getenv("ALS_ITERATIONS", "12"))
+CG_STEPS = 3
+CHUNK_NNZ = 1 << 18
+WORKERS = int(os.getenv("ALS_WORKERS", "0")) or (os.cpu_count() or 1)
+
+# poids des événements de src/core/user_profiles.py (les dislikes ne sont pas des signaux implicites)
+EVENT_WEIGHTS = {"like": 1.0, "seen": 0.3}
+
+_MODEL: Optional["ALSModel"] = None
+_LOCK = threading.Lock()
+
+
+def default_path() -> str:
+    return os.getenv("ALS_MODEL_PATH", "data/als_model")
+
+
+# ---------- Interactions ----------
+def interactions_matrix(users: Sequence, items: Sequence[int], weights: Optional[Sequence[float]] = None
+                        ) -> Tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
+    """
+    (C, user_ids, item_ids) : C[u, i] = somme des poids des interactions (doublons cumulés),
+    lignes dans l'ordre de `user_ids` (uniques triés), colonnes dans l'ordre de `item_ids`.
+    """
+    user_ids, u = np.unique(np.asarray(users), return_inverse=True)
+    item_ids, i = np.unique(np.asarray(items, dtype=np.int64), return_inverse=True)
+    w = np.ones(len(u), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+    C = sparse.csr_matrix((w, (u, i)), shape=(user_ids.size, item_ids.size), dtype=np.float32)
+    C.sum_duplicates()
+    C.sort_indices()
+    return C, user_ids, item_ids
+
+
+def load_events(path: Optional[str] = None) -> Tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
+    """Interactions du journal des profils utilisateurs (table user_event)."""
+    from src.core import user_profiles
+
+    store = user_profiles.ProfileStore(path) if path else user_profiles.get_store()
+    with store._lock:
+        rows = store._conn.execute("SELECT user_id, tmdb_id, kind FROM user_event").fetchall()
+    kept = [(u, t, EVENT_WEIGHTS[k]) for u, t, k in rows if k in EVENT_WEIGHTS]
+    if not kept:
+        raise RuntimeError("Aucune interaction exploitable dans le journal des événements.")
+    users, items, weights = zip(*kept)
+    return interactions_matrix([str(x) for x in users], items, weights)
+
+
+# ---------- Résolution ----------
+def _chunks(indptr: np.ndarray, max_nnz: int) -> List[Tuple[int, int]]:
+    """Découpe les lignes en blocs d'au plus ~max_nnz interactions."""
+    n = indptr.size - 1
+    bounds = [0]
+    while bounds[-1] < n:
+        start = bounds[-1]
+        end = int(np.searchsorted(indptr, indptr[start] + max_nnz, side="right")) - 1
+        bounds.append(min(n, max(end, start + 1)))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _cg_block(C: sparse.csr_matrix, Y: np.ndarray, A0: np.ndarray, X0: np.ndarray,
+              alpha: float, steps: int) -> np.ndarray:
+    """Quelques pas de gradient conjugué pour les lignes de C (bloc), toutes à la fois."""
+    n = C.shape[0]
+    indptr, indices = C.indptr, C.indices
+    conf = (alpha * C.data).astype(np.float32)          # c_ui - 1
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    Yc = Y[indices]                                      # (nnz, f)
+
+    def matvec(V: np.ndarray) -> np.ndarray:
+        t = np.einsum("ij,ij->i", Yc, V[rows]) * conf
+        return V @ A0 + sparse.csr_matrix((t, indices, indptr), shape=C.shape) @ Y
+
+    b = sparse.csr_matrix((1.0 + conf, indices, indptr), shape=C.shape) @ Y
+    X = X0.copy()
+    r = b - matvec(X)
+    p = r.copy()
+    rs = np.einsum("ij,ij->i", r, r)
+    for _ in range(steps):
+        Ap = matvec(p)
+        denom = np.einsum("ij,ij->i", p, Ap)
+        a = np.divide(rs, denom, out=np.zeros_like(rs), where=denom > 0)
+        X += a[:, None] * p
+        r -= a[:, None] * Ap
+        rs_new = np.einsum("ij,ij->i", r, r)
+        beta = np.divide(rs_new, rs, out=np.zeros_like(rs), where=rs > 0)
+        p = r + beta[:, None] * p
+        rs = rs_new
+    return X.astype(np.float32, copy=False)
+
+
+def _solve(C: sparse.csr_matrix, Y: np.ndarray, X: np.ndarray, reg: float, alpha: float,
+           steps: int, pool: ThreadPoolExecutor) -> np.ndarray:
+    A0 = (Y.T @ Y + reg * np.eye(Y.shape[1], dtype=np.float32)).astype(np.float32)
+    out = np.empty_like(X)
+
+    def run(span: Tuple[int, int]) -> None:
+        a, b = span
+        out[a:b] = _cg_block(C[a:b], Y, A0, X[a:b], alpha, steps)
+
+    list(pool.map(run, _chunks(C.indptr, CHUNK_NNZ)))
+    return out
+
+
+def train(C: sparse.csr_matrix, factors: int = FACTORS, reg: float = REGULARIZATION, alpha: float = ALPHA,
+          iterations: int = ITERATIONS, cg_steps: int = CG_STEPS, workers: int = WORKERS, seed: int = 0,
+          callback: Optional[Callable[[int, float], None]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Facteurs (utilisateurs, films) ; `callback(iteration, secondes)` après chaque itération."""
+    C = C.tocsr().astype(np.float32)
+    Ct = C.T.tocsr()
+    rng = np.random.default_rng(seed)
+    X = (rng.standard_normal((C.shape[0], factors)) * 0.01).astype(np.float32)
+    Y = (rng.standard_normal((C.shape[1], factors)) * 0.01).astype(np.float32)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="als") as pool:
+        for it in range(iterations):
+            t0 = time.perf_counter()
+            X = _solve(C, Y, X, reg, alpha, cg_steps, pool)
+            Y = _solve(Ct, X, Y, reg, alpha, cg_steps, pool)
+            if callback is not None:
+                callback(it, time.perf_counter() - t0)
+    return X, Y
+
+
+# ---------- Artefact ----------
+def save(path: str, C: sparse.csr_matrix, user_ids: Iterable, item_ids: np.ndarray,
+         X: np.ndarray, Y: np.ndarray, params: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """Écrit l'artefact (répertoire temporaire puis publication atomique, comme le snapshot de catalogue)."""
+    tmp = path.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "user_factors.npy"), X.astype(np.float32))
+    np.save(os.path.join(tmp, "item_factors.npy"), Y.astype(np.float32))
+    np.save(os.path.join(tmp, "item_ids.npy"), np.asarray(item_ids, dtype=np.int64))
+    np.save(os.path.join(tmp, "seen.indptr.npy"), C.indptr.astype(np.int64))
+    np.save(os.path.join(tmp, "seen.indices.npy"), C.indices.astype(np.int32))
+    _write_strings(tmp, "users", (str(u) for u in user_ids))
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": dt.datetime.utcnow().replace(microsecond=0).isoformat(),
+        "users": int(X.shape[0]),
+        "items": int(Y.shape[0]),
+        "factors": int(X.shape[1]),
+        "interactions": int(C.nnz),
+        "params": params or {},
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    _publish(tmp, path)
+    return manifest
+
+
+class ALSModel:
+    """Artefact chargé (facteurs en mmap par défaut)."""
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        mode = "r" if mmap else None
+        path = os.path.realpath(path)  # une seule version, même si le lien bascule pendant le chargement
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest: Dict[str, object] = json.load(f)
+        self.user_factors = np.load(os.path.join(path, "user_factors.npy"), mmap_mode=mode)
+        self.item_factors = np.load(os.path.join(path, "item_factors.npy"), mmap_mode=mode)
+        self.item_ids = np.load(os.path.join(path, "item_ids.npy"), mmap_mode=mode)
+        self.seen_indptr = np.load(os.path.join(path, "seen.indptr.npy"), mmap_mode=mode)
+        self.seen_indices = np.load(os.path.join(path, "seen.indices.npy"), mmap_mode=mode)
+        self.users: StringTable = _read_strings(path, "users", mmap)
+        self._user_index: Optional[Dict[str, int]] = None
+        self._item_norms: Optional[np.ndarray] = None
+
+    @property
+    def version(self) -> str:
+        return str(self.manifest.get("created_at"))
+
+    def user_row(self, user_id: str) -> Optional[int]:
+        if self._user_index is None:
+            self._user_index = {u: i for i, u in enumerate(self.users.tolist())}
+        return self._user_index.get(str(user_id))
+
+    @property
+    def item_norms(self) -> np.ndarray:
+        if self._item_norms is None:
+            Y = np.asarray(self.item_factors)
+            self._item_norms = np.sqrt(np.einsum("ij,ij->i", Y, Y)).astype(np.float32)
+        return self._item_norms
+
+    def seen_items(self, row: int) -> np.ndarray:
+        """Ids TMDb des films vus par l'utilisateur `row` à l'entraînement."""
+        a, b = int(self.seen_indptr[row]), int(self.seen_indptr[row + 1])
+        return np.asarray(self.item_ids)[self.seen_indices[a:b]]
+
+    def scores(self, row: int) -> np.ndarray:
+        """Cosinus facteur utilisateur / facteurs films, aligné sur `item_ids`."""
+        x = np.asarray(self.user_factors[row], dtype=np.float32)
+        xn = float(np.linalg.norm(x))
+        if xn == 0.0:
+            return np.zeros(self.item_ids.shape[0], dtype=np.float32)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = (self.item_factors @ x) / (self.item_norms * xn)
+        return np.nan_to_num(s, nan=0.0).astype(np.float32)
+
+
+def get(path: Optional[str] = None, reload: bool = False) -> Optional[ALSModel]:
+    """Modèle courant (chargé une fois), ou None s'il n'y a pas d'artefact."""
+    global _MODEL
+    path = path or default_path()
+    with _LOCK:
+        if _MODEL is not None and not reload and _MODEL.path == path:
+            return _MODEL
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            _MODEL = None
+            return None
+        _MODEL = _open_published(ALSModel, path)
+        log.info("Modèle ALS chargé : %s (%s utilisateurs, %s films)", path,
+                 _MODEL.manifest.get("users"), _MODEL.manifest.get("items"))
+        return _MODEL
@@ -0,0 +1,277 @@
+# src/ml/binary_index.py
+"""
+Index binaire des features du k-NN : chaque coefficient non nul de X vaut 1 × le poids de
+son bloc (FEATURE_WEIGHTS), il suffit donc de garder l'ensemble des features de chaque film.
+
+    blocs denses (≤ 64 colonnes, ex. genres)   un mot uint64 par film, bit j = colonne j
+    blocs creux  (réalisateurs, acteurs)       liste triée de colonnes int32 par film,
+                                               pointeurs int32 (pas de valeurs float32)
+    normes                                     float32 par film : sqrt(Σ poids² × nb de features)
+
+Soit environ 4 octets par coefficient non nul contre 8 pour X (float32 + indice int32) et
+1 à 2 octets par film pour les genres : ~1,8× moins de mémoire que X au total.
+
+Pour un profil de graines p = Σ lignes des graines (p_f = poids × nb de graines ayant f) :
+    x_i · p = Σ_bloc poids² × Σ_graines |F_i ∩ F_graine|
+les intersections sont des popcount (mot du film & mot de la graine) pour les blocs denses ;
+pour les blocs creux, un produit des listes des films par la table des colonnes (nb de graines
+ayant la feature), × poids². Les comptes étant entiers, le cosinus est exact (les ex aequo
+restent ex aequo) et le classement est celui de X @ p au bruit float32 près.
+
+Un profil quelconque (utilisateurs : likes - dislikes) passe par cosine(p) : table des
+combinaisons distinctes de bits pour les blocs denses, table des poids du profil pour les creux.
+
+L'index suffit à relire les features d'un film (raisons, profils utilisateurs) et à refaire
+les matrices one-hot à la demande (X pour le graphe, mise à jour incrémentale) : le recommender
+ne garde pas ces matrices en mode binaire.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+WORD_BITS = 64
+
+if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+    def popcount(words: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(words)
+else:
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(words: np.ndarray) -> np.ndarray:
+        b = _BYTE_BITS[np.ascontiguousarray(words, dtype=np.uint64).view(np.uint8)]
+        return b.reshape(-1, 8).sum(axis=1, dtype=np.uint8)
+
+
+def pack_rows(M: sparse.csr_matrix) -> np.ndarray:
+    """Un mot uint64 par ligne d'une matrice one-hot d'au plus 64 colonnes."""
+    rows = np.repeat(np.arange(M.shape[0]), np.diff(M.indptr))
+    words = np.zeros(M.shape[0], dtype=np.uint64)
+    np.bitwise_or.at(words, rows, np.left_shift(np.uint64(1), M.indices.astype(np.uint64)))
+    return words
+
+
+def _code_dtype(n: int) -> type:
+    return np.uint8 if n <= 1 << 8 else np.uint16 if n <= 1 << 16 else np.int32
+
+
+class _Dense:
+    """
+    Bloc dense : mots distincts (`codes`, uint64) + indice du mot de chaque film (`code_of`,
+    uint8/uint16) ; les combinaisons de genres se répètent, d'où 1 à 2 octets par film.
+    Les intersections sont calculées une fois par mot distinct, puis lues par film.
+    """
+    __slots__ = ("weight", "offset", "width", "codes", "code_of")
+
+    def __init__(self, weight: float, offset: int, M: sparse.csr_matrix):
+        self.weight = np.float32(weight)
+        self.offset = offset
+        self.width = M.shape[1]
+        self.codes, inverse = np.unique(pack_rows(M), return_inverse=True)
+        self.code_of = inverse.astype(_code_dtype(self.codes.size))
+
+    def words(self, rows: Sequence[int]) -> np.ndarray:
+        return self.codes[self.code_of[list(rows)]]
+
+    def counts(self) -> np.ndarray:
+        return popcount(self.codes)[self.code_of]
+
+    def _bits(self, words: np.ndarray) -> np.ndarray:
+        return ((words[:, None] >> np.arange(self.width, dtype=np.uint64)) & np.uint64(1)).astype(bool)
+
+    def features(self, row: int) -> np.ndarray:
+        return np.flatnonzero(self._bits(self.codes[self.code_of[row:row + 1]])[0]).astype(np.int32)
+
+    def lists(self) -> tuple:
+        """(indptr, indices) des colonnes de chaque film, décodées une fois par mot distinct."""
+        bits = self._bits(self.codes)
+        code_ptr = np.zeros(self.codes.size + 1, dtype=np.int64)
+        np.cumsum(bits.sum(axis=1), out=code_ptr[1:])
+        code_cols = np.nonzero(bits)[1].astype(np.int32)  # colonnes croissantes dans chaque mot
+        lengths = np.diff(code_ptr)[self.code_of]
+        indptr = np.zeros(self.code_of.size + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        first = np.repeat(code_ptr[self.code_of] - indptr[:-1], lengths)
+        return indptr, code_cols[first + np.arange(indptr[-1])]
+
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.code_of.nbytes
+
+
+class _Sparse:
+    """
+    Bloc creux : colonnes int32 triées de chaque film, pointeurs int32 ; pas de valeurs float32
+    (`M` : vue one-hot de ces listes, valeurs 1 en pas nul, pour les produits de scipy).
+    """
+    __slots__ = ("weight", "offset", "width", "M")
+
+    def __init__(self, weight: float, offset: int, M: sparse.csr_matrix):
+        self.weight = np.float32(weight)
+        self.offset = offset
+        self.width = M.shape[1]
+        indptr = M.indptr.astype(np.int32 if M.nnz < 2 ** 31 else np.int64)
+        indices = M.indices.astype(np.int32, copy=False)
+        ones = np.broadcast_to(np.float32(1.0), indices.shape)
+        self.M = sparse.csr_matrix((ones, indices, indptr), shape=M.shape)
+
+    @property
+    def indptr(self) -> np.ndarray:
+        return self.M.indptr
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self.M.indices
+
+    def counts(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def features(self, row: int) -> np.ndarray:
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def lists(self) -> tuple:
+        return self.indptr, self.indices
+
+    def dots(self, table: np.ndarray) -> np.ndarray:
+        """Σ_{f ∈ F_i} table[f] pour chaque film (float32 ; scipy recopie les valeurs le temps du produit)."""
+        return self.M @ table
+
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes
+
+
+class BinaryIndex:
+    """Même espace de colonnes que X (blocs non vides, dans l'ordre de `blocks`)."""
+
+    def __init__(self, n_rows: int, blocks: List[object], inv_norms: np.ndarray,
+                 names: Sequence[str] = ()):
+        self.n_rows = n_rows
+        self.blocks = blocks
+        self.inv_norms = inv_norms  # 1 / ‖x_i‖ (0 pour un film sans feature)
+        self.by_name = dict(zip(names, blocks))
+
+    @classmethod
+    def build(cls, blocks: Dict[str, sparse.csr_matrix], weights: Dict[str, float],
+              order: Sequence[str]) -> "BinaryIndex":
+        """`blocks` : matrices one-hot (indices triés) ; `order` : ordre des blocs dans X."""
+        parts: List[object] = []
+        names: List[str] = []
+        off, n = 0, 0
+        for b in order:
+            M = blocks[b]
+            n = M.shape[0]
+            if M.shape[1] == 0:  # absent de X (cf. recommender._assemble)
+                continue
+            cls_ = _Dense if M.shape[1] <= WORD_BITS else _Sparse
+            parts.append(cls_(weights[b], off, M))
+            names.append(b)
+            off += M.shape[1]
+        sq = np.zeros(n, dtype=np.float32)
+        for part in parts:
+            sq += part.weight * part.weight * part.counts()
+        with np.errstate(divide="ignore"):
+            inv = np.where(sq > 0, 1.0 / np.sqrt(sq), 0.0).astype(np.float32)
+        return cls(n, parts, inv, names)
+
+    def nbytes(self) -> int:
+        return self.inv_norms.nbytes + sum(part.nbytes() for part in self.blocks)
+
+    # ---------- Features par film ----------
+    def features(self, block: str, row: int) -> np.ndarray:
+        """Colonnes (triées) du bloc `block` présentes dans la ligne `row` de X."""
+        part = self.by_name.get(block)
+        return part.features(row) if part is not None else np.empty(0, dtype=np.int32)
+
+    def counts(self, block: str) -> np.ndarray:
+        """Nombre de features du bloc `block` de chaque film."""
+        part = self.by_name.get(block)
+        return part.counts() if part is not None else np.zeros(self.n_rows, dtype=np.int64)
+
+    def one_hot(self, block: str) -> sparse.csr_matrix:
+        """Matrice one-hot du bloc (n_rows x largeur), refaite depuis l'index."""
+        part = self.by_name.get(block)
+        if part is None:
+            return sparse.csr_matrix((self.n_rows, 0), dtype=np.float32)
+        indptr, indices = part.lists()
+        return sparse.csr_matrix((np.ones(indices.size, dtype=np.float32), indices, indptr),
+                                 shape=(self.n_rows, part.width))
+
+    # ---------- Scores ----------
+    def _dots(self, dense_table, sparse_table) -> np.ndarray:
+        """
+        x_i · p en float32 : `dense_table(part)` -> valeur par mot distinct d'un bloc dense,
+        `sparse_table(part)` -> (valeur par colonne, facteur) d'un bloc creux (None : bloc absent de p).
+        """
+        dots = None
+        for part in self.blocks:
+            if isinstance(part, _Dense):
+                table = dense_table(part)
+                if table is not None:
+                    got = np.take(table, part.code_of)
+                    dots = got if dots is None else np.add(dots, got, out=dots)
+        if dots is None:
+            dots = np.zeros(self.n_rows, dtype=np.float32)
+        for part in self.blocks:
+            if isinstance(part, _Sparse):
+                got = sparse_table(part)
+                if got is not None:
+                    dots += part.dots(got[0]) * got[1]
+        return dots
+
+    def _cosine(self, dots: np.ndarray, pn: float) -> np.ndarray:
+        if pn == 0.0:
+            return np.zeros(self.n_rows, dtype=np.float32)
+        dots *= self.inv_norms
+        dots *= np.float32(1.0 / pn)
+        return dots
+
+    def seed_scores(self, seed_rows: Sequence[int]) -> np.ndarray:
+        """Cosinus entre chaque film et p = Σ lignes des graines (doublons comptés), en float32."""
+        seed_rows = list(seed_rows)
+        pn2 = 0.0
+
+        def dense_table(part: _Dense) -> Optional[np.ndarray]:
+            nonlocal pn2
+            seeds = part.words(seed_rows)
+            seeds = seeds[seeds != 0]
+            if seeds.size == 0:
+                return None
+            # Σ_graines |F_i ∩ F_s|, une fois par mot distinct
+            inter = popcount(part.codes[:, None] & seeds[None, :]).sum(axis=1, dtype=np.int32)
+            # ‖p‖² du bloc : Σ_f (nb de graines ayant f)² = Σ_{s, t} |F_s ∩ F_t|
+            pn2 += float(part.weight) ** 2 * float(popcount(seeds[:, None] & seeds[None, :]).sum())
+            return (part.weight * part.weight) * inter.astype(np.float32)
+
+        def sparse_table(part: _Sparse) -> Optional[tuple]:
+            nonlocal pn2
+            feats = np.concatenate([part.features(r) for r in seed_rows])
+            if feats.size == 0:
+                return None
+            # p_f / poids = nb de graines ayant f ; Σ_graines |F_i ∩ F_graine| = Σ_{f ∈ F_i} mult[f]
+            mult = np.bincount(feats, minlength=part.width)
+            pn2 += float(part.weight) ** 2 * float((mult.astype(np.int64) ** 2).sum())
+            return mult.astype(np.float32), part.weight * part.weight  # comptes entiers, puis poids²
+
+        dots = self._dots(dense_table, sparse_table)
+        return self._cosine(dots, float(np.sqrt(pn2)))
+
+    def cosine(self, p: np.ndarray, pn: Optional[float] = None) -> np.ndarray:
+        """Cosinus entre chaque film et un vecteur dense `p` de l'espace de X (cf. scoring.cosine_scores)."""
+        pn = float(np.linalg.norm(p)) if pn is None else pn
+
+        def block(part) -> np.ndarray:
+            return np.asarray(p[part.offset:part.offset + part.width], dtype=np.float32)
+
+        def dense_table(part: _Dense) -> Optional[np.ndarray]:
+            pb = block(part)
+            if not pb.any():
+                return None
+            bits = (part.codes[:, None] >> np.arange(part.width, dtype=np.uint64)) & np.uint64(1)
+            return part.weight * (bits.astype(np.float32) @ pb)
+
+        def sparse_table(part: _Sparse) -> Optional[tuple]:
+            pb = block(part)
+            return (pb, part.weight) if pb.any() else None
+
+        return self._cosine(self._dots(dense_table, sparse_table), pn)
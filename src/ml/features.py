@@ -17,15 +17,20 @@ def load_catalog() -> pd.DataFrame:
             """,
             conn,
         )
-        genres_df = pd.read_sql(
+        # agrégation côté pandas (GROUP_CONCAT ... SEPARATOR n'existe qu'en MySQL)
+        genre_pairs = pd.read_sql(
             """
-            SELECT fg.film_id AS film_tmdb_id, GROUP_CONCAT(g.name ORDER BY g.name SEPARATOR ',') AS genres
+            SELECT fg.film_id AS film_tmdb_id, g.name AS genre
             FROM film_genre fg
             JOIN genre g ON g.id = fg.genre_id
-            GROUP BY fg.film_id
             """,
             conn,
         )
+    genres_df = (
+        genre_pairs.sort_values(["film_tmdb_id", "genre"])
+        .groupby("film_tmdb_id", as_index=False)["genre"].agg(",".join)
+        .rename(columns={"genre": "genres"})
+    )
 
     if films_df.empty:
         return pd.DataFrame(columns=["film_tmdb_id", "title", "poster_path", "director", "genres"])
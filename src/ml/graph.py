@@ -0,0 +1,140 @@
+# src/ml/graph.py
+"""
+Recommandations par PageRank personnalisé sur le graphe films — personnes — genres.
+
+Le graphe est la matrice de features X du recommender vue comme un biparti :
+    noeuds 0..n-1       films
+    noeuds n..n+m-1     features (genres, réalisateurs, acteurs), arêtes pondérées par X
+Marche aléatoire avec retour aux films graines (probabilité ALPHA à chaque pas) :
+contrairement au k-NN, deux films sans feature commune mais reliés par un troisième
+(même acteur d'un côté, même réalisateur de l'autre) reçoivent du score.
+
+Deux méthodes :
+  - "push" (défaut) : itération de puissance restreinte à la frontière (Andersen, Chung &
+    Lang) — à chaque tour, seuls les noeuds dont le résidu dépasse EPS × degré propagent,
+    par un produit creux sur leurs seules lignes ; arrêt quand plus aucun noeud n'est actif.
+    Coût borné par ~1 / (EPS × ALPHA), indépendant de la taille du catalogue.
+  - "power" : itération de puissance complète (P^T @ v), arrêt quand ‖Δ‖₁ < TOL ;
+    exacte, sert de référence.
+
+Le PageRank personnalisé est linéaire en la distribution des graines : le vecteur de
+plusieurs graines est la moyenne des vecteurs de chacune. Les vecteurs des graines
+fréquentes sont gardés en cache (tronqués à CACHE_TOP films) et recombinés.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+ALPHA = float(os.getenv("PPR_ALPHA", "0.15"))          # probabilité de retour aux graines
+EPS = float(os.getenv("PPR_EPS", "1e-5"))              # seuil de résidu (relatif au degré) du push
+TOL = 1e-6                                             # arrêt de l'itération complète (‖Δ‖₁)
+MAX_ROUNDS = 100
+CACHE_SIZE = int(os.getenv("PPR_CACHE_SIZE", "2048"))  # graines gardées en cache (0 = pas de cache)
+CACHE_TOP = 2000                                       # films conservés par vecteur en cache
+
+
+class FilmGraph:
+    """Graphe biparti films / features, matrice de transition P (lignes stochastiques) en CSR."""
+
+    def __init__(self, X: sparse.csr_matrix):
+        self.n_films, n_feats = X.shape
+        B = abs(X).astype(np.float32).tocsr()
+        A = sparse.bmat([[None, B], [B.T.tocsr(), None]], format="csr", dtype=np.float32)
+        self.degree = np.asarray(A.sum(axis=1), dtype=np.float64).ravel()
+        inv = np.divide(1.0, self.degree, out=np.zeros_like(self.degree), where=self.degree > 0)
+        self.P = (sparse.diags(inv.astype(np.float32)) @ A).tocsr()
+        self.n_nodes = self.P.shape[0]
+        self._cache: "OrderedDict[int, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- PageRank personnalisé ----------
+    def _push(self, seeds: np.ndarray, alpha: float, eps: float) -> np.ndarray:
+        r = np.zeros(self.n_nodes, dtype=np.float64)
+        p = np.zeros(self.n_nodes, dtype=np.float64)
+        np.add.at(r, seeds, 1.0 / seeds.size)
+        thresh = eps * self.degree
+        active = np.unique(seeds)
+        for _ in range(MAX_ROUNDS):
+            if active.size == 0:
+                break
+            R = r[active]
+            r[active] = 0.0
+            p[active] += alpha * R
+            sub = self.P[active]
+            spread = sub.data * np.repeat((1.0 - alpha) * R, np.diff(sub.indptr))
+            r += np.bincount(sub.indices, weights=spread, minlength=self.n_nodes)
+            touched = np.unique(sub.indices)
+            active = touched[r[touched] > thresh[touched]]
+        return p[: self.n_films]
+
+    def _power(self, seeds: np.ndarray, alpha: float, tol: float) -> np.ndarray:
+        s = np.zeros(self.n_nodes, dtype=np.float64)
+        np.add.at(s, seeds, 1.0 / seeds.size)
+        v = s.copy()
+        PT = self.P.T
+        for _ in range(MAX_ROUNDS):
+            nxt = alpha * s + (1.0 - alpha) * (PT @ v)
+            delta = float(np.abs(nxt - v).sum())
+            v = nxt
+            if delta < tol:
+                break
+        return v[: self.n_films]
+
+    def ppr(self, seed_rows: Iterable[int], method: str = "push", alpha: float = ALPHA,
+            eps: float = EPS) -> np.ndarray:
+        """Scores PPR (dense, par ligne de film) pour une distribution uniforme sur `seed_rows`."""
+        seeds = np.asarray(list(seed_rows), dtype=np.int64)
+        if seeds.size == 0:
+            return np.zeros(self.n_films, dtype=np.float64)
+        if method == "power":
+            return self._power(seeds, alpha, TOL)
+        return self._push(seeds, alpha, eps)
+
+    # ---------- Cache par graine ----------
+    def _seed_vector(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            hit = self._cache.get(row)
+            if hit is not None:
+                self._cache.move_to_end(row)
+                return hit
+        scores = self._push(np.array([row], dtype=np.int64), ALPHA, EPS)
+        nz = np.flatnonzero(scores)
+        if nz.size > CACHE_TOP:
+            nz = nz[np.argpartition(-scores[nz], CACHE_TOP - 1)[:CACHE_TOP]]
+        vec = (nz.astype(np.int64), scores[nz].astype(np.float32))
+        with self._lock:
+            self._cache[row] = vec
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return vec
+
+    def ppr_cached(self, seed_rows: Iterable[int]) -> np.ndarray:
+        """Comme `ppr`, par moyenne des vecteurs (mis en cache) de chaque graine."""
+        seeds = list(dict.fromkeys(int(r) for r in seed_rows))
+        out = np.zeros(self.n_films, dtype=np.float64)
+        for row in seeds:
+            idx, val = self._seed_vector(row)
+            out[idx] += val
+        if seeds:
+            out /= len(seeds)
+        return out
+
+    def warm(self, seed_rows: Iterable[int]) -> int:
+        """Précalcule les vecteurs des graines données (ex. films les plus populaires)."""
+        n = 0
+        for row in seed_rows:
+            if n >= CACHE_SIZE:
+                break
+            self._seed_vector(int(row))
+            n += 1
+        return n
+
+    @property
+    def cached_seeds(self) -> int:
+        return len(self._cache)
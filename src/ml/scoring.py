@@ -0,0 +1,54 @@
+# src/ml/scoring.py
+"""
+Noyaux de scoring du k-NN, sans état : partagés par le recommender (catalogue entier) et
+par les serveurs de shards (src/ml/shards.py, une tranche de lignes chacun). Ne dépend que
+de numpy / scipy : un serveur de shard n'importe ni pandas ni SQLAlchemy.
+
+Calculés ligne à ligne, les scores d'une tranche sont identiques à ceux des mêmes lignes
+dans le vecteur complet, et topk ordonne les ex aequo par ligne : le classement ne dépend
+pas du découpage.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+from scipy import sparse
+
+
+def cosine_scores(X: sparse.csr_matrix, p: np.ndarray, row_norms: np.ndarray,
+                  pn: Optional[float] = None) -> np.ndarray:
+    """Cosinus entre chaque ligne de X et le vecteur dense `p` (0 pour les lignes vides) ; `pn` = ‖p‖."""
+    pn = float(np.linalg.norm(p)) if pn is None else pn
+    if pn == 0.0:
+        return np.zeros(X.shape[0], dtype=np.float32)
+    dots = X @ p
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = dots / (row_norms * pn)
+    return np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
+
+
+def add_priors(scores: np.ndarray, priors: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    """scores + Σ coefficient × a priori (en place, float32)."""
+    for p, w in weights.items():
+        if w:
+            scores += np.float32(w) * priors[p]
+    return scores
+
+
+def topk(scores: np.ndarray, k: int, exclude: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Indices des k meilleurs scores, décroissants ; `exclude` : masque booléen des lignes à écarter.
+    Ordre total (score décroissant, puis indice croissant) : parmi des ex aequo au seuil, les plus
+    petits indices sont retenus, d'où le même résultat sur le vecteur complet ou tranche par tranche.
+    """
+    if exclude is not None and exclude.any():
+        scores = np.where(exclude, -np.inf, scores)
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    kth = scores[top].min()
+    above = top[scores[top] > kth]
+    top = np.concatenate([above, np.flatnonzero(scores == kth)[: k - above.size]])
+    return top[np.lexsort((top, -scores[top]))]
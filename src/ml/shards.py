@@ -0,0 +1,409 @@
+# src/ml/shards.py
+"""
+Index partitionné : scoring k-NN réparti sur plusieurs process (scatter-gather).
+
+Les lignes de X sont découpées en N tranches contiguës ; chaque tranche est servie par un
+serveur de shard (un process) qui garde sa sous-matrice, ses normes et ses a priori, et
+répond à une requête par son top-k local (src/ml/scoring.py, mêmes scores qu'en local).
+Le coordinateur (le process de l'API) envoie le profil des graines à tous les shards puis
+fusionne les top-k triés (heapq.merge) : le scoring d'une requête occupe N cœurs au lieu d'un.
+
+Transport : multiprocessing.connection (pickle sur socket, authentification par clé partagée).
+  - RECO_SHARDS=N               N serveurs locaux lancés par le coordinateur, sur des sockets
+                                Unix d'un répertoire temporaire (arrêtés avec lui)
+  - RECO_SHARD_ADDRESSES=a,b    serveurs déjà lancés, sur cette machine ou d'autres :
+                                "/chemin.sock" ou "hôte:port", clé RECO_SHARD_AUTHKEY ;
+                                un serveur se lance avec  python -m src.ml.shards --address hôte:port
+Les tranches sont poussées aux shards à chaque construction d'index, sous la version de
+l'index (déterministe) : plusieurs workers de l'API peuvent partager les mêmes serveurs, une
+version déjà chargée n'est pas renvoyée. Une requête porte la version : tant que tous les
+shards ne l'ont pas (chargement en cours, shard tombé), le recommender calcule en local.
+Un shard qui ne répond pas en RECO_SHARD_TIMEOUT_S secondes (RECO_SHARD_LOAD_TIMEOUT_S pour un
+chargement) est traité comme tombé : la requête se rabat sur le scoring local.
+
+En dessous de RECO_SHARD_MIN_ROWS films, l'aller-retour coûte plus que le scoring : pas de shards.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import heapq
+import itertools
+import logging
+import os
+import queue
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from src.core import metrics
+from src.ml import scoring
+
+SHARDS = int(os.getenv("RECO_SHARDS", "0"))
+ADDRESSES = [a.strip() for a in os.getenv("RECO_SHARD_ADDRESSES", "").split(",") if a.strip()]
+AUTHKEY_ENV = "RECO_SHARD_AUTHKEY"
+MIN_ROWS = int(os.getenv("RECO_SHARD_MIN_ROWS", "50000"))
+CONNECT_TIMEOUT_S = 10.0
+QUERY_TIMEOUT_S = float(os.getenv("RECO_SHARD_TIMEOUT_S", "2"))          # réponse à une requête top-k
+LOAD_TIMEOUT_S = float(os.getenv("RECO_SHARD_LOAD_TIMEOUT_S", "300"))    # chargement d'une tranche
+KEEP_VERSIONS = 2  # versions gardées par shard : les requêtes en cours finissent sur l'ancienne
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = metrics.Counter("reco_shard_queries_total",
+                          "Requêtes k-NN envoyées aux shards, par issue (ok | stale | error)", ["outcome"])
+log = logging.getLogger("shards")
+
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(s: str) -> Address:
+    """"hôte:port" -> (hôte, port) ; sinon chemin de socket Unix."""
+    host, sep, port = s.rpartition(":")
+    if sep and port.isdigit() and "/" not in s:
+        return host, int(port)
+    return s
+
+
+def enabled() -> bool:
+    return bool(ADDRESSES) or SHARDS > 1
+
+
+def bounds(n_rows: int, n_shards: int) -> np.ndarray:
+    """Limites des tranches : shard i = lignes [b[i], b[i+1])."""
+    return np.linspace(0, n_rows, n_shards + 1).astype(np.int64)
+
+
+# ---------- Serveur de shard ----------
+class _Slice:
+    __slots__ = ("lo", "X", "norms", "priors")
+
+    def __init__(self, lo: int, X: sparse.csr_matrix, norms: np.ndarray, priors: Dict[str, np.ndarray]):
+        self.lo = lo
+        self.X = X
+        self.norms = norms
+        self.priors = priors
+
+    def topk(self, cols: np.ndarray, vals: np.ndarray, pn: float, weights: Dict[str, float],
+             exclude: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        p = np.zeros(self.X.shape[1], dtype=np.float32)
+        p[cols] = vals
+        scores = scoring.add_priors(scoring.cosine_scores(self.X, p, self.norms, pn), self.priors, weights)
+        local = exclude - self.lo
+        mask = np.zeros(scores.size, dtype=bool)
+        mask[local[(local >= 0) & (local < scores.size)]] = True
+        top = scoring.topk(scores, k, exclude=mask)
+        return top + self.lo, scores[top]
+
+
+class _ShardState:
+    """Tranches chargées dans ce serveur, par version d'index (les KEEP_VERSIONS dernières)."""
+
+    def __init__(self):
+        self.slices: "OrderedDict[str, _Slice]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, version: str) -> Optional[_Slice]:
+        with self.lock:
+            return self.slices.get(version)
+
+    def put(self, version: str, sl: _Slice) -> None:
+        with self.lock:
+            self.slices[version] = sl
+            self.slices.move_to_end(version)
+            while len(self.slices) > KEEP_VERSIONS:
+                self.slices.popitem(last=False)
+
+
+def _handle(msg: tuple, state: _ShardState) -> tuple:
+    op = msg[0]
+    if op == "topk":
+        _, version, cols, vals, pn, weights, exclude, k = msg
+        sl = state.get(version)
+        if sl is None:
+            return ("stale",)
+        return ("ok", *sl.topk(cols, vals, pn, weights, exclude, k))
+    if op == "has":
+        return ("ok", state.get(msg[1]) is not None)
+    if op == "load":
+        _, version, lo, data, indices, indptr, shape, norms, priors = msg
+        state.put(version, _Slice(lo, sparse.csr_matrix((data, indices, indptr), shape=shape), norms, priors))
+        return ("ok",)
+    return ("error", f"opération inconnue : {op!r}")
+
+
+def _serve_conn(conn: Connection, state: _ShardState) -> None:
+    with conn:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                reply = _handle(msg, state)
+            except Exception as e:  # une requête invalide ne doit pas tuer le shard
+                reply = ("error", repr(e))
+            try:
+                conn.send(reply)
+            except OSError:  # coordinateur parti entre-temps
+                return
+
+
+def _watch_parent(pid: int) -> None:
+    while os.getppid() == pid:
+        time.sleep(1.0)
+    os._exit(0)  # coordinateur disparu sans arrêter ses shards
+
+
+def serve(address: Address, authkey: bytes, parent: Optional[int] = None) -> None:
+    """Boucle du serveur : une connexion par thread (un coordinateur en ouvre une par requête concurrente)."""
+    if parent:
+        threading.Thread(target=_watch_parent, args=(parent,), daemon=True).start()
+    state = _ShardState()
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                continue
+            threading.Thread(target=_serve_conn, args=(conn, state), daemon=True).start()
+
+
+# ---------- Coordinateur ----------
+class ShardSet:
+    """Connexions aux serveurs de shards : chargement des tranches et requêtes scatter-gather ; thread-safe."""
+
+    def __init__(self, addresses: Sequence[Address], authkey: bytes,
+                 procs: Sequence[subprocess.Popen] = (), workdir: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None):
+        self.addresses = list(addresses)
+        self.authkey = authkey
+        self.version: Optional[str] = None  # version chargée sur tous les shards
+        self._procs = list(procs)
+        self._workdir = workdir
+        self._env = env
+        self._idle: "queue.LifoQueue[List[Connection]]" = queue.LifoQueue()
+        self._load_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    @classmethod
+    def spawn(cls, n: int) -> "ShardSet":
+        """Lance `n` serveurs locaux (sockets Unix), arrêtés avec ce process."""
+        authkey = secrets.token_hex(16)
+        workdir = tempfile.mkdtemp(prefix="reco-shards-")
+        env = {**os.environ, AUTHKEY_ENV: authkey,
+               "PYTHONPATH": os.pathsep.join(filter(None, [_ROOT, os.environ.get("PYTHONPATH")]))}
+        addresses = [os.path.join(workdir, f"shard-{i}.sock") for i in range(n)]
+        procs = [_launch(path, env) for path in addresses]
+        shard_set = cls(addresses, authkey.encode(), procs, workdir, env)
+        atexit.register(shard_set.close)
+        return shard_set
+
+    @classmethod
+    def from_env(cls) -> Optional["ShardSet"]:
+        if ADDRESSES:
+            key = os.getenv(AUTHKEY_ENV)
+            if not key:
+                raise ValueError(f"RECO_SHARD_ADDRESSES exige {AUTHKEY_ENV}")
+            return cls([parse_address(a) for a in ADDRESSES], key.encode())
+        if SHARDS > 1:
+            return cls.spawn(SHARDS)
+        return None
+
+    def _drop_idle(self) -> None:
+        while True:
+            try:
+                conns = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _close_all(conns)
+
+    def _revive(self) -> None:
+        """Relance les serveurs locaux arrêtés (chargés ensuite comme les autres)."""
+        dead = [i for i, p in enumerate(self._procs) if p.poll() is not None]
+        if not dead:
+            return
+        self._drop_idle()  # ces connexions pointent encore vers les serveurs morts
+        for i in dead:
+            log.warning("shards: serveur %s arrêté (code %s), relancé", self.addresses[i], self._procs[i].returncode)
+            self._procs[i] = _launch(self.addresses[i], self._env)  # type: ignore[arg-type]
+
+    def close(self) -> None:
+        self._drop_idle()
+        for p in self._procs:
+            p.terminate()
+        for p in self._procs:
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        self._procs = []
+        if self._workdir:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+
+    # --- connexions ---
+    def _connect(self, address: Address, wait: bool) -> Connection:
+        deadline = time.monotonic() + (CONNECT_TIMEOUT_S if wait else 0.0)
+        while True:
+            try:
+                return Client(address, authkey=self.authkey)
+            except (FileNotFoundError, ConnectionRefusedError):  # serveur pas (encore) à l'écoute
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    @contextmanager
+    def _channel(self, wait: bool = False) -> Iterator[List[Connection]]:
+        """Une connexion par shard, réservée à la requête en cours (réutilisée ensuite)."""
+        try:
+            conns = self._idle.get_nowait()
+        except queue.Empty:
+            conns = []
+            try:
+                for a in self.addresses:
+                    conns.append(self._connect(a, wait))
+            except BaseException:
+                _close_all(conns)
+                raise
+        try:
+            yield conns
+        except BaseException:
+            _close_all(conns)  # état du protocole inconnu : on ne la réutilise pas
+            raise
+        self._idle.put(conns)
+
+    def _scatter(self, msgs: Sequence[tuple], timeout: float, wait: bool = False) -> List[tuple]:
+        """Envoie msgs[i] au shard i puis attend les réponses ; TimeoutError au-delà de `timeout` secondes."""
+        with self._channel(wait) as conns:
+            for conn, msg in zip(conns, msgs):
+                conn.send(msg)
+            deadline = time.monotonic() + timeout
+            replies = []
+            for conn in conns:
+                # shard bloqué : sans délai, recv() attendrait indéfiniment ; la connexion est
+                # fermée par _channel (réponse tardive encore en vol)
+                if not conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"pas de réponse en {timeout:g} s")
+                replies.append(conn.recv())
+            return replies
+
+    # --- chargement ---
+    def load(self, version: str, X: sparse.csr_matrix, norms: np.ndarray, priors: Dict[str, np.ndarray]) -> None:
+        """Pousse à chaque shard sa tranche de l'index `version` (sauf s'il l'a déjà)."""
+        with self._load_lock:
+            self._revive()
+            b = bounds(X.shape[0], len(self))
+            has = self._scatter([("has", version)] * len(self), LOAD_TIMEOUT_S, wait=True)
+            msgs = []
+            for i, reply in enumerate(has):
+                if reply[0] == "ok" and reply[1]:
+                    msgs.append(("has", version))
+                    continue
+                lo, hi = int(b[i]), int(b[i + 1])
+                part = X[lo:hi]
+                msgs.append(("load", version, lo, part.data, part.indices, part.indptr, part.shape,
+                             norms[lo:hi], {p: a[lo:hi] for p, a in priors.items()}))
+            replies = self._scatter(msgs, LOAD_TIMEOUT_S)
+            bad = [r for r in replies if r[0] != "ok"]
+            if bad:
+                raise RuntimeError(f"chargement des shards en échec : {bad[0]}")
+            self.version = version
+
+    # --- requêtes ---
+    def topk(self, version: str, p: np.ndarray, pn: float, weights: Dict[str, float],
+             exclude: Sequence[int], k: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (lignes, scores) des k meilleurs films du catalogue, hors `exclude` (lignes de l'index),
+        comme scoring.topk sur le vecteur complet ; None si un shard n'a pas `version` ou ne répond pas.
+        """
+        if version != self.version:
+            return None
+        cols = np.flatnonzero(p)
+        msg = ("topk", version, cols.astype(np.int32), p[cols], pn, weights,
+               np.asarray(exclude, dtype=np.int64), int(k))
+        try:
+            replies = self._scatter([msg] * len(self), QUERY_TIMEOUT_S)
+        except (OSError, EOFError) as e:
+            # shard injoignable ou muet (TimeoutError est un OSError) : scoring local jusqu'au
+            # prochain chargement (prochaine construction)
+            log.warning("shards: requête en échec (%s), scoring local jusqu'au prochain index", e)
+            QUERIES.inc(outcome="error")
+            if self.version == version:
+                self.version = None
+            return None
+        if any(r[0] != "ok" for r in replies):
+            QUERIES.inc(outcome="stale")
+            return None
+        QUERIES.inc(outcome="ok")
+        # chaque shard renvoie son top-k trié par (-score, ligne) : fusion des listes triées,
+        # même ordre total que scoring.topk sur le vecteur complet
+        runs = [zip((-s).tolist(), rows.tolist()) for _, rows, s in replies]
+        best = list(itertools.islice(heapq.merge(*runs), k))
+        return (np.array([r for _, r in best], dtype=np.int64),
+                np.array([-s for s, _ in best], dtype=np.float32))
+
+
+def _launch(path: str, env: Dict[str, str]) -> subprocess.Popen:
+    """Serveur de shard local sur la socket Unix `path`, arrêté si ce process disparaît."""
+    if os.path.exists(path):
+        os.unlink(path)  # socket d'un serveur mort
+    return subprocess.Popen(
+        [sys.executable, "-m", "src.ml.shards", "--address", path, "--parent", str(os.getpid())],
+        env=env, cwd=_ROOT,
+    )
+
+
+def _close_all(conns: List[Connection]) -> None:
+    for c in conns:
+        try:
+            c.close()
+        except OSError:
+            pass
+
+
+_set: Optional[ShardSet] = None
+_set_lock = threading.Lock()
+
+
+def get() -> Optional[ShardSet]:
+    """Shards configurés (lancés au premier appel), ou None si désactivés."""
+    global _set
+    if _set is None and enabled():
+        with _set_lock:
+            if _set is None:
+                _set = ShardSet.from_env()
+    return _set
+
+
+def current() -> Optional[ShardSet]:
+    """Shards déjà lancés (sans les créer) : chemin des requêtes."""
+    return _set
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Serveur de shard du recommender (cf. src/ml/shards.py)")
+    ap.add_argument("--address", required=True, help='socket Unix ("/chemin.sock") ou "hôte:port"')
+    ap.add_argument("--parent", type=int, default=None, help="pid du coordinateur : arrêt quand il disparaît")
+    args = ap.parse_args(argv)
+    key = os.getenv(AUTHKEY_ENV)
+    if not key:
+        sys.exit(f"{AUTHKEY_ENV} requis (clé partagée avec le coordinateur)")
+    serve(parse_address(args.address), key.encode(), parent=args.parent)
+
+
+if __name__ == "__main__":
+    main()
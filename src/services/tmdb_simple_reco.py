@@ -1,16 +1,39 @@
 # src/services/tmdb_simple_reco.py
 from __future__ import annotations
-import os, time
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
 import requests
-from typing import Dict, List, Any, Tuple
 from dotenv import load_dotenv  # pip install python-dotenv
 load_dotenv()
 
+from src.core.tmdb_client import limiter  # même seau de jetons que le reste de l'API
+
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")
-TMDB_BASE = "https://api.themoviedb.org/3"
+TMDB_BASE = os.getenv("TMDB_BASE", "https://api.themoviedb.org/3")
 LANG = os.getenv("TMDB_LANG", "fr-FR")
 REGION = os.getenv("TMDB_REGION", "FR")
 
+# appels TMDb en parallèle (le débit reste borné par `limiter`, TMDB_RATE_LIMIT req/s)
+WORKERS = int(os.getenv("TMDB_SIMPLE_WORKERS", "16"))
+_pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="tmdb-simple")
+_local = threading.local()
+
+# pondération du score (overlaps réalisateurs / acteurs / genres) et de la popularité
+W_DIR, W_CAST, W_GEN, POP_SCALE = 3.0, 2.0, 1.0, 100.0
+TOP_CAST = 6
+
+def _session() -> requests.Session:
+    # une session (keep-alive) par thread : requests.Session n'est pas garanti thread-safe
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+    return s
+
 def _tmdb_get(path: str, params: dict | None = None) -> dict:
     if not TMDB_API_KEY:
         raise RuntimeError("TMDB_API_KEY manquant")
@@ -21,161 +44,178 @@ def _tmdb_get(path: str, params: dict | None = None) -> dict:
     else:  # clé v3
         params["api_key"] = TMDB_API_KEY
     params.setdefault("language", LANG)
-    r = requests.get(f"{TMDB_BASE}{path}", params=params, headers=headers, timeout=15)
+    limiter.acquire()
+    r = _session().get(f"{TMDB_BASE}{path}", params=params, headers=headers, timeout=15)
     r.raise_for_status()
     return r.json()
 
+@lru_cache(maxsize=4096)
 def _movie_details_and_credits(tmdb_id: int) -> dict:
+    # partagé entre requêtes : un film déjà vu (graine ou candidat) ne coûte plus d'appel
     return _tmdb_get(f"/movie/{tmdb_id}", {"append_to_response": "credits"})
 
+def _details_many(ids: Iterable[int]) -> Dict[int, Optional[dict]]:
+    """Détails+crédits de `ids` (dédoublonnés) en parallèle ; None pour un appel en échec."""
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    futures = {i: _pool.submit(_movie_details_and_credits, i) for i in ids}
+    out: Dict[int, Optional[dict]] = {}
+    for i, f in futures.items():
+        try:
+            out[i] = f.result()
+        except Exception:
+            out[i] = None
+    return out
+
 def _similar_movies(tmdb_id: int, pages: int = 1) -> List[dict]:
     out = []
     for p in range(1, pages + 1):
         data = _tmdb_get(f"/movie/{tmdb_id}/similar", {"page": p, "region": REGION})
         out.extend(data.get("results", []))
-        time.sleep(0.05)
     return out
 
-def _discover_candidates(with_cast: List[int], with_crew: List[int], with_genres: List[int]) -> List[dict]:
+def _discover_params(with_cast: List[int], with_crew: List[int], with_genres: List[int]) -> List[dict]:
     # On fait quelques appels discover “OR” (TMDb traite les ids séparés par virgules comme OR)
-    results = []
+    base = {"sort_by": "popularity.desc", "include_adult": "false", "page": 1, "region": REGION}
+    calls = []
     if with_cast:
-        data = _tmdb_get("/discover/movie", {
-            "with_cast": ",".join(str(i) for i in with_cast[:6]),
-            "sort_by": "popularity.desc",
-            "include_adult": "false",
-            "page": 1, "region": REGION
-        })
-        results.extend(data.get("results", []))
-        time.sleep(0.05)
+        calls.append({**base, "with_cast": ",".join(str(i) for i in with_cast[:6])})
     if with_crew:
-        data = _tmdb_get("/discover/movie", {
-            "with_crew": ",".join(str(i) for i in with_crew[:4]),
-            "sort_by": "popularity.desc",
-            "include_adult": "false",
-            "page": 1, "region": REGION
-        })
-        results.extend(data.get("results", []))
-        time.sleep(0.05)
+        calls.append({**base, "with_crew": ",".join(str(i) for i in with_crew[:4])})
     if with_genres:
-        data = _tmdb_get("/discover/movie", {
-            "with_genres": ",".join(str(i) for i in with_genres[:6]),
-            "sort_by": "popularity.desc",
-            "include_adult": "false",
-            "page": 1, "region": REGION
-        })
-        results.extend(data.get("results", []))
+        calls.append({**base, "with_genres": ",".join(str(i) for i in with_genres[:6])})
+    return calls
+
+def _discover_candidates(with_cast: List[int], with_crew: List[int], with_genres: List[int]) -> List[dict]:
+    futures = [_pool.submit(_tmdb_get, "/discover/movie", p) for p in _discover_params(with_cast, with_crew, with_genres)]
+    results = []
+    for f in futures:
+        results.extend(f.result().get("results", []))
     return results
 
-def _collect_seed_features(seed_ids: List[int]) -> Tuple[set, set, set, Dict[int, dict]]:
+def _features(d: dict) -> Tuple[List[int], List[int], List[int]]:
+    """(genres, réalisateurs, acteurs du top TOP_CAST) d'une réponse détails+crédits."""
+    genres = [int(g["id"]) for g in d.get("genres", []) or [] if g.get("id")]
+    credits = d.get("credits", {}) or {}
+    dirs = [int(c["id"]) for c in credits.get("crew") or [] if c.get("job") == "Director" and c.get("id")]
+    cast = sorted(credits.get("cast") or [], key=lambda x: x.get("order", 999))[:TOP_CAST]
+    return genres, dirs, [int(a["id"]) for a in cast if a.get("id")]
+
+def _collect_seed_features(seed_meta: Dict[int, dict]) -> Tuple[set, set, set]:
     cast_ids, crew_dir_ids, genre_ids = set(), set(), set()
-    seed_meta: Dict[int, dict] = {}
-    for sid in seed_ids:
-        d = _movie_details_and_credits(sid)
-        seed_meta[sid] = d
-        # genres
-        for g in d.get("genres", []) or []:
-            if g.get("id"): genre_ids.add(int(g["id"]))
-        # crew -> director ids
-        for c in (d.get("credits", {}).get("crew") or []):
-            if c.get("job") == "Director" and c.get("id"):
-                crew_dir_ids.add(int(c["id"]))
-        # cast (top 6)
-        cast = sorted((d.get("credits", {}).get("cast") or []), key=lambda x: x.get("order", 999))[:6]
-        for a in cast:
-            if a.get("id"): cast_ids.add(int(a["id"]))
-        time.sleep(0.05)
-    return cast_ids, crew_dir_ids, genre_ids, seed_meta
-
-def _score_candidate(c: dict, seed_feats: Tuple[set, set, set, Dict[int, dict]]) -> Tuple[float, str]:
-    cast_ids, crew_dir_ids, genre_ids, _ = seed_feats
-    # Features du candidat (en récupérant crédits si nécessaire pour meilleure raison)
-    cand_cast_ids, cand_dir_ids, cand_gen_ids = set(), set(), set()
-    # Les résultats discover/similar n'ont pas toujours genres détaillés ⇒ on essaie d'éviter un appel de plus,
-    # mais pour une bonne raison on peut appeler les détails UNE fois si besoin.
-    genres = c.get("genre_ids") or []
-    for gid in genres:
-        cand_gen_ids.add(int(gid))
-    # On fetch crédits d’un coup si on n’a pas assez de signal
-    need_details = True
-    if cand_gen_ids & genre_ids:
-        need_details = False
-    if need_details:
-        try:
-            det = _movie_details_and_credits(int(c["id"]))
-            for g in det.get("genres", []) or []:
-                cand_gen_ids.add(int(g["id"]))
-            for cr in (det.get("credits", {}).get("crew") or []):
-                if cr.get("job") == "Director" and cr.get("id"):
-                    cand_dir_ids.add(int(cr["id"]))
-            cast = sorted((det.get("credits", {}).get("cast") or []), key=lambda x: x.get("order", 999))[:6]
-            for a in cast:
-                if a.get("id"): cand_cast_ids.add(int(a["id"]))
-        except Exception:
-            pass
+    for d in seed_meta.values():
+        genres, dirs, cast = _features(d)
+        genre_ids.update(genres)
+        crew_dir_ids.update(dirs)
+        cast_ids.update(cast)
+    return cast_ids, crew_dir_ids, genre_ids
+
+def _needs_details(c: dict, genre_ids: set) -> bool:
+    # Les résultats discover/similar n'ont que genre_ids : on ne va chercher les crédits
+    # que si les genres seuls ne recoupent pas les graines
+    return not ({int(g) for g in c.get("genre_ids") or []} & genre_ids)
 
-    # Overlaps
-    n_dir = len(cand_dir_ids & crew_dir_ids)
-    n_cast = len(cand_cast_ids & cast_ids)
-    n_gen = len(cand_gen_ids & genre_ids)
-    pop = float(c.get("popularity") or 0.0)
+def _overlaps(lists: List[List[int]], seed: set) -> np.ndarray:
+    """Nombre d'éléments de chaque liste présents dans `seed` (un seul isin + bincount)."""
+    lengths = np.fromiter((len(x) for x in lists), dtype=np.int64, count=len(lists))
+    if not lengths.sum() or not seed:
+        return np.zeros(len(lists), dtype=np.int64)
+    flat = np.fromiter((v for x in lists for v in x), dtype=np.int64, count=int(lengths.sum()))
+    owner = np.repeat(np.arange(len(lists)), lengths)
+    hit = np.isin(flat, np.fromiter(seed, dtype=np.int64, count=len(seed)))
+    return np.bincount(owner[hit], minlength=len(lists))
+
+def _score_candidates(cands: List[dict], details: Dict[int, Optional[dict]],
+                      seed_feats: Tuple[set, set, set]) -> Tuple[np.ndarray, List[str]]:
+    """Scores et raisons de tous les candidats d'un coup."""
+    cast_ids, crew_dir_ids, genre_ids = seed_feats
+    gens, dirs, casts = [], [], []
+    for c in cands:
+        g = {int(x) for x in c.get("genre_ids") or []}
+        d, a = [], []
+        det = details.get(int(c["id"]))
+        if det is not None:
+            dg, d, a = _features(det)
+            g.update(dg)
+        gens.append(list(g))
+        dirs.append(list(set(d)))
+        casts.append(list(set(a)))
+
+    n_dir = _overlaps(dirs, crew_dir_ids)
+    n_cast = _overlaps(casts, cast_ids)
+    n_gen = _overlaps(gens, genre_ids)
+    pop = np.array([float(c.get("popularity") or 0.0) for c in cands])
 
     # Score pondéré simple
-    score = 3.0 * n_dir + 2.0 * n_cast + 1.0 * n_gen + (pop / 100.0)
+    score = W_DIR * n_dir + W_CAST * n_cast + W_GEN * n_gen + pop / POP_SCALE
 
     # Raison courte (priorité: dir > cast > genres)
-    reason = "Proximité de style et thématiques"
-    if n_dir > 0:
-        # on n’a pas les noms ici; pour afficher un nom, on refait un petit lookup via credits si pas déjà fait
-        if not cand_dir_ids:
-            try:
-                det = _movie_details_and_credits(int(c["id"]))
-                cand_dir_ids = {int(cr["id"]) for cr in det.get("credits", {}).get("crew") or [] if cr.get("job")=="Director" and cr.get("id")}
-            except Exception:
-                pass
-        reason = "Même réalisateur"
-    elif n_cast >= 2:
-        reason = "Acteurs en commun"
-    elif n_cast == 1:
-        reason = "Acteur en commun"
-    elif n_gen > 0:
-        reason = "Genres proches"
-
-    return score, reason
+    reasons = np.select(
+        [n_dir > 0, n_cast >= 2, n_cast == 1, n_gen > 0],
+        ["Même réalisateur", "Acteurs en commun", "Acteur en commun", "Genres proches"],
+        default="Proximité de style et thématiques",
+    )
+    return score, reasons.tolist()
 
 def recommend_simple(seed_ids: List[int], k: int = 12) -> List[Dict[str, Any]]:
+    """
+    Recommandations 100 % TMDb. Trois vagues d'appels parallèles :
+      1. détails des graines + /similar de chaque graine
+      2. /discover (features des graines) + détails des candidats /similar qui en ont besoin
+      3. détails des candidats apportés par /discover
+    """
     if not seed_ids:
         return []
-    cast_ids, crew_dir_ids, genre_ids, seed_meta = _collect_seed_features(seed_ids)
+    seeds = list(dict.fromkeys(int(s) for s in seed_ids))
+
+    # 1. graines et /similar
+    similar_f = [_pool.submit(_similar_movies, sid, 1) for sid in seeds]
+    seed_meta = {sid: d for sid, d in _details_many(seeds).items() if d is not None}
+    cast_ids, crew_dir_ids, genre_ids = _collect_seed_features(seed_meta)
 
     # Candidats = union (similar) + discover
-    candidates = {}
-    for sid in seed_ids:
-        for c in _similar_movies(sid, pages=1):
-            candidates[c["id"]] = c
-    disc = _discover_candidates(list(cast_ids), list(crew_dir_ids), list(genre_ids))
-    for c in disc:
+    candidates: Dict[int, dict] = {}
+    for f in similar_f:
+        try:
+            for c in f.result():
+                candidates[c["id"]] = c
+        except Exception:
+            continue
+    seed_set = set(seeds)
+
+    # 2. /discover pendant que les détails des candidats /similar arrivent
+    wanted = [cid for cid, c in candidates.items() if cid not in seed_set and _needs_details(c, genre_ids)]
+    details_f = {cid: _pool.submit(_movie_details_and_credits, int(cid)) for cid in wanted}
+    for c in _discover_candidates(list(cast_ids), list(crew_dir_ids), list(genre_ids)):
         candidates[c["id"]] = c
 
+    # 3. détails des nouveaux candidats
+    details: Dict[int, Optional[dict]] = {}
+    extra = [cid for cid, c in candidates.items()
+             if cid not in seed_set and cid not in details_f and _needs_details(c, genre_ids)]
+    details.update(_details_many(extra))
+    for cid, f in details_f.items():
+        try:
+            details[int(cid)] = f.result()
+        except Exception:
+            details[int(cid)] = None
+
     # Score & raison
-    scored: List[Tuple[float, dict, str]] = []
-    feats = (cast_ids, crew_dir_ids, genre_ids, seed_meta)
-    for cid, c in candidates.items():
-        if int(cid) in seed_ids:
-            continue
-        s, reason = _score_candidate(c, feats)
-        scored.append((s, c, reason))
+    cands = [c for cid, c in candidates.items() if int(cid) not in seed_set]
+    if not cands:
+        return []
+    scores, reasons = _score_candidates(cands, details, (cast_ids, crew_dir_ids, genre_ids))
 
-    # Trier & formatter
-    scored.sort(key=lambda x: x[0], reverse=True)
+    # Trier & formatter (tri stable : à score égal, ordre d'arrivée des candidats)
+    order = np.argsort(-scores, kind="stable")[:k]
     out = []
-    for s, c, reason in scored[:k]:
+    for i in order:
+        c = cands[i]
         out.append({
             "tmdb_id": c["id"],
             "title": c.get("title") or c.get("original_title") or "(sans titre)",
             "poster_path": c.get("poster_path"),
             "overview": (c.get("overview") or "")[:360].strip(),
-            "reason": reason,
-            "score": round(float(s), 4),
+            "reason": reasons[i],
+            "score": round(float(scores[i]), 4),
         })
     return out
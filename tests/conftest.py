@@ -0,0 +1,50 @@
+# tests/conftest.py
+"""Fixtures partagées : catalogue synthétique en SQLite (benchmarks/synthetic.py), recommender branché dessus."""
+from __future__ import annotations
+
+import os
+
+import pytest
+
+# src.core.db exige DB_URL à l'import (ingestion) ; les tests passent leur propre engine
+os.environ.setdefault("DB_URL", "sqlite://")
+
+N_FILMS = 3000
+
+
+@pytest.fixture(scope="session")
+def catalog_db(tmp_path_factory) -> str:
+    from benchmarks.synthetic import make_catalog, to_sqlite
+
+    path = str(tmp_path_factory.mktemp("catalog") / "catalog.db")
+    to_sqlite(make_catalog(N_FILMS, seed=0), path)
+    return f"sqlite:///{path}"
+
+
+@pytest.fixture
+def recommender(catalog_db, tmp_path, monkeypatch):
+    """src.ml.recommender sur le catalogue de test (sans snapshot), profils dans tmp_path."""
+    from src.core import user_profiles
+    from src.ml import recommender as R
+
+    monkeypatch.setenv("CATALOG_SNAPSHOT_PATH", str(tmp_path / "no_snapshot"))
+    monkeypatch.setenv("USER_PROFILES_PATH", str(tmp_path / "profiles.db"))
+    monkeypatch.setattr(R, "DB_URL", catalog_db)
+    monkeypatch.setattr(R, "_engine", None)
+    monkeypatch.setattr(R, "_cache", None)
+    monkeypatch.setattr(user_profiles, "_store", None)
+    yield R
+    if user_profiles._store is not None:
+        user_profiles._store.close()
+
+
+@pytest.fixture
+def empty_db(tmp_path):
+    """Engine sur une base SQLite vide au schéma des migrations."""
+    from sqlalchemy import create_engine
+
+    from benchmarks.synthetic import migrate_sqlite
+
+    engine = create_engine(migrate_sqlite(str(tmp_path / "empty.db")))
+    yield engine
+    engine.dispose()
@@ -0,0 +1,31 @@
+# tests/test_als.py
+import numpy as np
+
+from src.ml import als
+
+
+def test_als_recovers_taste_cluster(tmp_path):
+    # deux groupes de goût : utilisateurs 0-19 -> films 100-104, 20-39 -> films 200-204
+    rng = np.random.default_rng(0)
+    users, items = [], []
+    for u in range(40):
+        pool = [100, 101, 102, 103, 104] if u < 20 else [200, 201, 202, 203, 204]
+        for i in rng.choice(pool, size=4, replace=False):
+            users.append(f"u{u}")
+            items.append(int(i))
+    # graine : a vu 100-103, le voisin évident est 104
+    users += ["probe"] * 4
+    items += [100, 101, 102, 103]
+    C, user_ids, item_ids = als.interactions_matrix(users, items)
+    X, Y = als.train(C, factors=2, iterations=10, workers=1, seed=0)  # un facteur par grappe
+    als.save(str(tmp_path / "als"), C, user_ids, item_ids, X, Y)
+
+    model = als.ALSModel(str(tmp_path / "als"))
+    row = model.user_row("probe")
+    scores = model.scores(row)
+    seen = set(model.seen_items(row).tolist())
+    assert seen == {100, 101, 102, 103}
+    ranked = [int(item_ids[i]) for i in np.argsort(-scores) if int(item_ids[i]) not in seen]
+    assert ranked[0] == 104
+    col = {int(i): k for k, i in enumerate(item_ids)}
+    assert scores[col[104]] > 0.9 and scores[col[200]] < 0.1
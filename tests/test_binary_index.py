@@ -0,0 +1,53 @@
+# tests/test_binary_index.py
+import numpy as np
+
+
+def _csr_bytes(X) -> int:
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def test_binary_index_smaller_than_x(recommender, monkeypatch):
+    monkeypatch.setattr(recommender, "RECO_INDEX", "binary")
+    recommender.refresh_cache()
+    c = recommender._cache
+    assert "blocks" not in c and "X" not in c
+    bits = c["bits"]
+    X = recommender._matrix()
+    # ~4 octets par coefficient (listes int32) contre 8 pour X, genres sur 1 à 2 octets par film
+    assert bits.nbytes() < 0.6 * _csr_bytes(X)
+
+
+def test_binary_features_match_one_hot(recommender, monkeypatch):
+    monkeypatch.setattr(recommender, "RECO_INDEX", "csr")
+    recommender.refresh_cache()
+    csr = recommender._cache
+    monkeypatch.setattr(recommender, "RECO_INDEX", "binary")
+    recommender.refresh_cache()
+    binary = recommender._cache
+    assert binary["version"] == csr["version"]
+    for b in recommender.BLOCKS:
+        for row in range(0, len(csr["films"]), 97):
+            assert np.array_equal(recommender._film_features(binary, b, row),
+                                  recommender._film_features(csr, b, row))
+        assert (recommender._one_hot_blocks(binary)[b] != csr["blocks"][b]).nnz == 0
+
+
+def test_binary_and_csr_same_top_k(recommender, monkeypatch):
+    films = None
+    got = {}
+    for mode in ("csr", "binary"):
+        monkeypatch.setattr(recommender, "RECO_INDEX", mode)
+        recommender.refresh_cache()
+        films = recommender._cache["films"].ids.tolist()
+        seeds = [films[5:6], films[10:12], films[100:103], films[7:8] * 2]
+        got[mode] = [
+            [r["tmdb_id"] for r in recommender.recommend(s, 20)] for s in seeds
+        ] + [
+            [r["tmdb_id"] for r in recommender.recommend(s, 20, {"quality": 0.3})] for s in seeds
+        ]
+        for i in films[200:210]:
+            recommender.record_event(mode, i, "like")
+        recommender.record_event(mode, films[300], "dislike")
+        got[mode].append([r["tmdb_id"] for r in recommender.recommend_for_user(mode, 20)])
+    assert got["binary"] == got["csr"]
+    assert all(len(ids) == 20 for ids in got["csr"])
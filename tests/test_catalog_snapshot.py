@@ -0,0 +1,50 @@
+# tests/test_catalog_snapshot.py
+import os
+import threading
+
+import numpy as np
+
+from src.core import catalog_snapshot
+
+
+def _write(path: str, n: int) -> dict:
+    ids = list(range(1, n + 1))
+    return catalog_snapshot.write_snapshot(
+        path, ids, {"title": [f"t{i}" for i in ids], "popularity": [float(i) for i in ids]},
+        {b: [np.array([i], dtype=np.int32) for i in ids] for b in catalog_snapshot.BLOCKS}, {},
+    )
+
+
+def test_publish_never_leaves_the_path_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "_SNAPSHOT", None)
+    path = str(tmp_path / "snap")
+    os.makedirs(path)  # ancien format : répertoire réel, converti à la première publication
+    _write(path, 3)
+    assert os.path.islink(path) and len(catalog_snapshot.Snapshot(path)) == 3
+
+    stop, missing, errors, sizes = threading.Event(), [], [], set()
+
+    def read():
+        while not stop.is_set():
+            try:
+                snap = catalog_snapshot.get(path, reload=True)
+            except Exception as e:
+                errors.append(e)
+                continue
+            if snap is None:
+                missing.append(1)
+            else:
+                sizes.add(len(snap))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for k in range(20):
+            _write(path, 4 + k % 2)
+    finally:
+        stop.set()
+        reader.join()
+    assert not missing and not errors and sizes <= {3, 4, 5}
+    versions = sorted(n for n in os.listdir(tmp_path) if n.startswith("snap.v"))
+    assert len(versions) == catalog_snapshot.KEEP_VERSIONS
+    assert os.readlink(path) == versions[-1] and len(catalog_snapshot.Snapshot(path)) == 5
@@ -0,0 +1,52 @@
+# tests/test_cursor.py
+import base64
+import json
+
+import pytest
+
+from src.api.app import _decode_cursor, _encode_cursor
+
+
+def _raw(state) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    state = {"s": [550, 13], "e": "graph", "p": {"quality": 0.25}, "o": 40, "v": "abc", "l": 680}
+    assert _decode_cursor(_encode_cursor(state)) == state
+    assert _decode_cursor(_encode_cursor({"s": [1], "e": "knn", "o": 0}))["p"] is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    _raw([1, 2]),
+    _raw({"e": "knn", "o": 0}),                       # pas de graines
+    _raw({"s": [1], "o": 0}),                         # pas de moteur
+    _raw({"s": [1], "e": "svd", "o": 0}),             # moteur inconnu
+    _raw({"s": [1], "e": "knn", "o": -10}),           # offset négatif
+    _raw({"s": [1], "e": "knn", "o": 0, "p": [0.5]}),  # a priori hors dict
+    _raw({"s": ["x"], "e": "knn", "o": 0}),
+])
+def test_cursor_rejected(cursor):
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
+
+
+def test_priors_validated_without_recommender(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from src.api import app as api
+    from src.ml import recommender
+
+    assert api.RECO_PRIORS == recommender.PRIORS
+    # recommender indisponible (ou en chauffe) : repli TMDb, sans 503 pour des a priori valides
+    monkeypatch.setattr(api, "_recommender", lambda: None)
+    monkeypatch.setattr(api, "collect_similar_ids_from_tmdb", lambda seeds, max_needed, max_pages: [])
+    client = TestClient(api.app)
+    ok = client.post("/recommend", json={"seed_ids": [550], "priors": {"quality": 0.3}})
+    assert ok.status_code == 200 and ok.json()["recommendations"] == []
+    for priors in ({"hype": 1.0}, {"quality": "nan"}):
+        bad = client.post("/recommend", json={"seed_ids": [550], "priors": priors})
+        assert bad.status_code == 400
+    bad = client.post("/recommend", json={"cursor": _raw({"s": [550], "e": "knn", "o": 0, "p": {"hype": 1}})})
+    assert bad.status_code == 400
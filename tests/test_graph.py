@@ -0,0 +1,29 @@
+# tests/test_graph.py
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.ml.graph import FilmGraph
+
+
+def _planted_x() -> sparse.csr_matrix:
+    """8 films ; 0 et 1 partagent un réalisateur et deux acteurs, les autres n'ont que des features propres."""
+    rows = [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)]
+    rows += [(f, 2 + f) for f in range(2, 8)]  # feature isolée par film
+    rows += [(2, 3), (3, 2)]  # 2 et 3 : un lien faible avec le voisinage de 0
+    r, c = zip(*rows)
+    return sparse.csr_matrix((np.ones(len(r), dtype=np.float32), (r, c)), shape=(8, 10))
+
+
+@pytest.mark.parametrize("method", ["push", "power"])
+def test_ppr_ranks_planted_neighbour_first(method):
+    g = FilmGraph(_planted_x())
+    scores = g.ppr([0], method=method)
+    scores[0] = -1.0
+    assert int(np.argmax(scores)) == 1
+    assert scores[4] == 0.0  # aucun chemin vers un film isolé
+
+
+def test_ppr_push_close_to_power():
+    g = FilmGraph(_planted_x())
+    assert np.allclose(g.ppr([0, 5], method="push"), g.ppr([0, 5], method="power"), atol=1e-3)
@@ -0,0 +1,73 @@
+# tests/test_ingest_export.py
+import os
+import shutil
+
+import pytest
+from sqlalchemy import text
+
+from src.ingest.ingest_export import ingest_export, read_lines
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+IDS_EXPORT = os.path.join(FIXTURES, "movie_ids_sample.json.gz")
+DETAILS_DUMP = os.path.join(FIXTURES, "movie_details_sample.jsonl")
+
+
+def _films(engine) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT tmdb_id, title, popularity FROM film")).fetchall()
+    return {int(r[0]): (r[1], float(r[2])) for r in rows}
+
+
+def _related(engine, tmdb_id: int) -> tuple:
+    with engine.connect() as conn:
+        def count(sql: str) -> int:
+            return conn.execute(text(sql), {"i": tmdb_id}).scalar()
+        return (
+            count("SELECT COUNT(*) FROM directors WHERE film_tmdb_id = :i"),
+            count("SELECT COUNT(*) FROM actors WHERE film_tmdb_id = :i"),
+            count("SELECT COUNT(*) FROM film_genre WHERE film_id = :i"),
+            conn.execute(text("SELECT genre_ids, director_ids, actor_ids FROM film_features WHERE film_tmdb_id = :i"),
+                         {"i": tmdb_id}).fetchone(),
+        )
+
+
+def test_gzip_detected_by_magic_bytes(tmp_path):
+    # l'extension ne compte pas : un gzip nommé .jsonl et un texte nommé .gz se lisent tous deux
+    gz_as_jsonl = tmp_path / "export.jsonl"
+    shutil.copy(IDS_EXPORT, gz_as_jsonl)
+    text_as_gz = tmp_path / "dump.json.gz"
+    shutil.copy(DETAILS_DUMP, text_as_gz)
+
+    lines = list(read_lines(str(gz_as_jsonl)))
+    assert len(lines) == 7 and lines[0].startswith('{"adult":false,"id":101')
+    assert [line[:9] for line in read_lines(str(text_as_gz))] == ['{"id": 10', '{"id": 20']
+
+
+def test_keep_filters_adult_video_and_popularity(empty_db):
+    stats = ingest_export(IDS_EXPORT, engine=empty_db, min_popularity=1.0)
+    films = _films(empty_db)
+    assert sorted(films) == [101, 105]  # 102 adulte, 103 vidéo, 104 trop peu populaire
+    assert films[101] == ("Alpha", 6.5)  # doublon dans le lot : dernière version
+    assert stats["read"] == 6 and stats["written"] == 2
+
+    ingest_export(IDS_EXPORT, engine=empty_db, min_popularity=1.0, include_adult=True)
+    assert 102 in _films(empty_db) and 103 not in _films(empty_db)
+
+
+@pytest.mark.parametrize("update_existing, popularity", [(False, 30.0), (True, 42.0)])
+def test_existing_films_dropped_unless_update(empty_db, update_existing, popularity):
+    ingest_export(DETAILS_DUMP, engine=empty_db)
+    stats = ingest_export(IDS_EXPORT, engine=empty_db, update_existing=update_existing)
+    assert stats["existing"] == (0 if update_existing else 1)
+    assert _films(empty_db)[105] == ("Heat", popularity)
+
+
+def test_ids_only_records_keep_existing_film_data(empty_db):
+    ingest_export(DETAILS_DUMP, engine=empty_db)
+    before = _related(empty_db, 105)
+    assert before[:3] == (1, 2, 2) and before[3] is not None
+
+    ingest_export(IDS_EXPORT, engine=empty_db, update_existing=True)
+    assert _films(empty_db)[105] == ("Heat", 42.0)  # popularité seule mise à jour
+    assert _related(empty_db, 105) == before
+    assert _films(empty_db)[101] == ("Alpha", 6.5)  # film nouveau : titre original
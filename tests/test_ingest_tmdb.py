@@ -0,0 +1,42 @@
+# tests/test_ingest_tmdb.py
+import copy
+import json
+import os
+
+from sqlalchemy import text
+
+from src.core.packed_ids import unpack_ids
+from src.ingest import ingest_tmdb
+
+DETAILS_DUMP = os.path.join(os.path.dirname(__file__), "fixtures", "movie_details_sample.jsonl")
+
+
+def _heat() -> dict:
+    with open(DETAILS_DUMP, encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def _rows(engine, sql: str) -> list:
+    with engine.connect() as conn:
+        return sorted(tuple(r) for r in conn.execute(text(sql), {"i": 105}).fetchall())
+
+
+def test_reingest_replaces_credits_genres_and_features(empty_db, monkeypatch):
+    monkeypatch.setattr(ingest_tmdb, "engine", empty_db)
+    m = _heat()
+    monkeypatch.setattr(ingest_tmdb, "movie_details", lambda i: m)
+    ingest_tmdb.ingest_one(105)
+    ingest_tmdb.ingest_one(105)  # ré-ingestion identique : aucun doublon
+    assert _rows(empty_db, "SELECT tmdb_id FROM directors WHERE film_tmdb_id = :i") == [(638,)]
+    assert len(_rows(empty_db, "SELECT tmdb_id FROM actors WHERE film_tmdb_id = :i")) == 2
+
+    # TMDb corrige le réalisateur et retire un genre : les anciennes lignes disparaissent
+    m = copy.deepcopy(m)
+    m["credits"]["crew"] = [{"id": 999, "name": "Someone Else", "job": "Director"}]
+    m["genres"] = m["genres"][:1]
+    ingest_tmdb.ingest_one(105)
+    assert _rows(empty_db, "SELECT tmdb_id, name FROM directors WHERE film_tmdb_id = :i") == [(999, "Someone Else")]
+    assert _rows(empty_db, "SELECT genre_id FROM film_genre WHERE film_id = :i") == [(80,)]
+    features = _rows(empty_db, "SELECT director_ids, genre_ids FROM film_features WHERE film_tmdb_id = :i")
+    assert len(features) == 1
+    assert unpack_ids(features[0][0]).tolist() == [999] and unpack_ids(features[0][1]).tolist() == [80]
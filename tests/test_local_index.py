@@ -0,0 +1,35 @@
+# tests/test_local_index.py
+import datetime as dt
+
+from sqlalchemy import text
+
+from src.core import local_index
+
+T0 = dt.datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _insert(engine, tmdb_id: int, synced: dt.datetime) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO film (tmdb_id, title, release_year, last_tmdb_sync) VALUES (:i, '', 0, :s)"),
+                     {"i": tmdb_id, "s": synced})
+
+
+def test_refresh_picks_up_writes_in_the_watermark_second(empty_db, monkeypatch, tmp_path):
+    monkeypatch.setenv("CATALOG_IDS_PATH", str(tmp_path / "no_ids.json"))
+    monkeypatch.setenv("CATALOG_SNAPSHOT_PATH", str(tmp_path / "no_snapshot"))
+    monkeypatch.setattr(local_index, "_ENGINE", empty_db)
+    for name, value in (("_IDS", None), ("_SOURCE", None), ("_WATERMARK", None), ("_AT_WATERMARK", set())):
+        monkeypatch.setattr(local_index, name, value)
+    _insert(empty_db, 1, T0 - dt.timedelta(seconds=5))
+    _insert(empty_db, 2, T0)
+    local_index.init_local_index()
+    assert local_index._SOURCE == ("film", "tmdb_id") and local_index._AT_WATERMARK == {2}
+
+    _insert(empty_db, 3, T0)  # même seconde que le watermark : un `>` strict le perdrait
+    assert local_index.refresh_local_index() == 3
+    assert local_index.has_local_data(3) and local_index._AT_WATERMARK == {2, 3}
+
+    _insert(empty_db, 4, T0 + dt.timedelta(seconds=1))
+    assert local_index.refresh_local_index() == 4
+    assert local_index._AT_WATERMARK == {4}
+    assert local_index.refresh_local_index() == 4  # rien de neuf
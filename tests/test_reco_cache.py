@@ -0,0 +1,24 @@
+# tests/test_reco_cache.py
+import threading
+import time
+
+from src.core import reco_cache
+
+
+def test_log_seeds_never_writes_on_the_request_thread(tmp_path, monkeypatch):
+    store = reco_cache.RecoCache(str(tmp_path / "reco_cache.db"))
+    writers = []
+    flush = store.flush_log
+    monkeypatch.setattr(store, "flush_log", lambda: (writers.append(threading.current_thread().name), flush()))
+    try:
+        for i in range(reco_cache.LOG_FLUSH + 10):
+            store.log_seeds([1, 2] if i % 2 else [3, 2, 1])
+        deadline = time.monotonic() + 5  # réveillé par le seuil LOG_FLUSH, sans attendre LOG_FLUSH_S
+        while not writers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writers and set(writers) == {"reco-cache-log"}
+        assert store.frequent(2, 10) == [([1, 2], (reco_cache.LOG_FLUSH + 10) // 2)]
+        assert store.frequent(3, 10) == [([1, 2, 3], (reco_cache.LOG_FLUSH + 10) // 2)]
+    finally:
+        store.close()
+    assert not store._flusher.is_alive()
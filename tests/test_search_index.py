@@ -0,0 +1,28 @@
+# tests/test_search_index.py
+from src.core import search_index
+from src.core.search_index import SHORT_PREFIX_TOP, TitleIndex
+
+
+def _index(n_common: int = SHORT_PREFIX_TOP + 50) -> TitleIndex:
+    # n_common titres plus populaires qui partagent le préfixe « zq », puis la cible, la moins populaire
+    titles = [f"zq{i:04d} common" for i in range(n_common)] + ["Zqx Target"]
+    popularity = [1000.0 - i for i in range(n_common)] + [0.1]
+    ids = list(range(1, n_common + 2))
+    return TitleIndex(ids, titles, popularity, years=[1999] * (n_common + 1),
+                      dates=[19990331] * n_common + [0])
+
+
+def test_short_head_prefix_reads_full_postings():
+    idx = _index()
+    # « zq » en tête n'est pas un token exact : préfixe sans coupe, la cible au-delà du top 256 est trouvée
+    assert len(idx._prefix_docs("zq", None)) == SHORT_PREFIX_TOP + 51
+    assert len(idx._prefix_docs("zq", SHORT_PREFIX_TOP)) == SHORT_PREFIX_TOP
+    hits = idx.search("zq targ", limit=5)
+    assert [int(idx.ids[d]) for d, _ in hits] == [SHORT_PREFIX_TOP + 51]
+
+
+def test_search_keeps_full_release_date():
+    search_index.build([1, 2], ["Heat", "Heat Wave"], [30.0, 1.0], years=[1995, 1960], dates=[19951215, 0])
+    res = {m["id"]: m for m in search_index.search("heat")}
+    assert res[1]["release_date"] == "1995-12-15"  # date complète, comme la réponse TMDb
+    assert res[2]["release_date"] == "1960"        # date inconnue : l'année seule
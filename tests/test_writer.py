@@ -0,0 +1,32 @@
+# tests/test_writer.py
+import datetime as dt
+
+from sqlalchemy import text
+
+from src.ingest.writer import insert_rows
+
+COLS = ["name", "value", "updated_at"]
+NOW = dt.datetime(2025, 10, 19)
+
+
+def _state(engine) -> dict:
+    with engine.connect() as conn:
+        return dict(conn.execute(text("SELECT name, value FROM sync_state")).fetchall())
+
+
+def test_insert_rows_conflict_modes(empty_db):
+    rows = [{"name": f"n{i}", "value": "a", "updated_at": NOW} for i in range(1203)]  # plusieurs INSERT
+    with empty_db.begin() as conn:
+        assert insert_rows(conn, "sync_state", COLS, rows) == 1203
+    with empty_db.begin() as conn:
+        insert_rows(conn, "sync_state", COLS, [{"name": "n0", "value": "b", "updated_at": NOW}], on_conflict="ignore", keys=("name",))
+    assert _state(empty_db)["n0"] == "a"
+    with empty_db.begin() as conn:
+        insert_rows(conn, "sync_state", COLS, [{"name": "n0", "value": "c", "updated_at": NOW}, {"name": "new", "value": "d", "updated_at": NOW}],
+                    on_conflict="update", keys=("name",))
+    state = _state(empty_db)
+    assert (state["n0"], state["new"], len(state)) == ("c", "d", 1204)
+    with empty_db.begin() as conn:  # sans colonne à mettre à jour : ignore
+        insert_rows(conn, "sync_state", COLS, [{"name": "n1", "value": "e", "updated_at": NOW}],
+                    on_conflict="update", keys=("name",), update=["name"])
+    assert _state(empty_db)["n1"] == "a"